@@ -19,12 +19,13 @@ Core Components:
 __version__ = "1.0.0"
 
 # Core exports
-from phone_agent.agent import AgentConfig, PhoneAgent
+from phone_agent.agent import AgentConfig, PhoneAgent, run_batch
 from phone_agent.model import ModelClient, ModelConfig
 
 __all__ = [
     "PhoneAgent",
     "AgentConfig",
+    "run_batch",
     "ModelConfig",
     "ModelClient",
     "__version__",
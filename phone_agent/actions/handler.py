@@ -5,6 +5,10 @@
 
 """Action handler for processing AI model outputs."""
 
+import ast
+import asyncio
+import re
+import threading
 import time
 from dataclasses import dataclass
 from typing import Any, Callable
@@ -15,12 +19,39 @@ from phone_agent.adb import (
     home,
     launch_app,
     long_press,
+    smart_type_text,
     swipe,
     tap,
 )
+from phone_agent.adb.app_discovery import get_third_party_packages
 
+# Background event loop shared by sync handlers that need async ADB helpers
+_async_loop: asyncio.AbstractEventLoop | None = None
+_async_loop_lock = threading.Lock()
 
-@dataclass
+# Fast-path patterns for the most common model outputs (skip ast.parse on hit)
+_FAST_ELEMENT_RE = re.compile(
+    r'^do\(action="(Tap|Double Tap|Long Press)",\s*element=\[(\d+),\s*(\d+)\]\)$'
+)
+_FAST_SWIPE_RE = re.compile(
+    r'^do\(action="Swipe",\s*start=\[(\d+),\s*(\d+)\],\s*end=\[(\d+),\s*(\d+)\]\)$'
+)
+_FAST_LAUNCH_RE = re.compile(r'^do\(action="Launch",\s*app="([^"\\]*)"\)$')
+_FAST_KEY_RE = re.compile(r'^do\(action="(Back|Home)"\)$')
+
+# Precompiled patterns for the regex fallback parser
+_FUNC_RE = re.compile(r"^(do|submit_result)\((.*)\)$", re.DOTALL)
+_ACTION_RE = re.compile(r'action\s*=\s*["\'](\w+)["\']')
+_APP_RE = re.compile(r'app\s*=\s*["\'](.+?)["\']')
+_TEXT_RE = re.compile(r'text\s*=\s*["\'](.+?)["\']')
+_ELEMENT_RE = re.compile(r"element\s*=\s*\[(\d+)\s*,\s*(\d+)\]")
+_START_RE = re.compile(r"start\s*=\s*\[(\d+)\s*,\s*(\d+)\]")
+_END_RE = re.compile(r"end\s*=\s*\[(\d+)\s*,\s*(\d+)\]")
+_MESSAGE_RE = re.compile(r'message\s*=\s*["\'](.+?)["\']')
+_DURATION_RE = re.compile(r'duration\s*=\s*["\'](.+?)["\']')
+
+
+@dataclass(slots=True)
 class ActionResult:
     """Result of an action execution."""
 
@@ -83,42 +114,86 @@ class ActionHandler:
                 message=f"Unknown action type: {action_type}",
             )
 
-        action_name = action.get("action")
-        handler_method = self._get_handler(action_name)
-
-        if handler_method is None:
-            return ActionResult(
-                success=False,
-                should_finish=False,
-                message=f"Unknown action: {action_name}",
-            )
-
         try:
-            return handler_method(action, screen_width, screen_height)
+            return self._dispatch(action.get("action"), action, screen_width, screen_height)
         except Exception as e:
             return ActionResult(success=False, should_finish=False, message=f"Action failed: {e}")
 
-    def _get_handler(self, action_name: str) -> Callable | None:
-        """Get the handler method for an action."""
-        handlers = {
-            "Launch": self._handle_launch,
-            "Tap": self._handle_tap,
-            "Type": self._handle_type,
-            "Type_Name": self._handle_type,
-            "Swipe": self._handle_swipe,
-            "Back": self._handle_back,
-            "Home": self._handle_home,
-            "Double Tap": self._handle_double_tap,
-            "Long Press": self._handle_long_press,
-            "Wait": self._handle_wait,
-            "Take_over": self._handle_takeover,
-            "Note": self._handle_note,
-            "Call_API": self._handle_call_api,
-            "Interact": self._handle_interact,
-            "GetInstalledApps": self._handle_get_installed_apps,
-            "UpdateMemory": self._handle_update_memory,
-        }
-        return handlers.get(action_name)
+    async def execute_async(
+        self, action: dict[str, Any], screen_width: int, screen_height: int
+    ) -> ActionResult:
+        """
+        Execute an action without blocking the event loop.
+
+        The ADB calls are blocking subprocesses, so the action runs in a worker
+        thread; several devices can then be driven concurrently.
+        """
+        return await asyncio.to_thread(self.execute, action, screen_width, screen_height)
+
+    @staticmethod
+    async def execute_many(
+        handlers: list["ActionHandler"],
+        action: dict[str, Any],
+        screen_width: int,
+        screen_height: int,
+    ) -> list[ActionResult]:
+        """
+        Execute the same action on several devices in parallel.
+
+        Args:
+            handlers: One ActionHandler per device.
+            action: The action dictionary from the model.
+            screen_width: Screen width in pixels.
+            screen_height: Screen height in pixels.
+
+        Returns:
+            ActionResults in the same order as ``handlers``.
+        """
+        return await asyncio.gather(
+            *(h.execute_async(action, screen_width, screen_height) for h in handlers)
+        )
+
+    def _dispatch(
+        self, action_name: str | None, action: dict, width: int, height: int
+    ) -> ActionResult:
+        """Route an action to its handler method."""
+        match action_name:
+            case "Launch":
+                return self._handle_launch(action, width, height)
+            case "Tap":
+                return self._handle_tap(action, width, height)
+            case "Type" | "Type_Name":
+                return self._handle_type(action, width, height)
+            case "Swipe":
+                return self._handle_swipe(action, width, height)
+            case "Back":
+                return self._handle_back(action, width, height)
+            case "Home":
+                return self._handle_home(action, width, height)
+            case "Double Tap":
+                return self._handle_double_tap(action, width, height)
+            case "Long Press":
+                return self._handle_long_press(action, width, height)
+            case "Wait":
+                return self._handle_wait(action, width, height)
+            case "Take_over":
+                return self._handle_takeover(action, width, height)
+            case "Note":
+                return self._handle_note(action, width, height)
+            case "Call_API":
+                return self._handle_call_api(action, width, height)
+            case "Interact":
+                return self._handle_interact(action, width, height)
+            case "GetInstalledApps":
+                return self._handle_get_installed_apps(action, width, height)
+            case "UpdateMemory":
+                return self._handle_update_memory(action, width, height)
+            case _:
+                return ActionResult(
+                    success=False,
+                    should_finish=False,
+                    message=f"Unknown action: {action_name}",
+                )
 
     def _convert_relative_to_absolute(
         self, element: list[int], screen_width: int, screen_height: int
@@ -164,8 +239,6 @@ class ActionHandler:
         text = action.get("text", "")
 
         # 使用智能输入（优先yadb，兜底ADB Keyboard）
-        from phone_agent.adb.smart_input import smart_type_text
-
         success = smart_type_text(text, self.device_id)
 
         if success:
@@ -265,22 +338,9 @@ class ActionHandler:
     def _handle_get_installed_apps(self, action: dict, width: int, height: int) -> ActionResult:
         """Handle GetInstalledApps action."""
         # 暂时只支持获取第三方应用，因为系统应用太多
-        import asyncio
-
-        from phone_agent.adb.app_discovery import get_third_party_packages
-
-        # 这里的 execute 是同步的，但 device_pool 可能是异步的
-        # 不过 adb.app_discovery 是 async 的
-        # 由于 handler 方法都在同步上下文中调用 (agent.py -> action_handler.execute)
-        # 我们需要在这里运行 async 代码
-
-        try:
-            loop = asyncio.get_event_loop()
-        except RuntimeError:
-            loop = asyncio.new_event_loop()
-            asyncio.set_event_loop(loop)
-
-        apps = loop.run_until_complete(get_third_party_packages(self.device_id))
+        # handler 方法都在同步上下文中调用 (agent.py -> action_handler.execute)，
+        # 而 adb.app_discovery 是 async 的：提交到共享的后台事件循环执行
+        apps = _run_async(get_third_party_packages(self.device_id))
 
         app_list_str = ", ".join(apps)
         return ActionResult(
@@ -296,6 +356,24 @@ class ActionHandler:
         )
 
 
+def _get_async_loop() -> asyncio.AbstractEventLoop:
+    """Get the shared background event loop, starting its thread on first use."""
+    global _async_loop
+    with _async_loop_lock:
+        if _async_loop is None:
+            loop = asyncio.new_event_loop()
+            threading.Thread(
+                target=loop.run_forever, name="action-handler-loop", daemon=True
+            ).start()
+            _async_loop = loop
+    return _async_loop
+
+
+def _run_async(coro: Any) -> Any:
+    """Run a coroutine on the shared background loop and wait for its result."""
+    return asyncio.run_coroutine_threadsafe(coro, _get_async_loop()).result()
+
+
 def parse_action(response: str) -> dict[str, Any]:
     """
     Parse action from model response using AST (safe alternative to eval).
@@ -312,10 +390,13 @@ def parse_action(response: str) -> dict[str, Any]:
     Security:
         Uses AST parsing instead of eval() to prevent code injection attacks.
     """
-    import ast
-
     response = response.strip()
 
+    # Method 0: fast path for the common do(...) shapes
+    fast = _parse_action_fast(response)
+    if fast is not None:
+        return fast
+
     try:
         # Method 1: AST parsing (safest)
         tree = ast.parse(response, mode="eval")
@@ -328,24 +409,10 @@ def parse_action(response: str) -> dict[str, Any]:
         if func_name not in ["do", "submit_result"]:
             raise ValueError(f"Unknown function: {func_name}")
 
-        # Extract arguments safely
+        # Extract arguments safely (literal nodes only)
         args = {}
         for keyword in tree.body.keywords:
-            arg_name = keyword.arg
-            # Use literal_eval to safely evaluate the value
-            try:
-                arg_value = ast.literal_eval(keyword.value)
-            except (ValueError, SyntaxError):
-                # If literal_eval fails, try to get the value as string
-                if isinstance(keyword.value, ast.Constant):
-                    arg_value = keyword.value.value
-                elif isinstance(keyword.value, ast.List):
-                    # Handle list literals like [x, y]
-                    arg_value = [ast.literal_eval(el) for el in keyword.value.elts]
-                else:
-                    raise ValueError(f"Cannot parse argument: {arg_name}")
-
-            args[arg_name] = arg_value
+            args[keyword.arg] = _literal_value(keyword.value)
 
         args["_metadata"] = "submit_result" if func_name == "submit_result" else func_name
         return args
@@ -360,6 +427,73 @@ def parse_action(response: str) -> dict[str, Any]:
             )
 
 
+def _parse_action_fast(response: str) -> dict[str, Any] | None:
+    """
+    Parse the most common action shapes with precompiled regexes.
+
+    Produces exactly the dict the AST path would, or None when the response
+    does not match one of the known shapes.
+    """
+    match = _FAST_ELEMENT_RE.match(response)
+    if match:
+        return {
+            "action": match.group(1),
+            "element": [int(match.group(2)), int(match.group(3))],
+            "_metadata": "do",
+        }
+
+    match = _FAST_SWIPE_RE.match(response)
+    if match:
+        return {
+            "action": "Swipe",
+            "start": [int(match.group(1)), int(match.group(2))],
+            "end": [int(match.group(3)), int(match.group(4))],
+            "_metadata": "do",
+        }
+
+    match = _FAST_LAUNCH_RE.match(response)
+    if match:
+        return {"action": "Launch", "app": match.group(1), "_metadata": "do"}
+
+    match = _FAST_KEY_RE.match(response)
+    if match:
+        return {"action": match.group(1), "_metadata": "do"}
+
+    return None
+
+
+def _literal_value(node: ast.AST) -> Any:
+    """
+    Convert an already-parsed literal AST node to its Python value.
+
+    Equivalent to ast.literal_eval for the literals the model emits, without
+    re-dispatching through literal_eval for every keyword.
+
+    Raises:
+        ValueError: If the node is not a supported literal.
+    """
+    if isinstance(node, ast.Constant):
+        return node.value
+    if isinstance(node, ast.List):
+        # element=[x, y]: elements are plain constants, read them directly
+        return [
+            el.value if isinstance(el, ast.Constant) else _literal_value(el) for el in node.elts
+        ]
+    if isinstance(node, ast.Tuple):
+        return tuple(_literal_value(el) for el in node.elts)
+    if isinstance(node, ast.Dict):
+        return {_literal_value(k): _literal_value(v) for k, v in zip(node.keys, node.values)}
+    if (
+        isinstance(node, ast.UnaryOp)
+        and isinstance(node.op, (ast.USub, ast.UAdd))
+        and isinstance(node.operand, ast.Constant)
+        and isinstance(node.operand.value, (int, float))
+    ):
+        value = node.operand.value
+        return -value if isinstance(node.op, ast.USub) else value
+    raise ValueError(f"Unsupported literal: {type(node).__name__}")
+
+
 def _parse_action_with_regex(response: str) -> dict[str, Any]:
     """
     Fallback regex-based parser for simple action strings.
@@ -370,10 +504,8 @@ def _parse_action_with_regex(response: str) -> dict[str, Any]:
     Returns:
         Parsed action dictionary.
     """
-    import re
-
     # Match do(...) or submit_result(...)
-    func_match = re.match(r"^(do|submit_result)\((.*)\)$", response, re.DOTALL)
+    func_match = _FUNC_RE.match(response)
     if not func_match:
         raise ValueError(f"Invalid action format: {response}")
 
@@ -386,48 +518,48 @@ def _parse_action_with_regex(response: str) -> dict[str, Any]:
     # Handle special patterns
     if func_name == "submit_result":
         # submit_result(message="xxx")
-        message_match = re.search(r'message\s*=\s*["\'](.+?)["\']', args_str)
+        message_match = _MESSAGE_RE.search(args_str)
         if message_match:
             args["message"] = message_match.group(1)
     else:
         # Parse action, element, etc.
         # action="Launch"
-        action_match = re.search(r'action\s*=\s*["\'](\w+)["\']', args_str)
+        action_match = _ACTION_RE.search(args_str)
         if action_match:
             args["action"] = action_match.group(1)
 
         # app="xxx"
-        app_match = re.search(r'app\s*=\s*["\'](.+?)["\']', args_str)
+        app_match = _APP_RE.search(args_str)
         if app_match:
             args["app"] = app_match.group(1)
 
         # text="xxx"
-        text_match = re.search(r'text\s*=\s*["\'](.+?)["\']', args_str)
+        text_match = _TEXT_RE.search(args_str)
         if text_match:
             args["text"] = text_match.group(1)
 
         # element=[x,y]
-        element_match = re.search(r"element\s*=\s*\[(\d+)\s*,\s*(\d+)\]", args_str)
+        element_match = _ELEMENT_RE.search(args_str)
         if element_match:
             args["element"] = [int(element_match.group(1)), int(element_match.group(2))]
 
         # start=[x,y]
-        start_match = re.search(r"start\s*=\s*\[(\d+)\s*,\s*(\d+)\]", args_str)
+        start_match = _START_RE.search(args_str)
         if start_match:
             args["start"] = [int(start_match.group(1)), int(start_match.group(2))]
 
         # end=[x,y]
-        end_match = re.search(r"end\s*=\s*\[(\d+)\s*,\s*(\d+)\]", args_str)
+        end_match = _END_RE.search(args_str)
         if end_match:
             args["end"] = [int(end_match.group(1)), int(end_match.group(2))]
 
         # message="xxx"
-        message_match = re.search(r'message\s*=\s*["\'](.+?)["\']', args_str)
+        message_match = _MESSAGE_RE.search(args_str)
         if message_match:
             args["message"] = message_match.group(1)
 
         # duration="x seconds"
-        duration_match = re.search(r'duration\s*=\s*["\'](.+?)["\']', args_str)
+        duration_match = _DURATION_RE.search(args_str)
         if duration_match:
             args["duration"] = duration_match.group(1)
 
@@ -17,13 +17,21 @@ from phone_agent.adb.connection import (
 )
 from phone_agent.adb.device import (
     back,
+    back_async,
     double_tap,
+    double_tap_async,
     get_current_app,
     home,
+    home_async,
     launch_app,
+    launch_app_async,
     long_press,
+    long_press_async,
+    run_adb_batch,
     swipe,
+    swipe_async,
     tap,
+    tap_async,
 )
 from phone_agent.adb.input import (
     clear_text,
@@ -59,6 +67,15 @@ __all__ = [
     "double_tap",
     "long_press",
     "launch_app",
+    "run_adb_batch",
+    # Device control (async)
+    "tap_async",
+    "swipe_async",
+    "back_async",
+    "home_async",
+    "double_tap_async",
+    "long_press_async",
+    "launch_app_async",
     # Connection management
     "ADBConnection",
     "DeviceInfo",
@@ -0,0 +1,146 @@
+#!/usr/bin/env python3
+# Copyright (C) 2025 PhoneAgent Contributors
+# Licensed under AGPL-3.0
+
+"""
+ADB 客户端连接池 - ADB Client Pool
+
+安装了 pure-python-adb（ppadb）时，直接用 ADB wire protocol 与 adb server
+（默认 127.0.0.1:5037）通信，不再为每次截图 fork/exec 一个 adb 进程。
+客户端与设备句柄按 (host, port, serial) 缓存复用。
+
+未安装 ppadb 时所有函数返回 None，调用方退回 subprocess 路径：
+    pip install "phoneagent[adbclient]"
+
+短 shell 命令已经由常驻 adb shell（shell_session.py）处理，这里只负责
+大数据量的截图传输。
+"""
+
+import logging
+import os
+import threading
+from typing import Dict, Optional, Tuple
+
+# 可选依赖：pure-python-adb
+try:
+    from ppadb.client import Client as AdbClient
+
+    PPADB_AVAILABLE = True
+except ImportError:
+    AdbClient = None
+    PPADB_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+# 是否启用连接池（未安装 ppadb 时自动忽略）
+USE_ADB_CLIENT_POOL = os.getenv("ADB_CLIENT_POOL", "true").lower() == "true"
+
+DEFAULT_ADB_HOST = "127.0.0.1"
+DEFAULT_ADB_PORT = 5037
+
+
+class AdbClientPool:
+    """按 (host, port) 缓存 adb server 客户端，按 (host, port, serial) 缓存设备句柄"""
+
+    def __init__(self):
+        self._clients: Dict[Tuple[str, int], "AdbClient"] = {}
+        self._devices: Dict[Tuple[str, int, Optional[str]], object] = {}
+        self._lock = threading.Lock()
+
+    def device(
+        self,
+        serial: Optional[str] = None,
+        host: Optional[str] = None,
+        port: Optional[int] = None,
+    ):
+        """
+        获取设备句柄
+
+        Args:
+            serial: 设备序列号；为 None 时要求该 adb server 上恰好只有一台设备
+                （与 adb 命令行一致，多台设备时不猜测，返回 None）
+            host: adb server 地址（FRP 隧道模式）
+            port: adb server 端口
+
+        Returns:
+            ppadb Device，找不到设备时返回 None
+        """
+        host = host or DEFAULT_ADB_HOST
+        port = port or DEFAULT_ADB_PORT
+        key = (host, port, serial)
+
+        with self._lock:
+            device = self._devices.get(key)
+            if device is not None:
+                return device
+
+            client = self._clients.get((host, port))
+            if client is None:
+                client = self._clients[(host, port)] = AdbClient(host=host, port=port)
+
+        if not serial:
+            # 不缓存：设备列表随时可能变化，每次都确认只有一台
+            devices = client.devices()
+            if len(devices) != 1:
+                logger.debug("ADB pool: %d devices attached and no serial given", len(devices))
+                return None
+            return devices[0]
+
+        device = client.device(serial)
+        if device is not None:
+            with self._lock:
+                self._devices[key] = device
+        return device
+
+    def discard(
+        self,
+        serial: Optional[str] = None,
+        host: Optional[str] = None,
+        port: Optional[int] = None,
+    ):
+        """丢弃失效的设备句柄（下次调用时重新获取）"""
+        key = (host or DEFAULT_ADB_HOST, port or DEFAULT_ADB_PORT, serial)
+        with self._lock:
+            self._devices.pop(key, None)
+
+
+# 全局连接池（延迟创建）
+_adb_pool: Optional[AdbClientPool] = None
+
+
+def get_adb_pool() -> Optional[AdbClientPool]:
+    """获取全局连接池；未安装 ppadb 或已禁用时返回 None"""
+    global _adb_pool
+
+    if not (PPADB_AVAILABLE and USE_ADB_CLIENT_POOL):
+        return None
+    if _adb_pool is None:
+        _adb_pool = AdbClientPool()
+    return _adb_pool
+
+
+def pooled_screencap(
+    serial: Optional[str] = None, host: Optional[str] = None, port: Optional[int] = None
+) -> Optional[bytes]:
+    """
+    通过连接池获取 PNG 截图
+
+    Returns:
+        PNG 字节；连接池不可用或截图失败时返回 None（调用方退回 adb exec-out）
+    """
+    pool = get_adb_pool()
+    if pool is None:
+        return None
+
+    try:
+        device = pool.device(serial, host, port)
+        if device is None:
+            return None
+        return device.screencap() or None
+    except Exception as e:
+        logger.debug("Pooled screencap failed, falling back to adb: %s", e)
+        pool.discard(serial, host, port)
+        return None
+
+
+__all__ = ["PPADB_AVAILABLE", "AdbClientPool", "get_adb_pool", "pooled_screencap"]
@@ -14,15 +14,88 @@
 5. 探索行为 - 模拟真人寻找过程
 """
 
+import copy
 import json
 import logging
 import os
 import random
+import struct
+import threading
 import time
-from typing import Any, Dict, List, Optional, Tuple
+from types import MappingProxyType
+from typing import Any, Dict, List, Mapping, Optional, Tuple
+
+try:
+    import numpy as np
+    from numba import njit
+
+    NUMBA_AVAILABLE = True
+except ImportError:
+    NUMBA_AVAILABLE = False
+
+try:
+    import orjson
+
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
 
 logger = logging.getLogger(__name__)
 
+# Linux input 事件常量（用于 sendevent 二进制流）
+EV_SYN = 0x00
+EV_KEY = 0x01
+EV_ABS = 0x03
+SYN_REPORT = 0x00
+BTN_TOUCH = 0x14A
+ABS_MT_POSITION_X = 0x35
+ABS_MT_POSITION_Y = 0x36
+ABS_MT_TRACKING_ID = 0x39
+
+# struct input_event：timeval(2×long) + type(u16) + code(u16) + value(s32)
+# 布局取决于写入进程的位数（64 位用户态 24 字节，32 位用户态 16 字节）
+INPUT_EVENT_64 = struct.Struct("<qqHHi")
+INPUT_EVENT_32 = struct.Struct("<llHHi")
+
+
+# 贝塞尔基函数缓存：steps 通常只配置一次，按 steps 缓存每个采样点的 4 个权重
+_BERNSTEIN_CACHE: Dict[int, List[Tuple[float, float, float, float]]] = {}
+
+
+def _bernstein_basis(steps: int) -> List[Tuple[float, float, float, float]]:
+    """获取（并缓存）三次贝塞尔曲线在 steps+1 个采样点上的基函数权重"""
+    basis = _BERNSTEIN_CACHE.get(steps)
+    if basis is None:
+        basis = []
+        for i in range(steps + 1):
+            t = i / steps
+            mt = 1 - t
+            t2 = t * t
+            mt2 = mt * mt
+            basis.append((mt2 * mt, 3 * mt2 * t, 3 * mt * t2, t2 * t))
+        _BERNSTEIN_CACHE[steps] = basis
+    return basis
+
+
+if NUMBA_AVAILABLE:
+
+    @njit(cache=True, fastmath=True)
+    def _bezier_kernel(x0, y0, x1, y1, x2, y2, x3, y3, steps):
+        """Numba 编译的贝塞尔曲线采样内核，返回 (steps+1, 2) 的 int32 数组"""
+        points = np.empty((steps + 1, 2), np.int32)
+        for i in range(steps + 1):
+            t = i / steps
+            mt = 1.0 - t
+            t2 = t * t
+            mt2 = mt * mt
+            b0 = mt2 * mt
+            b1 = 3.0 * mt2 * t
+            b2 = 3.0 * mt * t2
+            b3 = t2 * t
+            points[i, 0] = int(b0 * x0 + b1 * x1 + b2 * x2 + b3 * x3)
+            points[i, 1] = int(b0 * y0 + b1 * y1 + b2 * y2 + b3 * y3)
+        return points
+
 
 def bezier_curve(
     p0: Tuple[float, float],
@@ -44,33 +117,70 @@ def bezier_curve(
     Returns:
         [(x, y), ...] 曲线上的点列表
     """
-    points = []
-    for i in range(steps + 1):
-        t = i / steps
-
-        # 三次贝塞尔曲线公式
-        x = (
-            (1 - t) ** 3 * p0[0]
-            + 3 * (1 - t) ** 2 * t * p1[0]
-            + 3 * (1 - t) * t**2 * p2[0]
-            + t**3 * p3[0]
+    return _sample_bezier(p0[0], p0[1], p1[0], p1[1], p2[0], p2[1], p3[0], p3[1], steps)
+
+
+def _sample_bezier(
+    x0: float,
+    y0: float,
+    x1: float,
+    y1: float,
+    x2: float,
+    y2: float,
+    x3: float,
+    y3: float,
+    steps: int,
+) -> List[Tuple[int, int]]:
+    """贝塞尔曲线采样入口（标量参数），滑动轨迹生成直接调用，避免打包控制点元组"""
+    # 安装了 numba 时走编译内核（可选依赖：pip install phoneagent[jit]）
+    if NUMBA_AVAILABLE:
+        points = _bezier_kernel(
+            float(x0),
+            float(y0),
+            float(x1),
+            float(y1),
+            float(x2),
+            float(y2),
+            float(x3),
+            float(y3),
+            steps,
         )
+        return [(x, y) for x, y in points.tolist()]
 
-        y = (
-            (1 - t) ** 3 * p0[1]
-            + 3 * (1 - t) ** 2 * t * p1[1]
-            + 3 * (1 - t) * t**2 * p2[1]
-            + t**3 * p3[1]
+    # 三次贝塞尔曲线公式：基函数权重已预计算，每个点只剩一次加权求和
+    return [
+        (
+            int(b0 * x0 + b1 * x1 + b2 * x2 + b3 * x3),
+            int(b0 * y0 + b1 * y1 + b2 * y2 + b3 * y3),
         )
-
-        points.append((int(x), int(y)))
-
-    return points
+        for b0, b1, b2, b3 in _bernstein_basis(steps)
+    ]
 
 
 class AntiDetection:
     """防风控策略管理器"""
 
+    __slots__ = (
+        "config",
+        "_view",
+        "_rng",
+        "_enabled",
+        "_time_gate",
+        "_pos_gate",
+        "_bezier_gate",
+        "_typing_gate",
+        "_explore_gate",
+        "_min_delay",
+        "_max_delay",
+        "_pos_pct",
+        "_bezier_steps",
+        "_bezier_rand",
+        "_typing_min",
+        "_typing_max",
+        "_typo_prob",
+        "_explore_prob",
+    )
+
     def __init__(self, config: Optional[Dict[str, Any]] = None):
         """
         初始化防风控
@@ -105,16 +215,58 @@ class AntiDetection:
             "pause_every_n_chars": 10,  # 每N个字符停顿
             # 探索配置
             "exploration_probability": 0.3,  # 30%探索概率
+            # sendevent 滑动（实验性）：设置触摸设备节点（如 /dev/input/event5）后，
+            # 贝塞尔轨迹推送到设备并按滑动时长逐帧写入，而不是逐段调用 input swipe；
+            # 需要 shell 对该节点有写权限，不可用时自动退回 input swipe
+            "sendevent_touch_device": None,
         }
 
         # 更新配置
         if config:
             self.config.update(config)
 
+        # 配置的只读视图（随 self.config 实时更新，无需复制）
+        self._view = MappingProxyType(self.config)
+
+        # 独立的随机数生成器，避免与全局 random 模块共享状态
+        self._rng = random.Random()
+        self._refresh_cache()
+
+    def _refresh_cache(self):
+        """根据当前配置重新计算热路径使用的缓存值（配置变更后调用）"""
+        config = self.config
+
+        # 功能开关：总开关与各功能开关预先合并，热路径只需判断一个属性
+        enabled = bool(config.get("enabled", True))
+        self._enabled = enabled
+        self._time_gate = enabled and bool(config.get("enable_time_random", True))
+        self._pos_gate = enabled and bool(config.get("enable_position_random", True))
+        self._bezier_gate = enabled and bool(config.get("enable_bezier_swipe", True))
+        self._typing_gate = enabled and bool(config.get("enable_typing_simulation", True))
+        self._explore_gate = enabled and bool(config.get("enable_exploration", True))
+
+        # 时间配置
+        delay_levels = config["delay_levels"]
+        delay_config = delay_levels.get(self.level, delay_levels["medium"])
+        self._min_delay = delay_config["min"]
+        self._max_delay = delay_config["max"]
+
+        # 坐标 / 贝塞尔配置
+        self._pos_pct = float(config.get("position_offset_percentage", 0.2))
+        self._bezier_steps = config.get("bezier_steps", 20)
+        self._bezier_rand = config.get("bezier_control_randomness", 100)
+
+        # 输入 / 探索配置
+        typing_config = config.get("typing_delay", {"min": 0.1, "max": 0.3})
+        self._typing_min = typing_config["min"]
+        self._typing_max = typing_config["max"]
+        self._typo_prob = config.get("typo_probability", 0.05)
+        self._explore_prob = config.get("exploration_probability", 0.3)
+
     @property
     def enabled(self) -> bool:
         """是否启用防风控"""
-        return self.config.get("enabled", True)
+        return self._enabled
 
     @property
     def level(self) -> str:
@@ -123,41 +275,51 @@ class AntiDetection:
 
     def update_config(self, config: Dict[str, Any]):
         """
-        更新配置
+        更新配置（直接修改 self.config 不会刷新缓存，请使用本方法）
 
         Args:
             config: 新的配置项
         """
         self.config.update(config)
+        self._refresh_cache()
 
-    def get_config(self) -> Dict[str, Any]:
-        """获取当前配置"""
-        return self.config.copy()
+    def get_config(self) -> Mapping[str, Any]:
+        """获取当前配置（只读视图，不复制）"""
+        return self._view
+
+    def snapshot(self) -> Dict[str, Any]:
+        """获取当前配置的深拷贝（调用方可自由修改）"""
+        return copy.deepcopy(self.config)
 
     def set_level(self, level: str):
         """设置防护等级"""
         if level in ["low", "medium", "high"]:
             self.config["level"] = level
+            self._refresh_cache()
 
     def enable(self):
         """启用防风控"""
         self.config["enabled"] = True
+        self._refresh_cache()
 
     def disable(self):
         """禁用防风控"""
         self.config["enabled"] = False
+        self._refresh_cache()
 
     def enable_feature(self, feature: str):
         """启用特定功能"""
         key = f"enable_{feature}"
         if key in self.config:
             self.config[key] = True
+            self._refresh_cache()
 
     def disable_feature(self, feature: str):
         """禁用特定功能"""
         key = f"enable_{feature}"
         if key in self.config:
             self.config[key] = False
+            self._refresh_cache()
 
     def human_delay(
         self, min_override: Optional[float] = None, max_override: Optional[float] = None
@@ -169,32 +331,45 @@ class AntiDetection:
             min_override: 覆盖最小延迟
             max_override: 覆盖最大延迟
         """
-        if not self.enabled or not self.config.get("enable_time_random", True):
-            return
+        delay = self.human_delay_seconds(min_override, max_override)
+        if delay:
+            time.sleep(delay)
 
-        delay_config = self.config["delay_levels"].get(
-            self.level, self.config["delay_levels"]["medium"]
-        )
-        min_sec = min_override if min_override is not None else delay_config["min"]
-        max_sec = max_override if max_override is not None else delay_config["max"]
+    def human_delay_seconds(
+        self, min_override: Optional[float] = None, max_override: Optional[float] = None
+    ) -> float:
+        """
+        计算一次人类操作延迟（不休眠，供异步调用方 await asyncio.sleep）
 
-        delay = random.uniform(min_sec, max_sec)
-        time.sleep(delay)
+        Args:
+            min_override: 覆盖最小延迟
+            max_override: 覆盖最大延迟
+
+        Returns:
+            延迟秒数，未启用时为 0.0
+        """
+        if not self._time_gate:
+            return 0.0
+
+        min_sec = min_override if min_override is not None else self._min_delay
+        max_sec = max_override if max_override is not None else self._max_delay
+
+        return self._rng.uniform(min_sec, max_sec)
 
     def reading_delay(self):
         """模拟阅读延迟（查看内容）"""
-        if not self.enabled:
+        if not self._enabled:
             return
 
-        delay = random.uniform(2.0, 5.0)
+        delay = self._rng.uniform(2.0, 5.0)
         time.sleep(delay)
 
     def thinking_delay(self):
         """模拟思考延迟（输入前）"""
-        if not self.enabled:
+        if not self._enabled:
             return
 
-        delay = random.uniform(0.8, 2.0)
+        delay = self._rng.uniform(0.8, 2.0)
         time.sleep(delay)
 
     def random_offset(self, value: int, percentage: float = 0.2) -> int:
@@ -208,11 +383,11 @@ class AntiDetection:
         Returns:
             添加随机偏移后的值
         """
-        if not self.enabled:
+        if not self._enabled:
             return value
 
         offset_range = int(value * percentage)
-        offset = random.randint(-offset_range, offset_range)
+        offset = self._rng.randrange(-offset_range, offset_range + 1)
         return value + offset
 
     def randomize_point(
@@ -234,19 +409,19 @@ class AntiDetection:
         Returns:
             (random_x, random_y)
         """
-        if not self.enabled or not self.config.get("enable_position_random", True):
+        if not self._pos_gate:
             return x, y
 
-        percentage = self.config.get("position_offset_percentage", 0.2)
+        percentage = self._pos_pct
 
         # 默认±percentage范围
         if x_range:
-            random_x = random.randint(x_range[0], x_range[1])
+            random_x = self._rng.randrange(x_range[0], x_range[1] + 1)
         else:
             random_x = self.random_offset(x, percentage)
 
         if y_range:
-            random_y = random.randint(y_range[0], y_range[1])
+            random_y = self._rng.randrange(y_range[0], y_range[1] + 1)
         else:
             random_y = self.random_offset(y, percentage)
 
@@ -267,30 +442,69 @@ class AntiDetection:
         Returns:
             [(x, y), ...] 滑动路径点列表
         """
-        if not self.enabled or not self.config.get("enable_bezier_swipe", True):
+        if not self._bezier_gate:
             # 不使用贝塞尔，返回直线
             return [(start_x, start_y), (end_x, end_y)]
 
-        # 起点和终点
-        p0 = (start_x, start_y)
-        p3 = (end_x, end_y)
-
         # 生成两个控制点（在路径中间，带随机偏移）
-        randomness = self.config.get("bezier_control_randomness", 100)
+        randomness = self._bezier_rand
+        jitter = self._rng.randrange
+        low, high = -randomness, randomness + 1
+        dx = end_x - start_x
+        dy = end_y - start_y
 
         # 控制点1（靠近起点）
-        p1_x = start_x + (end_x - start_x) / 3 + random.randint(-randomness, randomness)
-        p1_y = start_y + (end_y - start_y) / 3 + random.randint(-randomness, randomness)
-        p1 = (p1_x, p1_y)
+        p1_x = start_x + dx / 3 + jitter(low, high)
+        p1_y = start_y + dy / 3 + jitter(low, high)
 
         # 控制点2（靠近终点）
-        p2_x = start_x + 2 * (end_x - start_x) / 3 + random.randint(-randomness, randomness)
-        p2_y = start_y + 2 * (end_y - start_y) / 3 + random.randint(-randomness, randomness)
-        p2 = (p2_x, p2_y)
+        p2_x = start_x + 2 * dx / 3 + jitter(low, high)
+        p2_y = start_y + 2 * dy / 3 + jitter(low, high)
 
         # 生成贝塞尔曲线
-        steps = self.config.get("bezier_steps", 20)
-        return bezier_curve(p0, p1, p2, p3, steps)
+        return _sample_bezier(
+            start_x, start_y, p1_x, p1_y, p2_x, p2_y, end_x, end_y, self._bezier_steps
+        )
+
+    @staticmethod
+    def swipe_path_to_sendevent_frames(
+        path: List[Tuple[int, int]],
+        tracking_id: int = 0,
+        event_struct: struct.Struct = INPUT_EVENT_64,
+    ) -> List[bytes]:
+        """
+        将滑动轨迹序列化为 input_event 帧（多点触控协议 B），每帧以 SYN_REPORT 结尾
+
+        帧依次为：按下 + 第一个点、后续每个点各一帧、抬起。时间戳留 0，
+        写入 /dev/input/eventN 时由内核打时间戳，因此回放节奏要靠调用方在帧之间停顿。
+        坐标需已换算到触摸屏的原始坐标系（ABS_MT_POSITION_* 的取值范围）。
+
+        Args:
+            path: [(x, y), ...] 滑动路径点列表（至少一个点）
+            tracking_id: 触点 ID
+            event_struct: input_event 布局（INPUT_EVENT_64 / INPUT_EVENT_32）
+
+        Returns:
+            每帧一个打包好的字节串
+        """
+        pack = event_struct.pack
+        syn = pack(0, 0, EV_SYN, SYN_REPORT, 0)
+        frames = []
+        for x, y in path:
+            frames.append(
+                pack(0, 0, EV_ABS, ABS_MT_POSITION_X, x)
+                + pack(0, 0, EV_ABS, ABS_MT_POSITION_Y, y)
+                + syn
+            )
+        frames[0] = (
+            pack(0, 0, EV_ABS, ABS_MT_TRACKING_ID, tracking_id)
+            + pack(0, 0, EV_KEY, BTN_TOUCH, 1)
+            + frames[0]
+        )
+        frames.append(
+            pack(0, 0, EV_ABS, ABS_MT_TRACKING_ID, -1) + pack(0, 0, EV_KEY, BTN_TOUCH, 0) + syn
+        )
+        return frames
 
     def typing_delay(self) -> float:
         """
@@ -299,11 +513,10 @@ class AntiDetection:
         Returns:
             延迟秒数
         """
-        if not self.enabled or not self.config.get("enable_typing_simulation", True):
+        if not self._typing_gate:
             return 0.0
 
-        typing_config = self.config.get("typing_delay", {"min": 0.1, "max": 0.3})
-        return random.uniform(typing_config["min"], typing_config["max"])
+        return self._rng.uniform(self._typing_min, self._typing_max)
 
     def should_make_typo(self) -> bool:
         """
@@ -312,11 +525,10 @@ class AntiDetection:
         Returns:
             True表示应该打错字
         """
-        if not self.enabled or not self.config.get("enable_typing_simulation", True):
+        if not self._typing_gate:
             return False
 
-        probability = self.config.get("typo_probability", 0.05)
-        return random.random() < probability
+        return self._rng.random() < self._typo_prob
 
     def should_explore(self) -> bool:
         """
@@ -325,23 +537,29 @@ class AntiDetection:
         Returns:
             True表示应该探索
         """
-        if not self.enabled or not self.config.get("enable_exploration", True):
+        if not self._explore_gate:
             return False
 
-        probability = self.config.get("exploration_probability", 0.3)
-        return random.random() < probability
+        return self._rng.random() < self._explore_prob
 
     def get_pause_interval(self) -> int:
         """获取输入时的停顿间隔（每N个字符）"""
         return self.config.get("pause_every_n_chars", 10)
 
 
-# 全局实例
-_anti_detection = AntiDetection()
+# 全局实例（首次使用时创建）
+_anti_detection: Optional[AntiDetection] = None
+_anti_detection_lock = threading.Lock()
 
 
 def get_anti_detection() -> AntiDetection:
     """获取全局防风控实例"""
+    global _anti_detection
+
+    if _anti_detection is None:
+        with _anti_detection_lock:
+            if _anti_detection is None:
+                _anti_detection = AntiDetection()
     return _anti_detection
 
 
@@ -357,8 +575,9 @@ def load_config_from_file(file_path: str = "data/anti_detection_config.json") ->
     """
     try:
         if os.path.exists(file_path):
-            with open(file_path, "r") as f:
-                return json.load(f)
+            with open(file_path, "rb") as f:
+                data = f.read()
+            return orjson.loads(data) if ORJSON_AVAILABLE else json.loads(data)
     except Exception as e:
         logger.warning(f"Failed to load anti-detection config from {file_path}: {e}")
 
@@ -375,8 +594,12 @@ def save_config_to_file(config: Dict[str, Any], file_path: str = "data/anti_dete
     """
     try:
         os.makedirs("data", exist_ok=True)
-        with open(file_path, "w", encoding="utf-8") as f:
-            json.dump(config, f, ensure_ascii=False, indent=2)
+        if ORJSON_AVAILABLE:
+            data = orjson.dumps(config, option=orjson.OPT_INDENT_2)
+        else:
+            data = json.dumps(config, ensure_ascii=False, indent=2).encode("utf-8")
+        with open(file_path, "wb") as f:
+            f.write(data)
     except Exception as e:
         logger.warning(f"Failed to save anti-detection config to {file_path}: {e}")
 
@@ -385,22 +608,22 @@ def init_from_config_file():
     """从配置文件初始化全局实例"""
     config = load_config_from_file()
     if config:
-        _anti_detection.update_config(config)
+        get_anti_detection().update_config(config)
 
 
 def human_delay(min_sec: Optional[float] = None, max_sec: Optional[float] = None):
     """快捷函数：人类延迟"""
-    _anti_detection.human_delay(min_sec, max_sec)
+    get_anti_detection().human_delay(min_sec, max_sec)
 
 
 def reading_delay():
     """快捷函数：阅读延迟"""
-    _anti_detection.reading_delay()
+    get_anti_detection().reading_delay()
 
 
 def thinking_delay():
     """快捷函数：思考延迟"""
-    _anti_detection.thinking_delay()
+    get_anti_detection().thinking_delay()
 
 
 def randomize_point(
@@ -410,7 +633,7 @@ def randomize_point(
     y_range: Optional[Tuple[int, int]] = None,
 ) -> Tuple[int, int]:
     """快捷函数：随机化坐标"""
-    return _anti_detection.randomize_point(x, y, x_range, y_range)
+    return get_anti_detection().randomize_point(x, y, x_range, y_range)
 
 
 # 使用示例
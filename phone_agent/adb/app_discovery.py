@@ -3,31 +3,49 @@ App discovery module for querying installed packages via ADB.
 """
 
 import logging
-from typing import List
+from typing import List, Optional
 
-from phone_agent.adb.connection import ADBConnection
+from phone_agent.adb.device import run_adb_command_async
+from phone_agent.adb.state_cache import async_ttl_cache
 
 logger = logging.getLogger(__name__)
 
+# `pm list packages` 每行的前缀
+_PACKAGE_PREFIX = "package:"
+_PACKAGE_PREFIX_LEN = len(_PACKAGE_PREFIX)
+
+# 包列表缓存时间（秒）：安装/卸载很少发生，过期或 invalidate_package_cache() 后重新查询
+PACKAGES_TTL = 30.0
+
+
+def _parse_package_list(output: str) -> List[str]:
+    """Extract package names from `pm list packages` output (one "package:<name>" per line)."""
+    return [
+        line[_PACKAGE_PREFIX_LEN:].rstrip()
+        for line in output.split("\n")
+        if line.startswith(_PACKAGE_PREFIX)
+    ]
+
+
+@async_ttl_cache(ttl=PACKAGES_TTL)
+async def _list_third_party_packages(device_id: Optional[str]) -> List[str]:
+    output = await run_adb_command_async(["shell", "pm", "list", "packages", "-3"], device_id)
+    return _parse_package_list(output)
+
+
+@async_ttl_cache(ttl=PACKAGES_TTL)
+async def _list_all_packages(device_id: Optional[str]) -> List[str]:
+    output = await run_adb_command_async(["shell", "pm", "list", "packages"], device_id)
+    return _parse_package_list(output)
+
 
 async def get_third_party_packages(device_id: str) -> List[str]:
     """
     Get list of third-party package names installed on the device.
-    Uses 'pm list packages -3' command.
+    Uses 'pm list packages -3' command (cached for PACKAGES_TTL seconds).
     """
     try:
-        # Execute ADB command
-        output = await ADBConnection.execute(device_id, "pm list packages -3")
-        if not output:
-            return []
-
-        packages = []
-        for line in output.strip().split("\n"):
-            line = line.strip()
-            if line.startswith("package:"):
-                packages.append(line.replace("package:", "", 1))
-
-        return packages
+        return list(await _list_third_party_packages(device_id))
     except Exception as e:
         logger.error(f"Failed to get installed packages for {device_id}: {e}")
         return []
@@ -36,21 +54,16 @@ async def get_third_party_packages(device_id: str) -> List[str]:
 async def get_all_packages(device_id: str) -> List[str]:
     """
     Get list of ALL package names installed on the device.
-    Uses 'pm list packages' command.
+    Uses 'pm list packages' command (cached for PACKAGES_TTL seconds).
     """
     try:
-        # Execute ADB command
-        output = await ADBConnection.execute(device_id, "pm list packages")
-        if not output:
-            return []
-
-        packages = []
-        for line in output.strip().split("\n"):
-            line = line.strip()
-            if line.startswith("package:"):
-                packages.append(line.replace("package:", "", 1))
-
-        return packages
+        return list(await _list_all_packages(device_id))
     except Exception as e:
         logger.error(f"Failed to get all packages for {device_id}: {e}")
         return []
+
+
+def invalidate_package_cache(device_id: Optional[str] = None):
+    """清除设备的包列表缓存（安装/卸载应用后调用）"""
+    _list_third_party_packages.invalidate(device_id)
+    _list_all_packages.invalidate(device_id)
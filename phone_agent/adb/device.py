@@ -5,15 +5,78 @@
 
 """Device control utilities for Android automation."""
 
+import asyncio
+import json
+import logging
 import os
+import re
+import shlex
+import shutil
 import subprocess
+import tempfile
 import time
+from dataclasses import dataclass
+from functools import lru_cache
+from struct import Struct
 from typing import Optional
 
-from phone_agent.adb.anti_detection import get_anti_detection
+from phone_agent.adb.anti_detection import INPUT_EVENT_32, INPUT_EVENT_64, get_anti_detection
+from phone_agent.adb.shell_session import AdbShellUnavailableError, get_shell_session
+from phone_agent.adb.state_cache import ttl_cache
 from phone_agent.config.apps import APP_PACKAGES
 
+try:
+    import orjson
 
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+# adb 可执行文件的绝对路径（导入时解析一次，省去每次启动子进程时的 PATH 查找）
+ADB_PATH = shutil.which("adb") or "adb"
+
+# sendevent 滑动时设备上的临时文件
+SENDEVENT_REMOTE_PATH = "/data/local/tmp/phoneagent_swipe.bin"
+
+# sendevent 触摸设备节点格式（fullmatch）
+_TOUCH_DEVICE_RE = re.compile(r"/dev/input/event\d+")
+
+# `getevent -p` 中的 ABS_MT_POSITION_X / ABS_MT_POSITION_Y 取值范围
+_ABS_AXIS_RE = re.compile(r"\b(0035|0036)\s*:\s*value -?\d+, min (-?\d+), max (-?\d+)")
+
+# `dumpsys input` 中的屏幕方向（旧版 SurfaceOrientation: 1，新版 orientation=ROTATION_90）
+_ORIENTATION_RE = re.compile(r"(?:SurfaceOrientation:\s*|orientation=(?:ROTATION_)?)(\d+)")
+_ROTATIONS = {0: 0, 1: 1, 2: 2, 3: 3, 90: 1, 180: 2, 270: 3}
+
+# 是否通过常驻 adb shell 会话执行短命令（设为 false 则每条命令单独启动 adb）
+USE_PERSISTENT_SHELL = os.getenv("ADB_PERSISTENT_SHELL", "true").lower() == "true"
+
+# get_current_app 结果缓存时间（秒）
+CURRENT_APP_TTL = 0.5
+
+# get_current_app 的焦点匹配器缓存：(APP_PACKAGES 条目数, 正则, 包名 -> 应用名)
+_focus_matcher_cache: Optional[tuple[int, re.Pattern, dict[str, str]]] = None
+
+# 动态应用配置文件（支持中文名、英文名、别名）
+APP_CONFIG_FILE = "data/app_config.json"
+
+# app_config.json 解析缓存：(路径, mtime, 名称索引)
+_app_config_cache: Optional[tuple[str, float, tuple[dict, dict, dict]]] = None
+
+# run_adb_command 的 stderr 错误检测（直接匹配 bytes，不解码、不 lower()）
+_ADB_ERROR_RE = re.compile(rb"error", re.IGNORECASE)
+
+# 合法的 device_id 格式（fullmatch，拒绝末尾换行等注入字符）
+_DEVICE_ID_PATTERNS = (
+    re.compile(r"localhost:\d{1,5}"),  # localhost:6100
+    re.compile(r"\d{1,3}\.\d{1,3}\.\d{1,3}\.\d{1,3}:\d{1,5}"),  # IP:Port
+    re.compile(r"[A-Za-z0-9_-]+"),  # 设备序列号 / emulator-5554 / device_6100
+)
+
+
+@ttl_cache(ttl=CURRENT_APP_TTL)
 def get_current_app(device_id: Optional[str] = None) -> str:
     """
     Get the currently focused app name.
@@ -23,24 +86,51 @@ def get_current_app(device_id: Optional[str] = None) -> str:
 
     Returns:
         The app name if recognized, otherwise "System Home".
+
+    Note:
+        结果按设备缓存 CURRENT_APP_TTL 秒，并发调用合并为一次 `dumpsys window`；
+        tap/swipe/back/home/launch_app 等操作结束后会自动失效缓存。
     """
     adb_prefix = _get_adb_prefix(device_id)
 
     result = subprocess.run(
-        adb_prefix + ["shell", "dumpsys", "window"], capture_output=True, text=True, timeout=10
+        [*adb_prefix, "shell", "dumpsys", "window"], capture_output=True, text=True, timeout=10
     )
     output = result.stdout
 
-    # Parse window focus info
-    for line in output.split("\n"):
-        if "mCurrentFocus" in line or "mFocusedApp" in line:
-            for app_name, package in APP_PACKAGES.items():
-                if package in line:
-                    return app_name
+    # Parse window focus info（单个正则一次扫描全部输出）
+    focus_re, package_names = _focus_matcher()
+    match = focus_re.search(output)
+    if match:
+        return package_names[match.group(1)]
 
     return "System Home"
 
 
+def _focus_matcher() -> tuple[re.Pattern, dict[str, str]]:
+    """
+    构建（并缓存）匹配焦点窗口包名的正则和 包名 -> 应用名 映射
+
+    APP_PACKAGES 条目数变化时自动重建。
+    """
+    global _focus_matcher_cache
+
+    if _focus_matcher_cache is not None and _focus_matcher_cache[0] == len(APP_PACKAGES):
+        return _focus_matcher_cache[1], _focus_matcher_cache[2]
+
+    # 同一包名有多个应用名时保留字典中第一个
+    package_names: dict[str, str] = {}
+    for app_name, package in APP_PACKAGES.items():
+        package_names.setdefault(package, app_name)
+
+    # 长包名优先，避免被其前缀截断匹配
+    alternatives = "|".join(re.escape(p) for p in sorted(package_names, key=len, reverse=True))
+    focus_re = re.compile(r"m(?:CurrentFocus|FocusedApp)[^\n]*?(" + alternatives + ")")
+
+    _focus_matcher_cache = (len(APP_PACKAGES), focus_re, package_names)
+    return focus_re, package_names
+
+
 def tap(
     x: int,
     y: int,
@@ -65,15 +155,14 @@ def tap(
         ad = get_anti_detection()
         x, y = ad.randomize_point(x, y)
 
-    subprocess.run(
-        adb_prefix + ["shell", "input", "tap", str(x), str(y)], capture_output=True, timeout=10
-    )
+    _run_shell(adb_prefix, ["input", "tap", str(x), str(y)], timeout=10, capture=False)
 
     # 防风控：人性化延迟
     if use_anti_detection:
         get_anti_detection().human_delay()
     else:
         time.sleep(delay)
+    get_current_app.invalidate(device_id)
 
 
 def double_tap(x: int, y: int, device_id: Optional[str] = None, delay: float = 1.0) -> None:
@@ -88,14 +177,11 @@ def double_tap(x: int, y: int, device_id: Optional[str] = None, delay: float = 1
     """
     adb_prefix = _get_adb_prefix(device_id)
 
-    subprocess.run(
-        adb_prefix + ["shell", "input", "tap", str(x), str(y)], capture_output=True, timeout=10
-    )
+    _run_shell(adb_prefix, ["input", "tap", str(x), str(y)], timeout=10, capture=False)
     time.sleep(0.1)
-    subprocess.run(
-        adb_prefix + ["shell", "input", "tap", str(x), str(y)], capture_output=True, timeout=10
-    )
+    _run_shell(adb_prefix, ["input", "tap", str(x), str(y)], timeout=10, capture=False)
     time.sleep(delay)
+    get_current_app.invalidate(device_id)
 
 
 def long_press(
@@ -117,12 +203,14 @@ def long_press(
     """
     adb_prefix = _get_adb_prefix(device_id)
 
-    subprocess.run(
-        adb_prefix + ["shell", "input", "swipe", str(x), str(y), str(x), str(y), str(duration_ms)],
-        capture_output=True,
+    _run_shell(
+        adb_prefix,
+        ["input", "swipe", str(x), str(y), str(x), str(y), str(duration_ms)],
         timeout=15,
+        capture=False,
     )
     time.sleep(delay)
+    get_current_app.invalidate(device_id)
 
 
 def swipe(
@@ -148,60 +236,33 @@ def swipe(
         delay: Delay in seconds after swipe (仅use_anti_detection=False时生效).
         use_anti_detection: 是否使用防风控（贝塞尔曲线滑动）
     """
-    adb_prefix = _get_adb_prefix(device_id)
     ad = get_anti_detection()
 
-    # 配置常量：滑动时长范围（毫秒）
-    min_swipe_duration_ms = 1000
-    max_swipe_duration_ms = 2000
-
     if duration_ms is None:
-        # Calculate duration based on distance
-        dist_sq = (start_x - end_x) ** 2 + (start_y - end_y) ** 2
-        duration_ms = int(dist_sq / 1000)
-        duration_ms = max(min_swipe_duration_ms, min(duration_ms, max_swipe_duration_ms))
+        duration_ms = _swipe_duration(start_x, start_y, end_x, end_y)
 
     # 防风控：使用贝塞尔曲线生成滑动路径
     if use_anti_detection and ad.enabled and ad.config.get("enable_bezier_swipe", True):
         path = ad.generate_swipe_path(start_x, start_y, end_x, end_y)
-
-        # 执行贝塞尔曲线滑动（多段）
-        for i in range(len(path) - 1):
-            x1, y1 = path[i]
-            x2, y2 = path[i + 1]
-            seg_duration = duration_ms // len(path)
-
-            subprocess.run(
-                adb_prefix
-                + [
-                    "shell",
-                    "input",
-                    "swipe",
-                    str(x1),
-                    str(y1),
-                    str(x2),
-                    str(y2),
-                    str(seg_duration),
-                ],
-                capture_output=True,
-                timeout=15,
-            )
+        touch_device = ad.config.get("sendevent_touch_device")
+
+        # 配置了触摸设备节点时，整条轨迹一次推送、在设备上按节奏回放，失败则退回逐段滑动
+        if touch_device and sendevent_swipe(path, touch_device, device_id, duration_ms):
+            segments = []
+        else:
+            # 执行贝塞尔曲线滑动（多段）
+            segments = _path_segments(path, duration_ms)
     else:
         # 普通直线滑动
-        subprocess.run(
-            adb_prefix
-            + [
-                "shell",
-                "input",
-                "swipe",
-                str(start_x),
-                str(start_y),
-                str(end_x),
-                str(end_y),
-                str(duration_ms),
-            ],
-            capture_output=True,
-            timeout=15,
+        segments = [(start_x, start_y, end_x, end_y, duration_ms)]
+
+    # 所有分段合并为一次 shell 调用（每段仍保留原 15s 超时预算）
+    if segments:
+        run_adb_batch(
+            [shlex.join(["input", "swipe", *map(str, seg)]) for seg in segments],
+            device_id,
+            timeout=15 * len(segments),
+            capture=False,
         )
 
     # 防风控：人性化延迟
@@ -209,6 +270,240 @@ def swipe(
         ad.human_delay()
     else:
         time.sleep(delay)
+    get_current_app.invalidate(device_id)
+
+
+def _load_app_config_index(
+    config_file: str = APP_CONFIG_FILE,
+) -> Optional[tuple[dict, dict, dict]]:
+    """
+    加载 app_config.json 并建立名称索引（按文件 mtime 缓存）
+
+    Returns:
+        (中文名 -> 包名, 小写英文名 -> 包名, 小写别名 -> 包名)；文件不存在时返回 None
+    """
+    global _app_config_cache
+
+    try:
+        mtime = os.path.getmtime(config_file)
+    except OSError:
+        return None
+
+    cache = _app_config_cache
+    if cache is not None and cache[0] == config_file and cache[1] == mtime:
+        return cache[2]
+
+    with open(config_file, "rb") as f:
+        data = f.read()
+    app_configs = orjson.loads(data) if ORJSON_AVAILABLE else json.loads(data)
+
+    # 倒序写入，保证同名冲突时与原先的顺序扫描一致（列表中靠前的条目优先）
+    by_display, by_en, by_alias = {}, {}, {}
+    for app in reversed(app_configs):
+        package = app.get("package_name")
+        if app.get("display_name"):
+            by_display[app["display_name"]] = package
+        by_en[app.get("display_name_en", "").lower()] = package
+        for alias in app.get("aliases", []):
+            by_alias[alias.lower()] = package
+
+    index = (by_display, by_en, by_alias)
+    _app_config_cache = (config_file, mtime, index)
+    return index
+
+
+def _swipe_duration(start_x: int, start_y: int, end_x: int, end_y: int) -> int:
+    """Calculate swipe duration (ms) from distance, clamped to 1000-2000ms."""
+    # 配置常量：滑动时长范围（毫秒）
+    min_swipe_duration_ms = 1000
+    max_swipe_duration_ms = 2000
+
+    dist_sq = (start_x - end_x) ** 2 + (start_y - end_y) ** 2
+    duration_ms = int(dist_sq / 1000)
+    return max(min_swipe_duration_ms, min(duration_ms, max_swipe_duration_ms))
+
+
+def _path_segments(
+    path: list[tuple[int, int]], duration_ms: int
+) -> list[tuple[int, int, int, int, int]]:
+    """Split a swipe path into (x1, y1, x2, y2, duration) `input swipe` segments."""
+    seg_duration = duration_ms // len(path)
+    return [(*path[i], *path[i + 1], seg_duration) for i in range(len(path) - 1)]
+
+
+@dataclass(frozen=True)
+class _TouchPanel:
+    """sendevent 回放所需的触摸屏信息（按设备 + 节点探测一次）"""
+
+    event_struct: Struct
+    screen_size: tuple[int, int]  # 自然方向下的显示分辨率（wm size）
+    x_range: tuple[int, int]  # ABS_MT_POSITION_X 的 (min, max)
+    y_range: tuple[int, int]  # ABS_MT_POSITION_Y 的 (min, max)
+
+
+# (adb 前缀, 触摸设备节点) -> _TouchPanel；探测失败记为 None，不再重复探测
+_touch_panel_cache: dict[tuple[tuple[str, ...], str], Optional[_TouchPanel]] = {}
+
+
+def _parse_touch_panel(output: str) -> Optional[_TouchPanel]:
+    """Parse `getprop ro.product.cpu.abi; wm size; getevent -p <node>` output."""
+    abi = output.split("\n", 1)[0].strip()
+    sizes = re.findall(r"size:\s*(\d+)x(\d+)", output)
+    axes = {code: (int(lo), int(hi)) for code, lo, hi in _ABS_AXIS_RE.findall(output)}
+    if not abi or not sizes or "0035" not in axes or "0036" not in axes:
+        return None
+
+    # Override size（若有）排在 Physical size 之后，与 input tap 使用的坐标系一致
+    width, height = map(int, sizes[-1])
+    return _TouchPanel(
+        event_struct=INPUT_EVENT_64 if "64" in abi else INPUT_EVENT_32,
+        screen_size=(width, height),
+        x_range=axes["0035"],
+        y_range=axes["0036"],
+    )
+
+
+def _probe_touch_panel(adb_prefix: tuple[str, ...], touch_device: str) -> Optional[_TouchPanel]:
+    """Probe (and cache) the event layout, screen size and axis ranges of a touch node."""
+    key = (adb_prefix, touch_device)
+    if key in _touch_panel_cache:
+        return _touch_panel_cache[key]
+
+    try:
+        returncode, output = run_shell_command(
+            adb_prefix, f"getprop ro.product.cpu.abi; wm size; getevent -p {touch_device}", 10
+        )
+    except subprocess.TimeoutExpired:
+        return None
+
+    panel = _parse_touch_panel(output) if returncode == 0 else None
+    if panel is None:
+        logger.warning("sendevent disabled: cannot read axis ranges of %s", touch_device)
+    _touch_panel_cache[key] = panel
+    return panel
+
+
+def _display_rotation(adb_prefix: tuple[str, ...]) -> Optional[int]:
+    """Current display rotation (0-3), or None if it cannot be determined."""
+    try:
+        _, output = run_shell_command(
+            adb_prefix, "dumpsys input | grep -m1 -E 'SurfaceOrientation|orientation='", 5
+        )
+    except subprocess.TimeoutExpired:
+        return None
+
+    match = _ORIENTATION_RE.search(output)
+    return _ROTATIONS.get(int(match.group(1))) if match else None
+
+
+def _to_panel_coords(
+    path: list[tuple[int, int]], panel: _TouchPanel, rotation: int
+) -> list[tuple[int, int]]:
+    """Map screen pixels (current rotation) to raw ABS_MT_POSITION_* values."""
+    width, height = panel.screen_size
+    x_lo, x_hi = panel.x_range
+    y_lo, y_hi = panel.y_range
+    x_scale = (x_hi - x_lo) / max(width - 1, 1)
+    y_scale = (y_hi - y_lo) / max(height - 1, 1)
+
+    result = []
+    for x, y in path:
+        # 先还原到自然方向（与 InputReader 的旋转变换互逆）
+        if rotation == 1:
+            x, y = y, height - 1 - x
+        elif rotation == 2:
+            x, y = width - 1 - x, height - 1 - y
+        elif rotation == 3:
+            x, y = width - 1 - y, x
+        raw_x = min(max(round(x_lo + x * x_scale), x_lo), x_hi)
+        raw_y = min(max(round(y_lo + y * y_scale), y_lo), y_hi)
+        result.append((raw_x, raw_y))
+    return result
+
+
+def sendevent_swipe(
+    path: list[tuple[int, int]],
+    touch_device: str,
+    device_id: Optional[str] = None,
+    duration_ms: int = 1000,
+) -> bool:
+    """
+    Replay a swipe path by writing input_event frames straight to the touch device.
+
+    Experimental. The frames are pushed once and replayed by a single shell command
+    that writes one frame per `dd` and sleeps between frames, so the swipe takes about
+    `duration_ms` (the kernel stamps the events when they are written).
+
+    Screen pixels are mapped to the panel's ABS_MT_POSITION_* ranges from `getevent -p`
+    and un-rotated using the current display rotation. The event layout (32/64-bit)
+    follows the device's primary ABI. Known limits: the shell user needs write access to
+    the node (usually root or the `input` group), panels mounted with their own
+    orientation/calibration (idc files) are not handled, and pacing granularity is
+    bounded by process start-up of `dd`/`sleep` on the device.
+
+    Args:
+        path: [(x, y), ...] points in screen pixels (same coordinates as `input swipe`).
+        touch_device: Touch input node on the device, e.g. /dev/input/event5.
+        device_id: Optional ADB device ID.
+        duration_ms: Total swipe duration in milliseconds.
+
+    Returns:
+        True if the event stream was written, False otherwise (caller should fall back).
+    """
+    if not _TOUCH_DEVICE_RE.fullmatch(touch_device):
+        logger.warning("Invalid sendevent_touch_device: %r", touch_device)
+        return False
+
+    adb_prefix = _get_adb_prefix(device_id)
+    panel = _probe_touch_panel(adb_prefix, touch_device)
+    if panel is None:
+        return False
+    rotation = _display_rotation(adb_prefix)
+    if rotation is None:
+        return False
+
+    event_size = panel.event_struct.size
+    frames = get_anti_detection().swipe_path_to_sendevent_frames(
+        _to_panel_coords(path, panel, rotation), event_struct=panel.event_struct
+    )
+
+    # 每帧一次 dd（bs=单个事件，skip/count 以事件为单位），点与点之间按时长停顿；
+    # 用 ; 连接，保证中途出错也会写入抬起帧
+    pause = f"sleep {duration_ms / 1000 / max(len(path) - 1, 1):.3f}"
+    commands = []
+    offset = 0
+    for i, frame in enumerate(frames):
+        count = len(frame) // event_size
+        commands.append(
+            f"dd if={SENDEVENT_REMOTE_PATH} of={touch_device} bs={event_size} "
+            f"skip={offset} count={count} 2>/dev/null"
+        )
+        offset += count
+        if i < len(frames) - 2:
+            commands.append(pause)
+
+    with tempfile.NamedTemporaryFile(suffix=".bin", delete=False) as f:
+        f.write(b"".join(frames))
+        local_path = f.name
+
+    try:
+        push = subprocess.run(
+            [*adb_prefix, "push", local_path, SENDEVENT_REMOTE_PATH],
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+            timeout=10,
+        )
+        if push.returncode != 0:
+            return False
+
+        returncode, _ = run_shell_command(
+            adb_prefix, "; ".join(commands), timeout=10 + duration_ms / 1000, capture=False
+        )
+        return returncode == 0
+    except subprocess.TimeoutExpired:
+        return False
+    finally:
+        os.unlink(local_path)
 
 
 def back(device_id: Optional[str] = None, delay: float = 1.0) -> None:
@@ -221,10 +516,9 @@ def back(device_id: Optional[str] = None, delay: float = 1.0) -> None:
     """
     adb_prefix = _get_adb_prefix(device_id)
 
-    subprocess.run(
-        adb_prefix + ["shell", "input", "keyevent", "4"], capture_output=True, timeout=10
-    )
+    _run_shell(adb_prefix, ["input", "keyevent", "4"], timeout=10, capture=False)
     time.sleep(delay)
+    get_current_app.invalidate(device_id)
 
 
 def home(device_id: Optional[str] = None, delay: float = 1.0) -> None:
@@ -241,21 +535,60 @@ def home(device_id: Optional[str] = None, delay: float = 1.0) -> None:
     adb_prefix = _get_adb_prefix(device_id)
 
     # Use Activity Manager to go home (more reliable than keyevent)
-    subprocess.run(
-        adb_prefix
-        + [
-            "shell",
-            "am",
-            "start",
-            "-a",
-            "android.intent.action.MAIN",
-            "-c",
-            "android.intent.category.HOME",
-        ],
-        capture_output=True,
+    _run_shell(
+        adb_prefix,
+        ["am", "start", "-a", "android.intent.action.MAIN", "-c", "android.intent.category.HOME"],
         timeout=10,
+        capture=False,
     )
     time.sleep(delay)
+    get_current_app.invalidate(device_id)
+
+
+def _resolve_app_package(app_name: str) -> Optional[str]:
+    """
+    Resolve an app name to its package (app_config.json first, then APP_PACKAGES).
+
+    Returns:
+        The package name, or None (with hints logged) if the app is unknown.
+    """
+    package = None
+    source = None
+
+    # 策略1: 优先从动态配置文件获取（支持中文、英文、别名）
+    try:
+        index = _load_app_config_index()
+        if index:
+            by_display, by_en, by_alias = index
+            key = app_name.lower()
+            if app_name in by_display:
+                package = by_display[app_name]
+                source = f"app_config.json (中文名: {app_name})"
+            elif key in by_en:
+                package = by_en[key]
+                source = f"app_config.json (英文名: {app_name})"
+            elif key in by_alias:
+                package = by_alias[key]
+                source = f"app_config.json (别名: {app_name})"
+    except Exception as e:
+        logger.warning("Failed to load app config: %s", e)
+
+    # 策略2: 从硬编码的APP_PACKAGES获取（向后兼容）
+    if not package:
+        package = APP_PACKAGES.get(app_name)
+        if package:
+            source = "APP_PACKAGES (hardcoded)"
+
+    # 如果仍然找不到包名，返回详细错误
+    if not package:
+        logger.error("未找到应用 '%s' 的包名", app_name)
+        logger.info("提示: 请在 data/app_config.json 中添加应用配置:")
+        logger.info('   {"display_name": "%s", "package_name": "com.example.app"}', app_name)
+        logger.info("   或在 phone_agent/config/apps.py 的 APP_PACKAGES 中添加")
+        return None
+
+    logger.info("正在启动应用: %s (%s) [来源: %s]", app_name, package, source)
+    return package
 
 
 def launch_app(app_name: str, device_id: Optional[str] = None, delay: float = 1.0) -> bool:
@@ -279,60 +612,11 @@ def launch_app(app_name: str, device_id: Optional[str] = None, delay: float = 1.
         推荐在 data/app_config.json 中配置应用的中文显示名和包名。
         硬编码的 APP_PACKAGES 作为后备方案。
     """
-    import logging
-
-    logger = logging.getLogger(__name__)
-
-    package = None
-    source = None
-
-    # 策略1: 优先从动态配置文件获取（支持中文、英文、别名）
-    try:
-        import json
-
-        config_file = "data/app_config.json"
-        if os.path.exists(config_file):
-            with open(config_file, "r", encoding="utf-8") as f:
-                app_configs = json.load(f)
-                # 查找匹配的app（支持多种名称格式）
-                for app in app_configs:
-                    # 匹配中文显示名
-                    if app.get("display_name") == app_name:
-                        package = app.get("package_name")
-                        source = f"app_config.json (中文名: {app_name})"
-                        break
-
-                    # 匹配英文显示名（不区分大小写）
-                    if app.get("display_name_en", "").lower() == app_name.lower():
-                        package = app.get("package_name")
-                        source = f"app_config.json (英文名: {app_name})"
-                        break
-
-                    # 匹配别名（不区分大小写）
-                    aliases = app.get("aliases", [])
-                    if any(alias.lower() == app_name.lower() for alias in aliases):
-                        package = app.get("package_name")
-                        source = f"app_config.json (别名: {app_name})"
-                        break
-    except Exception as e:
-        logger.warning(f"Failed to load app config: {e}")
-
-    # 策略2: 从硬编码的APP_PACKAGES获取（向后兼容）
-    if not package:
-        package = APP_PACKAGES.get(app_name)
-        if package:
-            source = "APP_PACKAGES (hardcoded)"
-
-    # 如果仍然找不到包名，返回详细错误
+    package = _resolve_app_package(app_name)
     if not package:
-        logger.error(f"未找到应用 '{app_name}' 的包名")
-        logger.info("提示: 请在 data/app_config.json 中添加应用配置:")
-        logger.info(f'   {{"display_name": "{app_name}", "package_name": "com.example.app"}}')
-        logger.info("   或在 phone_agent/config/apps.py 的 APP_PACKAGES 中添加")
         return False
 
     adb_prefix = _get_adb_prefix(device_id)
-    logger.info(f"正在启动应用: {app_name} ({package}) [来源: {source}]")
 
     # ✅ Pre-launch validation: Check if app is actually installed on device
     # Controlled by ENABLE_APP_CHECK (default: True)
@@ -340,32 +624,26 @@ def launch_app(app_name: str, device_id: Optional[str] = None, delay: float = 1.
 
     if enable_check:
         try:
-            check_result = subprocess.run(
-                adb_prefix + ["shell", "pm", "path", package],
-                capture_output=True,
-                text=True,
-                timeout=5,
-            )
-            if check_result.returncode != 0 or not check_result.stdout.strip():
-                logger.error(f"❌ 应用未安装: {app_name} (包名: {package})")
+            code, output = _run_shell(adb_prefix, ["pm", "path", package], timeout=5)
+            if code != 0 or not output.strip():
+                logger.error("❌ 应用未安装: %s (包名: %s)", app_name, package)
                 logger.info("该应用在配置中存在，但未安装在设备上")
                 logger.info("建议: 请先在设备上安装该应用，或使用其他已安装的应用")
                 logger.info("提示: 设置环境变量 ENABLE_APP_CHECK=false 可禁用此检查")
                 return False
-            logger.debug(f"✓ 应用已安装验证通过: {package}")
+            logger.debug("✓ 应用已安装验证通过: %s", package)
         except subprocess.TimeoutExpired:
             logger.warning("应用安装检查超时，继续尝试启动...")
         except Exception as e:
-            logger.warning(f"应用安装检查失败 (将被忽略): {e}")
+            logger.warning("应用安装检查失败 (将被忽略): %s", e)
     else:
         logger.debug("⏭️ 跳过应用安装检查 (ENABLE_APP_CHECK=false)")
 
     # Method 1: Use Activity Manager (AM) - Most reliable and fast
     try:
-        result = subprocess.run(
-            adb_prefix
-            + [
-                "shell",
+        code, output = _run_shell(
+            adb_prefix,
+            [
                 "am",
                 "start",
                 "-a",
@@ -374,68 +652,140 @@ def launch_app(app_name: str, device_id: Optional[str] = None, delay: float = 1.
                 "android.intent.category.LAUNCHER",
                 package,
             ],
-            capture_output=True,
-            text=True,
             timeout=10,
         )
 
         # Check if launch was successful
-        if result.returncode == 0 and "Error" not in result.stderr:
-            logger.info(f"应用启动成功 (AM): {app_name}")
+        if code == 0 and "Error" not in output:
+            logger.info("应用启动成功 (AM): %s", app_name)
             time.sleep(delay)
+            get_current_app.invalidate(device_id)
             return True
 
-        logger.warning(f"AM启动失败: {result.stderr.strip()}")
+        logger.warning("AM启动失败: %s", output.strip())
 
     except subprocess.TimeoutExpired:
         logger.warning("AM启动超时")
     except Exception as e:
-        logger.warning(f"AM启动异常: {e}")
+        logger.warning("AM启动异常: %s", e)
 
     # Method 2: Fallback to monkey command
     logger.info("🔄 尝试 monkey 命令启动...")
     try:
-        result = subprocess.run(
-            adb_prefix
-            + [
-                "shell",
-                "monkey",
-                "-p",
-                package,
-                "-c",
-                "android.intent.category.LAUNCHER",
-                "1",
-            ],
-            capture_output=True,
-            text=True,
+        code, output = _run_shell(
+            adb_prefix,
+            ["monkey", "-p", package, "-c", "android.intent.category.LAUNCHER", "1"],
             timeout=10,
         )
 
-        if result.returncode == 0:
-            logger.info(f"应用启动成功 (monkey): {app_name}")
+        if code == 0:
+            logger.info("应用启动成功 (monkey): %s", app_name)
             time.sleep(delay)
+            get_current_app.invalidate(device_id)
             return True
 
-        logger.error(f"monkey启动失败: {result.stderr.strip()}")
+        logger.error("monkey启动失败: %s", output.strip())
 
     except subprocess.TimeoutExpired:
         logger.error("monkey启动超时")
     except Exception as e:
-        logger.error(f"monkey启动异常: {e}")
+        logger.error("monkey启动异常: %s", e)
 
     # Method 3: All methods failed
-    logger.error(f"应用启动失败: {app_name}")
+    logger.error("应用启动失败: %s", app_name)
     logger.info("调试建议:")
-    logger.info(f"   1. 检查包名是否正确: {package}")
-    logger.info(f"   2. 手动测试: adb shell am start -n {package}/.MainActivity")
-    logger.info(f"   3. 检查应用是否已安装: adb shell pm list packages | grep {package}")
+    logger.info("   1. 检查包名是否正确: %s", package)
+    logger.info("   2. 手动测试: adb shell am start -n %s/.MainActivity", package)
+    logger.info("   3. 检查应用是否已安装: adb shell pm list packages | grep %s", package)
     return False
 
 
-def _get_adb_prefix(device_id: Optional[str]) -> list:
+def _run_shell(
+    adb_prefix: tuple[str, ...], args: list[str], timeout: float, capture: bool = True
+) -> tuple[int, str]:
+    """
+    Run an `adb shell` command given as argv and return (exit_code, combined output).
+
+    Raises:
+        subprocess.TimeoutExpired: If the command does not finish in time.
+    """
+    return run_shell_command(adb_prefix, shlex.join(args), timeout, capture)
+
+
+def run_shell_command(
+    adb_prefix: tuple[str, ...], command: str, timeout: float, capture: bool = True
+) -> tuple[int, str]:
+    """
+    Run a raw `adb shell` command line and return (exit_code, combined stdout/stderr).
+
+    Uses the device's persistent shell session when enabled, and falls back to a
+    one-shot `adb shell` process only if the session could not take the command.
+    With capture=False the one-shot fallback discards output via DEVNULL (no pipes,
+    no decoding) and the returned output is empty.
+
+    Raises:
+        subprocess.TimeoutExpired: If the command does not finish in time.
+    """
+    if USE_PERSISTENT_SHELL:
+        try:
+            return get_shell_session(adb_prefix).send(command, timeout=timeout)
+        except AdbShellUnavailableError:
+            pass
+
+    if not capture:
+        result = subprocess.run(
+            [*adb_prefix, "shell", command],
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+            timeout=timeout,
+        )
+        return result.returncode, ""
+
+    result = subprocess.run(
+        [*adb_prefix, "shell", command], capture_output=True, text=True, timeout=timeout
+    )
+    return result.returncode, result.stdout + result.stderr
+
+
+def run_adb_batch(
+    commands: list[str],
+    device_id: Optional[str] = None,
+    timeout: float = 30,
+    stop_on_error: bool = True,
+    capture: bool = True,
+) -> tuple[int, str]:
+    """
+    Run several shell commands in a single `adb shell` round-trip.
+
+    Args:
+        commands: Shell command lines, e.g. ["input tap 100 200", "input keyevent 4"].
+        device_id: Optional ADB device ID.
+        timeout: Timeout in seconds for the whole batch.
+        stop_on_error: Join with `&&` (stop at first failure) instead of `;`.
+        capture: Whether the caller needs the output (False discards it where possible).
+
+    Returns:
+        (exit_code, combined output) of the batch.
+
+    Raises:
+        subprocess.TimeoutExpired: If the batch does not finish in time.
+    """
+    if not commands:
+        return 0, ""
+
+    separator = " && " if stop_on_error else "; "
+    return run_shell_command(
+        _get_adb_prefix(device_id), separator.join(commands), timeout, capture
+    )
+
+
+@lru_cache(maxsize=32)
+def _get_adb_prefix(device_id: Optional[str]) -> tuple[str, ...]:
     """
     Get ADB command prefix with optional device specifier.
 
+    返回不可变 tuple 并按 device_id 缓存；调用方用 `[*adb_prefix, ...]` 拼接命令。
+
     🔒 安全性：device_id 会被验证，防止命令注入
     """
     if device_id:
@@ -443,10 +793,28 @@ def _get_adb_prefix(device_id: Optional[str]) -> list:
         # 合法格式：localhost:6100, 192.168.1.100:5555, emulator-5554, ABCD1234
         if not _is_valid_device_id(device_id):
             raise ValueError(f"Invalid device_id format: {device_id}")
-        return ["adb", "-s", device_id]
-    return ["adb"]
+        return (ADB_PATH, "-s", device_id)
+    return (ADB_PATH,)
+
+
+def get_adb_prefix(
+    device_id: Optional[str] = None, adb_host: Optional[str] = None, adb_port: Optional[int] = None
+) -> tuple[str, ...]:
+    """
+    Get the ADB command prefix, with FRP tunneling (-H/-P) taking priority over device_id.
+
+    与 device 模块的其他函数共用同一个 adb 路径和 device_id 校验，
+    因此同一设备在各模块中拿到的前缀相同，共享一个常驻 shell 会话。
+
+    Raises:
+        ValueError: If device_id has an invalid format.
+    """
+    if adb_host and adb_port:
+        return (ADB_PATH, "-H", adb_host, "-P", str(adb_port))
+    return _get_adb_prefix(device_id)
 
 
+@lru_cache(maxsize=64)
 def _is_valid_device_id(device_id: str) -> bool:
     """
     验证 device_id 格式是否合法
@@ -463,18 +831,7 @@ def _is_valid_device_id(device_id: str) -> bool:
     Returns:
         是否合法
     """
-    import re
-
-    # 允许的格式
-    patterns = [
-        r"^localhost:\d{1,5}$",  # localhost:6100
-        r"^\d{1,3}\.\d{1,3}\.\d{1,3}\.\d{1,3}:\d{1,5}$",  # IP:Port
-        r"^emulator-\d+$",  # emulator-5554
-        r"^[A-Za-z0-9_-]+$",  # 设备序列号
-        r"^device_\d+$",  # device_6100 (自定义格式)
-    ]
-
-    return any(re.match(pattern, device_id) for pattern in patterns)
+    return any(pattern.fullmatch(device_id) for pattern in _DEVICE_ID_PATTERNS)
 
 
 def run_adb_command(
@@ -501,15 +858,19 @@ def run_adb_command(
     adb_prefix = _get_adb_prefix(device_id)
 
     try:
+        # 不检查错误时 stderr 直接丢弃；检查时保留 bytes，只在出错时才解码
         result = subprocess.run(
-            adb_prefix + command, capture_output=True, text=True, timeout=timeout
+            [*adb_prefix, *command],
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE if check_error else subprocess.DEVNULL,
+            timeout=timeout,
         )
 
         # 检查错误
-        if check_error and result.stderr and "error" in result.stderr.lower():
-            raise RuntimeError(f"ADB Error: {result.stderr.strip()}")
+        if check_error and result.stderr and _ADB_ERROR_RE.search(result.stderr):
+            raise RuntimeError(f"ADB Error: {_decode(result.stderr).strip()}")
 
-        return result.stdout.strip()
+        return _decode(result.stdout).strip()
 
     except subprocess.TimeoutExpired:
         error_msg = f"ADB command timeout after {timeout}s: {' '.join(command)}"
@@ -518,6 +879,11 @@ def run_adb_command(
         return ""
 
 
+def _decode(data: bytes) -> str:
+    """Decode adb output (UTF-8, undecodable bytes replaced)."""
+    return data.decode("utf-8", errors="replace")
+
+
 def get_physical_screen_size(device_id: Optional[str] = None) -> tuple[int, int]:
     """
     Get the physical screen resolution of the device.
@@ -540,7 +906,236 @@ def get_physical_screen_size(device_id: Optional[str] = None) -> tuple[int, int]
                 height = int(parts[1].split()[0].strip())  # Handle trailing text if any
                 return width, height
     except Exception as e:
-        # Avoid circular import logging
-        print(f"Failed to get physical screen size: {e}")
+        logger.warning("Failed to get physical screen size: %s", e)
 
     return 1080, 2400
+
+
+# ============================================
+# 异步版本（asyncio 子进程，不阻塞事件循环，可用 asyncio.gather 并行驱动多台设备）
+# ============================================
+
+
+async def _run_adb_async(
+    args: list[str], timeout: float, capture: bool = True
+) -> tuple[int, bytes, bytes]:
+    """
+    Run an adb command with asyncio subprocesses.
+
+    Returns:
+        (returncode, stdout, stderr); stdout/stderr are None when capture=False.
+
+    Raises:
+        subprocess.TimeoutExpired: If the command does not finish in time.
+    """
+    stream = asyncio.subprocess.PIPE if capture else asyncio.subprocess.DEVNULL
+    proc = await asyncio.create_subprocess_exec(*args, stdout=stream, stderr=stream)
+    try:
+        stdout, stderr = await asyncio.wait_for(proc.communicate(), timeout)
+    except asyncio.TimeoutError:
+        proc.kill()
+        await proc.wait()
+        raise subprocess.TimeoutExpired(args, timeout)
+    return proc.returncode, stdout, stderr
+
+
+async def tap_async(
+    x: int,
+    y: int,
+    device_id: Optional[str] = None,
+    delay: float = 1.0,
+    use_anti_detection: bool = True,
+) -> None:
+    """Async version of :func:`tap`."""
+    adb_prefix = _get_adb_prefix(device_id)
+    ad = get_anti_detection()
+
+    if use_anti_detection:
+        x, y = ad.randomize_point(x, y)
+
+    await _run_adb_async(
+        [*adb_prefix, "shell", "input", "tap", str(x), str(y)], timeout=10, capture=False
+    )
+    await asyncio.sleep(ad.human_delay_seconds() if use_anti_detection else delay)
+    get_current_app.invalidate(device_id)
+
+
+async def double_tap_async(
+    x: int, y: int, device_id: Optional[str] = None, delay: float = 1.0
+) -> None:
+    """Async version of :func:`double_tap`."""
+    adb_prefix = _get_adb_prefix(device_id)
+
+    await _run_adb_async(
+        [*adb_prefix, "shell", "input", "tap", str(x), str(y)], timeout=10, capture=False
+    )
+    await asyncio.sleep(0.1)
+    await _run_adb_async(
+        [*adb_prefix, "shell", "input", "tap", str(x), str(y)], timeout=10, capture=False
+    )
+    await asyncio.sleep(delay)
+    get_current_app.invalidate(device_id)
+
+
+async def long_press_async(
+    x: int,
+    y: int,
+    duration_ms: int = 3000,
+    device_id: Optional[str] = None,
+    delay: float = 1.0,
+) -> None:
+    """Async version of :func:`long_press`."""
+    adb_prefix = _get_adb_prefix(device_id)
+
+    await _run_adb_async(
+        [*adb_prefix, "shell", "input", "swipe", str(x), str(y), str(x), str(y), str(duration_ms)],
+        timeout=15,
+        capture=False,
+    )
+    await asyncio.sleep(delay)
+    get_current_app.invalidate(device_id)
+
+
+async def swipe_async(
+    start_x: int,
+    start_y: int,
+    end_x: int,
+    end_y: int,
+    duration_ms: Optional[int] = None,
+    device_id: Optional[str] = None,
+    delay: float = 1.0,
+    use_anti_detection: bool = True,
+) -> None:
+    """Async version of :func:`swipe` (per-segment `input swipe`, no sendevent replay)."""
+    adb_prefix = _get_adb_prefix(device_id)
+    ad = get_anti_detection()
+
+    if duration_ms is None:
+        duration_ms = _swipe_duration(start_x, start_y, end_x, end_y)
+
+    if use_anti_detection and ad.enabled and ad.config.get("enable_bezier_swipe", True):
+        path = ad.generate_swipe_path(start_x, start_y, end_x, end_y)
+        segments = _path_segments(path, duration_ms)
+    else:
+        segments = [(start_x, start_y, end_x, end_y, duration_ms)]
+
+    for segment in segments:
+        await _run_adb_async(
+            [*adb_prefix, "shell", "input", "swipe", *map(str, segment)], timeout=15, capture=False
+        )
+
+    await asyncio.sleep(ad.human_delay_seconds() if use_anti_detection else delay)
+    get_current_app.invalidate(device_id)
+
+
+async def back_async(device_id: Optional[str] = None, delay: float = 1.0) -> None:
+    """Async version of :func:`back`."""
+    adb_prefix = _get_adb_prefix(device_id)
+
+    await _run_adb_async(
+        [*adb_prefix, "shell", "input", "keyevent", "4"], timeout=10, capture=False
+    )
+    await asyncio.sleep(delay)
+    get_current_app.invalidate(device_id)
+
+
+async def home_async(device_id: Optional[str] = None, delay: float = 1.0) -> None:
+    """Async version of :func:`home`."""
+    adb_prefix = _get_adb_prefix(device_id)
+
+    await _run_adb_async(
+        [
+            *adb_prefix,
+            "shell",
+            "am",
+            "start",
+            "-a",
+            "android.intent.action.MAIN",
+            "-c",
+            "android.intent.category.HOME",
+        ],
+        timeout=10,
+        capture=False,
+    )
+    await asyncio.sleep(delay)
+    get_current_app.invalidate(device_id)
+
+
+async def launch_app_async(
+    app_name: str, device_id: Optional[str] = None, delay: float = 1.0
+) -> bool:
+    """Async version of :func:`launch_app` (same package lookup, AM -> monkey fallback)."""
+    package = _resolve_app_package(app_name)
+    if not package:
+        return False
+
+    adb_prefix = _get_adb_prefix(device_id)
+
+    if os.getenv("ENABLE_APP_CHECK", "true").lower() == "true":
+        try:
+            code, stdout, _ = await _run_adb_async(
+                [*adb_prefix, "shell", "pm", "path", package], timeout=5
+            )
+            if code != 0 or not stdout.strip():
+                logger.error("❌ 应用未安装: %s (包名: %s)", app_name, package)
+                return False
+        except subprocess.TimeoutExpired:
+            logger.warning("应用安装检查超时，继续尝试启动...")
+
+    launchers = (
+        (
+            "AM",
+            [
+                "am",
+                "start",
+                "-a",
+                "android.intent.action.MAIN",
+                "-c",
+                "android.intent.category.LAUNCHER",
+                package,
+            ],
+        ),
+        ("monkey", ["monkey", "-p", package, "-c", "android.intent.category.LAUNCHER", "1"]),
+    )
+    for method, args in launchers:
+        try:
+            code, stdout, stderr = await _run_adb_async([*adb_prefix, "shell", *args], timeout=10)
+        except subprocess.TimeoutExpired:
+            logger.warning("%s启动超时", method)
+            continue
+
+        output = _decode(stdout + stderr)
+        if code == 0 and (method != "AM" or "Error" not in output):
+            logger.info("应用启动成功 (%s): %s", method, app_name)
+            await asyncio.sleep(delay)
+            get_current_app.invalidate(device_id)
+            return True
+        logger.warning("%s启动失败: %s", method, output.strip())
+
+    logger.error("应用启动失败: %s", app_name)
+    return False
+
+
+async def run_adb_command_async(
+    command: list[str], device_id: Optional[str] = None, timeout: int = 30, check_error: bool = True
+) -> str:
+    """
+    Async version of :func:`run_adb_command`.
+
+    Raises:
+        RuntimeError: 如果命令执行失败且 check_error=True
+    """
+    adb_prefix = _get_adb_prefix(device_id)
+
+    try:
+        _, stdout, stderr = await _run_adb_async([*adb_prefix, *command], timeout)
+    except subprocess.TimeoutExpired:
+        error_msg = f"ADB command timeout after {timeout}s: {' '.join(command)}"
+        if check_error:
+            raise RuntimeError(error_msg)
+        return ""
+
+    if check_error and stderr and _ADB_ERROR_RE.search(stderr):
+        raise RuntimeError(f"ADB Error: {_decode(stderr).strip()}")
+
+    return _decode(stdout).strip()
@@ -17,25 +17,20 @@ def type_text(text: str, device_id: str | None = None) -> None:
         See: https://github.com/nicnocquee/AdbKeyboard
     """
     adb_prefix = _get_adb_prefix(device_id)
-    encoded_text = base64.b64encode(text.encode("utf-8")).decode("utf-8")
 
     subprocess.run(
-        adb_prefix
-        + [
-            "shell",
-            "am",
-            "broadcast",
-            "-a",
-            "ADB_INPUT_B64",
-            "--es",
-            "msg",
-            encoded_text,
-        ],
-        capture_output=True,
-        text=True,
+        adb_prefix + ["shell", *_type_text_args(text)],
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
     )
 
 
+def _type_text_args(text: str) -> list[str]:
+    """Shell argv for typing text through the ADB Keyboard broadcast."""
+    encoded_text = base64.b64encode(text.encode("utf-8")).decode("utf-8")
+    return ["am", "broadcast", "-a", "ADB_INPUT_B64", "--es", "msg", encoded_text]
+
+
 def clear_text(device_id: str | None = None) -> None:
     """
     Clear text in the currently focused input field.
@@ -47,8 +42,8 @@ def clear_text(device_id: str | None = None) -> None:
 
     subprocess.run(
         adb_prefix + ["shell", "am", "broadcast", "-a", "ADB_CLEAR_TEXT"],
-        capture_output=True,
-        text=True,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
     )
 
 
@@ -76,8 +71,8 @@ def detect_and_set_adb_keyboard(device_id: str | None = None) -> str:
     if "com.android.adbkeyboard/.AdbIME" not in current_ime:
         subprocess.run(
             adb_prefix + ["shell", "ime", "set", "com.android.adbkeyboard/.AdbIME"],
-            capture_output=True,
-            text=True,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
         )
 
     # Warm up the keyboard
@@ -96,7 +91,11 @@ def restore_keyboard(ime: str, device_id: str | None = None) -> None:
     """
     adb_prefix = _get_adb_prefix(device_id)
 
-    subprocess.run(adb_prefix + ["shell", "ime", "set", ime], capture_output=True, text=True)
+    subprocess.run(
+        adb_prefix + ["shell", "ime", "set", ime],
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
 
 
 def _get_adb_prefix(device_id: str | None) -> list:
@@ -1,12 +1,17 @@
 """Screenshot utilities for capturing Android device screen."""
 
-import base64
+import binascii
 import logging
+import struct
 import subprocess
+from collections import deque
 from dataclasses import dataclass
+from functools import cached_property
 from io import BytesIO
 
-from PIL import Image
+from PIL import Image, ImageStat
+
+from . import adb_pool
 
 # 尝试导入 yadb（强制截图功能）
 try:
@@ -21,17 +26,71 @@ logger = logging.getLogger(__name__)
 # 配置：是否尝试使用 yadb 强制截图
 USE_YADB_FORCE_SCREENSHOT = True
 
+# 配置：是否检测全黑截图（关闭后，无需缩放的截图可跳过 PNG 解码）
+CHECK_BLACK_SCREEN = True
+
+# 截图最大边长（防止 API 报错 Code 1210）
+MAX_DIMENSION = 1080
+
+# 配置：使用 `screencap` 原始帧（无 -p）代替 PNG
+# 设备端不再做 zlib 压缩，但传输量约为 PNG 的 5-10 倍，仅建议 USB/局域网使用
+USE_RAW_SCREENCAP = False
+
+# 原始帧重新编码 PNG 时的压缩级别（1 = 最快）
+RAW_PNG_COMPRESS_LEVEL = 1
+
+# 截图失败时返回的黑色占位图尺寸
+FALLBACK_WIDTH, FALLBACK_HEIGHT = 1080, 2400
+
+# 黑色占位图 PNG（首次使用时生成）
+_fallback_png: bytes | None = None
+
+_PNG_SIGNATURE = b"\x89PNG\r\n\x1a\n"
+
+# 最近编码过的截图 (PNG 字节, base64)：画面未变化（键盘、加载页）时直接复用编码结果
+RECENT_BASE64_SIZE = 4
+_recent_base64: deque[tuple[bytes, str]] = deque(maxlen=RECENT_BASE64_SIZE)
+
+# 原始帧头：width, height, format（Android 9+ 额外带 4 字节 colorspace）
+_RAW_HEADER = struct.Struct("<III")
+
+# Android PixelFormat -> (PIL rawmode, 每像素字节数)
+_RAW_FORMATS = {
+    1: ("RGBX", 4),  # RGBA_8888（截图无透明度，丢弃 alpha）
+    2: ("RGBX", 4),  # RGBX_8888
+    3: ("RGB", 3),  # RGB_888
+    5: ("BGRX", 4),  # BGRA_8888
+}
+
 
-@dataclass
+@dataclass(frozen=True)
 class Screenshot:
-    """Represents a captured screenshot."""
+    """Represents a captured screenshot (PNG bytes; base64 is encoded lazily)."""
 
-    base64_data: str
+    png_bytes: bytes
     width: int
     height: int
     is_sensitive: bool = False
     forced: bool = False  # 新增：是否使用强制截图
 
+    @cached_property
+    def base64_data(self) -> str:
+        """Base64 of the PNG, encoded on first access (callers that only save bytes skip it)."""
+        return _encode_base64(self.png_bytes)
+
+
+def _encode_base64(png: bytes) -> str:
+    """Base64-encode a PNG, reusing the result for a byte-identical recent screenshot."""
+    # 长度不同直接跳过；长度相同时 memcmp 比较，远快于重新编码（也比哈希快）
+    size = len(png)
+    for data, encoded in tuple(_recent_base64):
+        if data is png or (len(data) == size and data == png):
+            return encoded
+
+    encoded = binascii.b2a_base64(png, newline=False).decode("ascii")
+    _recent_base64.append((png, encoded))
+    return encoded
+
 
 def get_screenshot(
     device_id: str | None = None,
@@ -94,64 +153,86 @@ def _get_screenshot_standard(
     adb_prefix = _get_adb_prefix(device_id, adb_host, adb_port)
 
     try:
-        # 使用 exec-out 直接获取截图数据（不需要在手机上写文件）
-        # 这种方法更适合远程 FRP 环境
-        result = subprocess.run(
-            adb_prefix + ["exec-out", "screencap", "-p"],
-            capture_output=True,
-            timeout=timeout,
-        )
+        # 原始帧模式：设备端省去 PNG 压缩，主机端省去 PNG 解码
+        img = _capture_raw(adb_prefix, timeout) if USE_RAW_SCREENCAP else None
+        image_data = None
+
+        if img is None and adb_pool.PPADB_AVAILABLE:
+            # 连接池（ppadb）直接走 ADB 协议，免去每次启动 adb 进程
+            if adb_host and adb_port:
+                image_data = adb_pool.pooled_screencap(None, adb_host, adb_port)
+            else:
+                image_data = adb_pool.pooled_screencap(device_id)
+
+        if img is None and image_data is None:
+            # 使用 exec-out 直接获取截图数据（不需要在手机上写文件）
+            # 这种方法更适合远程 FRP 环境
+            result = subprocess.run(
+                adb_prefix + ["exec-out", "screencap", "-p"],
+                capture_output=True,
+                timeout=timeout,
+            )
 
-        # 检查是否成功
-        if result.returncode != 0:
-            error_msg = result.stderr.decode("utf-8", errors="ignore")
-            logger.warning(f"Standard screenshot failed: {error_msg}")
+            # 检查是否成功
+            if result.returncode != 0:
+                error_msg = result.stderr.decode("utf-8", errors="ignore")
+                logger.warning(f"Standard screenshot failed: {error_msg}")
 
-            # 检测是否是敏感页面（FLAG_SECURE）
-            is_sensitive = "Status: -1" in error_msg or "FLAG_SECURE" in error_msg
-            return _create_fallback_screenshot(is_sensitive=is_sensitive)
+                # 检测是否是敏感页面（FLAG_SECURE）
+                is_sensitive = "Status: -1" in error_msg or "FLAG_SECURE" in error_msg
+                return _create_fallback_screenshot(is_sensitive=is_sensitive)
 
-        # 直接从 stdout 获取 PNG 数据
-        image_data = result.stdout
+            # 直接从 stdout 获取 PNG 数据
+            image_data = result.stdout
 
-        if not image_data or len(image_data) < 100:
-            logger.warning(f"Screenshot data too small: {len(image_data)} bytes")
-            # 修复：数据过小也可能是敏感屏幕
-            return _create_fallback_screenshot(is_sensitive=True)
+        if img is None:
+            if not image_data or len(image_data) < 100:
+                logger.warning(f"Screenshot data too small: {len(image_data)} bytes")
+                # 修复：数据过小也可能是敏感屏幕
+                return _create_fallback_screenshot(is_sensitive=True)
+
+            # 快速路径：直接从 IHDR 读取尺寸，无需缩放且不检测黑屏时跳过解码
+            size = _png_size(image_data)
+            if size and max(size) <= MAX_DIMENSION and not CHECK_BLACK_SCREEN:
+                return Screenshot(
+                    png_bytes=image_data,
+                    width=size[0],
+                    height=size[1],
+                )
 
-        # 使用 BytesIO 从内存中加载图片
-        img = Image.open(BytesIO(image_data))
+            # 使用 BytesIO 从内存中加载图片
+            img = Image.open(BytesIO(image_data))
 
         # 🆕 调整图片大小，防止 API 报错 (Code 1210)
-        # 限制最大边长为 1080px
-        max_dimension = 1080
-        if max(img.size) > max_dimension:
-            img.thumbnail((max_dimension, max_dimension), Image.Resampling.LANCZOS)
-            # 重新保存到 BytesIO
-            buffer = BytesIO()
-            img.save(buffer, format="PNG")
-            image_data = buffer.getvalue()
+        if max(img.size) > MAX_DIMENSION:
+            img.thumbnail((MAX_DIMENSION, MAX_DIMENSION), Image.Resampling.LANCZOS)
+            image_data = None
 
         width, height = img.size
 
         # 新增：检测是否是全黑或几乎全黑的图片（可能是敏感屏幕）
-        # 计算平均亮度
-        grayscale = img.convert("L")  # 转为灰度
-        pixels = list(grayscale.getdata())
-        avg_brightness = sum(pixels) / len(pixels)
-
-        # 如果平均亮度低于10（几乎全黑），标记为敏感
-        if avg_brightness < 10:
-            logger.warning(
-                f"Screenshot is almost black (brightness: {avg_brightness:.1f}), marking as sensitive"
-            )
-            return _create_fallback_screenshot(is_sensitive=True)
-
-        # 直接对原始数据进行 base64 编码
-        base64_data = base64.b64encode(image_data).decode("utf-8")
+        if CHECK_BLACK_SCREEN:
+            avg_brightness = _mean_brightness(img)
+
+            # 如果平均亮度低于10（几乎全黑），标记为敏感
+            if avg_brightness < 10:
+                logger.warning(
+                    f"Screenshot is almost black (brightness: {avg_brightness:.1f}), "
+                    "marking as sensitive"
+                )
+                return _create_fallback_screenshot(is_sensitive=True)
+
+        # 缩放过或来自原始帧时才需要（重新）编码 PNG
+        if image_data is None:
+            buffer = BytesIO()
+            if USE_RAW_SCREENCAP:
+                img.save(buffer, format="PNG", compress_level=RAW_PNG_COMPRESS_LEVEL)
+            else:
+                img.save(buffer, format="PNG")
+            image_data = buffer.getvalue()
 
         return Screenshot(
-            base64_data=base64_data, width=width, height=height, is_sensitive=False, forced=False
+            png_bytes=image_data, width=width, height=height, is_sensitive=False, forced=False
         )
 
     except subprocess.TimeoutExpired:
@@ -172,34 +253,29 @@ def _get_screenshot_yadb(
     and payment apps that normally block screenshots.
     """
     try:
-        result = yadb.force_screenshot_base64(
-            device_id=device_id, adb_host=adb_host, adb_port=adb_port, include_dimensions=True
-        )
+        image_data = yadb.force_screenshot(device_id, adb_host, adb_port)
 
-        if result and isinstance(result, dict):
-            base64_data = result["base64_data"]
-            width = result["width"]
-            height = result["height"]
+        if image_data:
+            # 尺寸直接读 IHDR；非 PNG 时才交给 PIL
+            size = _png_size(image_data) or Image.open(BytesIO(image_data)).size
+            width, height = size
 
             # 🆕 调整图片大小，防止 API 报错 (Code 1210)
-            max_dimension = 1080
-            if max(width, height) > max_dimension:
+            if max(width, height) > MAX_DIMENSION:
                 try:
-                    # 解码
-                    image_data = base64.b64decode(base64_data)
                     img = Image.open(BytesIO(image_data))
                     # 调整大小
-                    img.thumbnail((max_dimension, max_dimension), Image.Resampling.LANCZOS)
+                    img.thumbnail((MAX_DIMENSION, MAX_DIMENSION), Image.Resampling.LANCZOS)
                     # 重新编码
                     buffer = BytesIO()
                     img.save(buffer, format="PNG")
-                    base64_data = base64.b64encode(buffer.getvalue()).decode("utf-8")
+                    image_data = buffer.getvalue()
                     width, height = img.size
                 except Exception as e:
                     logger.warning(f"Failed to resize yadb screenshot: {e}")
 
             return Screenshot(
-                base64_data=base64_data,
+                png_bytes=image_data,
                 width=width,
                 height=height,
                 is_sensitive=False,
@@ -230,18 +306,70 @@ def _get_adb_prefix(
     return cmd
 
 
-def _create_fallback_screenshot(is_sensitive: bool) -> Screenshot:
-    """Create a black fallback image when screenshot fails."""
-    default_width, default_height = 1080, 2400
+def _capture_raw(adb_prefix: list, timeout: int) -> Image.Image | None:
+    """Capture a raw `screencap` frame; None if it fails or the format is unsupported."""
+    result = subprocess.run(
+        adb_prefix + ["exec-out", "screencap"], capture_output=True, timeout=timeout
+    )
+    if result.returncode != 0:
+        logger.debug("Raw screencap failed, falling back to PNG")
+        return None
+
+    img = _decode_raw_screencap(result.stdout)
+    if img is None:
+        logger.debug("Unsupported raw screencap frame, falling back to PNG")
+    return img
+
+
+def _decode_raw_screencap(data: bytes) -> Image.Image | None:
+    """Wrap raw `screencap` output (header + pixels) as an RGB image."""
+    if len(data) < _RAW_HEADER.size:
+        return None
+
+    width, height, pixel_format = _RAW_HEADER.unpack_from(data)
+    if pixel_format not in _RAW_FORMATS or not width or not height:
+        return None
 
-    black_img = Image.new("RGB", (default_width, default_height), color="black")
-    buffered = BytesIO()
-    black_img.save(buffered, format="PNG")
-    base64_data = base64.b64encode(buffered.getvalue()).decode("utf-8")
+    rawmode, bpp = _RAW_FORMATS[pixel_format]
+    header_size = len(data) - width * height * bpp
+    if header_size not in (12, 16):
+        return None
 
+    return Image.frombytes("RGB", (width, height), memoryview(data)[header_size:], "raw", rawmode)
+
+
+def _png_size(data: bytes) -> tuple[int, int] | None:
+    """Read (width, height) from the PNG IHDR chunk without decoding the image."""
+    # 签名(8) + 长度(4) + "IHDR"(4) 之后紧跟 width/height（大端 uint32）
+    if len(data) < 24 or data[:8] != _PNG_SIGNATURE or data[12:16] != b"IHDR":
+        return None
+    return int.from_bytes(data[16:20], "big"), int.from_bytes(data[20:24], "big")
+
+
+def _mean_brightness(img: Image.Image) -> float:
+    """Average grayscale brightness (0-255), computed in C via the image histogram."""
+    # ImageStat 基于 C 层直方图统计，避免把几百万像素物化成 Python int 列表
+    return ImageStat.Stat(img.convert("L")).mean[0]
+
+
+def _create_fallback_screenshot(is_sensitive: bool) -> Screenshot:
+    """Create a black fallback image when screenshot fails (the PNG is built only once)."""
     return Screenshot(
-        base64_data=base64_data,
-        width=default_width,
-        height=default_height,
+        png_bytes=_get_fallback_png(),
+        width=FALLBACK_WIDTH,
+        height=FALLBACK_HEIGHT,
         is_sensitive=is_sensitive,
     )
+
+
+def _get_fallback_png() -> bytes:
+    """Black PNG used by every fallback screenshot, encoded on first use."""
+    global _fallback_png
+
+    if _fallback_png is None:
+        black_img = Image.new("RGB", (FALLBACK_WIDTH, FALLBACK_HEIGHT), color="black")
+        buffered = BytesIO()
+        black_img.save(buffered, format="PNG")
+        _fallback_png = buffered.getvalue()
+
+    return _fallback_png
@@ -0,0 +1,167 @@
+#!/usr/bin/env python3
+# Copyright (C) 2025 PhoneAgent Contributors
+# Licensed under AGPL-3.0
+
+"""
+持久化 adb shell 会话 - Persistent ADB Shell Session
+
+每条 `adb shell xxx` 都要 fork/exec 一个 adb 进程并与 adb server 握手（30-100ms）。
+本模块为每个设备保持一个常驻的 `adb shell` 子进程，通过 stdin 发送命令、
+用结束标记从 stdout 切分每条命令的输出，把短命令的延迟降到一次往返。
+"""
+
+import atexit
+import logging
+import queue
+import subprocess
+import threading
+from typing import Dict, Optional, Sequence, Tuple
+
+logger = logging.getLogger(__name__)
+
+# 命令结束标记（后面紧跟退出码）
+_END_MARKER = "__PHONEAGENT_END__"
+
+
+class AdbShellUnavailableError(Exception):
+    """会话不可用（命令未发出，调用方可以安全地改用一次性 adb 调用）"""
+
+
+class AdbShellSession:
+    """单个设备的常驻 adb shell 进程"""
+
+    def __init__(self, adb_prefix: Sequence[str]):
+        """
+        Args:
+            adb_prefix: adb 命令前缀，如 ["adb", "-s", "emulator-5554"]
+        """
+        self.adb_prefix = list(adb_prefix)
+        self._proc: Optional[subprocess.Popen] = None
+        self._lines: "queue.Queue[Optional[str]]" = queue.Queue()
+        self._lock = threading.Lock()
+
+    def _spawn(self):
+        """启动 adb shell 子进程和 stdout 读取线程"""
+        try:
+            proc = subprocess.Popen(
+                self.adb_prefix + ["shell"],
+                stdin=subprocess.PIPE,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.STDOUT,
+                text=True,
+                encoding="utf-8",
+                errors="replace",
+                bufsize=1,
+            )
+        except OSError as e:
+            raise AdbShellUnavailableError(f"Failed to start adb shell: {e}") from e
+
+        lines: "queue.Queue[Optional[str]]" = queue.Queue()
+        threading.Thread(
+            target=self._read_stdout, args=(proc, lines), name="adb-shell-reader", daemon=True
+        ).start()
+        self._proc = proc
+        self._lines = lines
+        logger.debug(f"Started persistent adb shell: {' '.join(self.adb_prefix)}")
+
+    @staticmethod
+    def _read_stdout(proc: subprocess.Popen, lines: "queue.Queue[Optional[str]]"):
+        """读取线程：逐行转发 stdout，EOF 时放入 None"""
+        for line in proc.stdout:
+            lines.put(line)
+        lines.put(None)
+
+    def _alive(self) -> bool:
+        return self._proc is not None and self._proc.poll() is None
+
+    def send(self, command: str, timeout: float = 10) -> Tuple[int, str]:
+        """
+        在会话中执行一条 shell 命令
+
+        Args:
+            command: shell 命令（调用方负责转义）
+            timeout: 等待命令结束的超时（秒）
+
+        Returns:
+            (exit_code, output)，stderr 合并在 output 中；会话中途断开时 exit_code 为 -1
+
+        Raises:
+            AdbShellUnavailableError: 会话无法启动或写入失败（命令未执行）
+            subprocess.TimeoutExpired: 命令超时（会话已关闭，下次调用重建）
+        """
+        with self._lock:
+            if not self._alive():
+                self.close()
+                self._spawn()
+
+            try:
+                self._proc.stdin.write(f"{command}; echo {_END_MARKER}$?\n")
+                self._proc.stdin.flush()
+            except (OSError, ValueError) as e:
+                self.close()
+                raise AdbShellUnavailableError(f"adb shell pipe broken: {e}") from e
+
+            output = []
+            while True:
+                try:
+                    line = self._lines.get(timeout=timeout)
+                except queue.Empty:
+                    self.close()
+                    raise subprocess.TimeoutExpired(command, timeout)
+
+                if line is None:
+                    # adb shell 退出（设备断开等）
+                    self.close()
+                    return -1, "".join(output)
+
+                marker_pos = line.find(_END_MARKER)
+                if marker_pos != -1:
+                    output.append(line[:marker_pos])
+                    code = line[marker_pos + len(_END_MARKER) :].strip()
+                    return (int(code) if code.isdigit() else -1), "".join(output)
+
+                output.append(line)
+
+    def close(self):
+        """关闭会话（可重复调用）"""
+        proc, self._proc = self._proc, None
+        if proc is None:
+            return
+        try:
+            proc.stdin.close()
+        except OSError:
+            pass
+        if proc.poll() is None:
+            proc.kill()
+        try:
+            proc.wait(timeout=2)
+        except subprocess.TimeoutExpired:
+            pass
+
+
+# 全局会话表：adb 前缀 -> 会话
+_sessions: Dict[Tuple[str, ...], AdbShellSession] = {}
+_sessions_lock = threading.Lock()
+
+
+def get_shell_session(adb_prefix: Sequence[str]) -> AdbShellSession:
+    """获取（或创建）指定 adb 前缀对应的常驻会话"""
+    key = tuple(adb_prefix)
+    with _sessions_lock:
+        session = _sessions.get(key)
+        if session is None:
+            session = AdbShellSession(adb_prefix)
+            _sessions[key] = session
+        return session
+
+
+def close_all_sessions():
+    """关闭所有常驻会话"""
+    with _sessions_lock:
+        sessions = list(_sessions.values())
+        _sessions.clear()
+    for session in sessions:
+        session.close()
+
+
+atexit.register(close_all_sessions)
@@ -17,13 +17,48 @@
 """
 
 import logging
+import shlex
+import threading
 import time
-from typing import Dict, Optional
+from collections import OrderedDict
+from typing import Optional
 
 logger = logging.getLogger(__name__)
 
+
+class _InputMethodCache:
+    """线程安全、有容量上限的 LRU：device_id -> "yadb" or "adb_keyboard" """
+
+    def __init__(self, maxsize: int = 128):
+        self.maxsize = maxsize
+        self._data: "OrderedDict[str, str]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, device_key: str) -> Optional[str]:
+        with self._lock:
+            method = self._data.get(device_key)
+            if method is not None:
+                self._data.move_to_end(device_key)
+            return method
+
+    def set(self, device_key: str, method: str):
+        with self._lock:
+            self._data[device_key] = method
+            self._data.move_to_end(device_key)
+            if len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def invalidate(self, device_key: str) -> bool:
+        """删除缓存项，返回是否存在"""
+        with self._lock:
+            return self._data.pop(device_key, None) is not None
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+
 # 全局缓存：记录每个设备的最佳输入方案
-_device_input_methods: Dict[str, str] = {}  # device_id -> "yadb" or "adb_keyboard"
+_device_input_methods = _InputMethodCache()
 
 
 def smart_type_text(
@@ -51,32 +86,32 @@ def smart_type_text(
         return _execute_input(text, device_id, force_method)
 
     # 如果已知有效方法，优先使用
-    if device_key in _device_input_methods:
-        method = _device_input_methods[device_key]
-        logger.debug(f"使用已知输入方法: {method}")
+    method = _device_input_methods.get(device_key)
+    if method is not None:
+        logger.debug("使用已知输入方法: %s", method)
 
         success = _execute_input(text, device_id, method)
         if success:
             return True
 
         # 失败了，重新探测
-        logger.warning(f"已知方法 {method} 失败，重新探测...")
-        del _device_input_methods[device_key]
+        logger.warning("已知方法 %s 失败，重新探测...", method)
+        _device_input_methods.invalidate(device_key)
 
     # 尝试不同方法
     methods = ["yadb", "adb_keyboard"]
 
     for method in methods:
-        logger.info(f"🔄 尝试输入方法: {method}")
+        logger.info("🔄 尝试输入方法: %s", method)
         success = _execute_input(text, device_id, method)
 
         if success:
             # 成功！记住这个方法
-            _device_input_methods[device_key] = method
-            logger.info(f"{method} 成功，已缓存")
+            _device_input_methods.set(device_key, method)
+            logger.info("%s 成功，已缓存", method)
             return True
 
-        logger.debug(f"{method} 失败，尝试下一个...")
+        logger.debug("%s 失败，尝试下一个...", method)
 
     # 所有方法都失败
     logger.error("所有输入方法都失败")
@@ -111,7 +146,7 @@ def _try_yadb_input(text: str, device_id: Optional[str]) -> bool:
         success = yadb_type_text(text, device_id)
 
         if success:
-            logger.debug(f"yadb输入成功: {text[:30]}...")
+            logger.debug("yadb输入成功: %s...", text[:30])
             return True
 
         return False
@@ -120,52 +155,45 @@ def _try_yadb_input(text: str, device_id: Optional[str]) -> bool:
         logger.debug("yadb模块不可用")
         return False
     except Exception as e:
-        logger.debug(f"yadb输入失败: {e}")
+        logger.debug("yadb输入失败: %s", e)
         return False
 
 
 def _try_adb_keyboard_input(text: str, device_id: Optional[str]) -> bool:
     """尝试使用ADB Keyboard输入"""
     try:
-        from phone_agent.adb.input import (
-            clear_text,
-            detect_and_set_adb_keyboard,
-            restore_keyboard,
-        )
-        from phone_agent.adb.input import (
-            type_text as adb_type_text,
-        )
+        from phone_agent.adb.device import run_adb_batch
+        from phone_agent.adb.input import _type_text_args, detect_and_set_adb_keyboard
 
         # 切换到ADB Keyboard
         original_ime = detect_and_set_adb_keyboard(device_id)
-        time.sleep(0.3)  # 缩短延迟 (原1秒)
-
-        # 清空文本
-        clear_text(device_id)
-        time.sleep(0.2)  # 缩短延迟 (原1秒)
-
-        # 输入文本
-        adb_type_text(text, device_id)
-        time.sleep(0.5)  # 缩短延迟 (原1秒)
-
-        # 恢复键盘
-        restore_keyboard(original_ime, device_id)
-        time.sleep(0.2)  # 缩短延迟 (原1秒)
-
-        logger.debug(f"ADB Keyboard输入成功: {text[:30]}...")
+        time.sleep(0.3)  # 等待输入法切换生效
+
+        # 清空 -> 输入 -> 等待提交 -> 恢复键盘，合并为一次 adb shell 调用
+        # （am broadcast 会等待接收者处理完毕，清空与输入之间无需额外等待）
+        commands = [
+            "am broadcast -a ADB_CLEAR_TEXT",
+            shlex.join(_type_text_args(text)),
+            "sleep 0.5",
+        ]
+        if original_ime:
+            commands.append(shlex.join(["ime", "set", original_ime]))
+        run_adb_batch(commands, device_id, stop_on_error=False, capture=False)
+        time.sleep(0.2)  # 等待键盘恢复
+
+        logger.debug("ADB Keyboard输入成功: %s...", text[:30])
         return True
 
     except Exception as e:
-        logger.debug(f"ADB Keyboard输入失败: {e}")
+        logger.debug("ADB Keyboard输入失败: %s", e)
         return False
 
 
 def reset_input_method(device_id: Optional[str] = None):
     """重置设备的输入方法缓存"""
     device_key = device_id or "default"
-    if device_key in _device_input_methods:
-        del _device_input_methods[device_key]
-        logger.info(f"已重置 {device_key} 的输入方法")
+    if _device_input_methods.invalidate(device_key):
+        logger.info("已重置 %s 的输入方法", device_key)
 
 
 def get_input_method(device_id: Optional[str] = None) -> Optional[str]:
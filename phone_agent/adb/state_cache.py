@@ -0,0 +1,205 @@
+#!/usr/bin/env python3
+# Copyright (C) 2025 PhoneAgent Contributors
+# Licensed under AGPL-3.0
+
+"""
+设备状态短期缓存 - TTL + Single-flight
+
+`dumpsys window`、`pm list packages` 等查询每次都要 100ms 以上，而 Agent 循环里
+同一设备的状态往往在很短时间内被反复读取。这里提供两个按 device_id 缓存的装饰器：
+
+- 结果在 ttl 秒内直接复用
+- 同一设备的并发调用合并为一次真实查询（single-flight）
+- 被装饰函数带有 `.invalidate(device_id)`（不传参数则全部清除），在点击/返回/
+  启动应用等会改变前台状态的操作之后调用，保证下一次读取拿到新结果
+
+使用方法:
+    @ttl_cache(ttl=0.5)
+    def get_current_app(device_id=None): ...
+
+    get_current_app.invalidate(device_id)
+"""
+
+import asyncio
+import functools
+import threading
+import time
+from typing import Any, Callable, Dict, Optional, Tuple
+
+_MISSING = object()
+
+
+class _Flight:
+    """一次进行中的查询（线程版）"""
+
+    __slots__ = ("done", "value", "error")
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.value: Any = None
+        self.error: Optional[BaseException] = None
+
+
+class _DeviceCache:
+    """
+    按 device_id 存放结果
+
+    invalidate 会递增代数：在失效之前发起、之后才返回的查询结果不会被写入缓存。
+    所有方法都要求调用方持有 self.lock。
+    """
+
+    def __init__(self, ttl: float):
+        self.ttl = ttl
+        self.lock = threading.Lock()
+        self.results: Dict[Any, Tuple[float, Any]] = {}
+        self.generations: Dict[Any, int] = {}
+        self.epoch = 0
+
+    def lookup(self, key) -> Any:
+        hit = self.results.get(key)
+        if hit is not None and time.monotonic() - hit[0] < self.ttl:
+            return hit[1]
+        return _MISSING
+
+    def generation(self, key) -> Tuple[int, int]:
+        return self.epoch, self.generations.get(key, 0)
+
+    def store(self, key, generation: Tuple[int, int], value):
+        if self.generation(key) == generation:
+            self.results[key] = (time.monotonic(), value)
+
+    def invalidate(self, key=_MISSING):
+        if key is _MISSING:
+            self.results.clear()
+            self.epoch += 1
+        else:
+            self.results.pop(key, None)
+            self.generations[key] = self.generations.get(key, 0) + 1
+
+
+def ttl_cache(ttl: float) -> Callable:
+    """
+    同步函数 `func(device_id=None)` 的 TTL + single-flight 缓存
+
+    Args:
+        ttl: 结果有效期（秒）
+    """
+
+    def decorator(func: Callable) -> Callable:
+        cache = _DeviceCache(ttl)
+        inflight: Dict[Any, _Flight] = {}
+
+        @functools.wraps(func)
+        def wrapper(device_id: Optional[str] = None):
+            with cache.lock:
+                value = cache.lookup(device_id)
+                if value is not _MISSING:
+                    return value
+                flight = inflight.get(device_id)
+                leader = flight is None
+                if leader:
+                    flight = inflight[device_id] = _Flight()
+                generation = cache.generation(device_id)
+
+            if not leader:
+                flight.done.wait()
+                if flight.error is not None:
+                    raise flight.error
+                return flight.value
+
+            try:
+                flight.value = func(device_id)
+            except BaseException as e:
+                flight.error = e
+                raise
+            else:
+                with cache.lock:
+                    cache.store(device_id, generation, flight.value)
+                return flight.value
+            finally:
+                with cache.lock:
+                    if inflight.get(device_id) is flight:
+                        del inflight[device_id]
+                flight.done.set()
+
+        def invalidate(device_id: Any = _MISSING):
+            """清除指定设备（不传参数则清除全部）的缓存结果"""
+            with cache.lock:
+                cache.invalidate(device_id)
+                if device_id is _MISSING:
+                    inflight.clear()
+                else:
+                    inflight.pop(device_id, None)
+
+        wrapper.invalidate = invalidate
+        return wrapper
+
+    return decorator
+
+
+def async_ttl_cache(ttl: float) -> Callable:
+    """
+    协程函数 `func(device_id=None)` 的 TTL + single-flight 缓存
+
+    进行中的查询按 (事件循环, device_id) 合并；结果在所有事件循环间共享。
+
+    Args:
+        ttl: 结果有效期（秒）
+    """
+
+    def decorator(func: Callable) -> Callable:
+        cache = _DeviceCache(ttl)
+        inflight: Dict[Tuple[int, Any], asyncio.Future] = {}
+
+        @functools.wraps(func)
+        async def wrapper(device_id: Optional[str] = None):
+            loop = asyncio.get_running_loop()
+            key = (id(loop), device_id)
+
+            with cache.lock:
+                value = cache.lookup(device_id)
+                if value is not _MISSING:
+                    return value
+                future = inflight.get(key)
+                leader = future is None
+                if leader:
+                    future = inflight[key] = loop.create_future()
+                generation = cache.generation(device_id)
+
+            if not leader:
+                return await asyncio.shield(future)
+
+            try:
+                value = await func(device_id)
+            except asyncio.CancelledError:
+                future.cancel()
+                raise
+            except Exception as e:
+                future.set_exception(e)
+                # 没有其他等待者时避免 "exception was never retrieved" 警告
+                future.exception()
+                raise
+            else:
+                future.set_result(value)
+                with cache.lock:
+                    cache.store(device_id, generation, value)
+                return value
+            finally:
+                with cache.lock:
+                    if inflight.get(key) is future:
+                        del inflight[key]
+
+        def invalidate(device_id: Any = _MISSING):
+            """清除指定设备（不传参数则清除全部）的缓存结果"""
+            with cache.lock:
+                cache.invalidate(device_id)
+                for key in [k for k in inflight if device_id is _MISSING or k[1] == device_id]:
+                    del inflight[key]
+
+        wrapper.invalidate = invalidate
+        return wrapper
+
+    return decorator
+
+
+__all__ = ["ttl_cache", "async_ttl_cache"]
@@ -29,7 +29,7 @@ _device_strategies = {}
 
 
 def get_ui_hierarchy_robust(
-    device_id: Optional[str] = None, max_retries: int = 2, timeout: int = 15
+    device_id: Optional[str] = None, max_retries: int = 2, timeout: int = 15, sort: bool = True
 ) -> List[UIElement]:
     """
     鲁棒的UI层级获取（智能降级）
@@ -38,6 +38,7 @@ def get_ui_hierarchy_robust(
         device_id: 设备ID
         max_retries: 最大重试次数
         timeout: 单次尝试超时（秒）
+        sort: 是否按坐标从上到下排序（见 parse_ui_xml）
 
     Returns:
         UI元素列表
@@ -52,7 +53,7 @@ def get_ui_hierarchy_robust(
         strategy = _device_strategies[device_key]
         logger.debug(f"使用已知策略: {strategy}")
         try:
-            return _execute_strategy(strategy, device_id, timeout)
+            return _execute_strategy(strategy, device_id, timeout, sort)
         except Exception as e:
             logger.warning(f"已知策略失败: {e}，重新尝试")
             del _device_strategies[device_key]
@@ -65,7 +66,7 @@ def get_ui_hierarchy_robust(
         for strategy in strategies:
             try:
                 logger.info(f"🔄 尝试: {strategy} (第{attempt+1}次)")
-                elements = _execute_strategy(strategy, device_id, timeout)
+                elements = _execute_strategy(strategy, device_id, timeout, sort)
 
                 if elements:
                     # 成功！记住这个策略
@@ -89,14 +90,16 @@ def get_ui_hierarchy_robust(
     raise RuntimeError(f"所有UI获取方法都失败 (尝试{max_retries}次)。" f"最后错误: {last_error}")
 
 
-def _execute_strategy(strategy: str, device_id: Optional[str], timeout: int) -> List[UIElement]:
+def _execute_strategy(
+    strategy: str, device_id: Optional[str], timeout: int, sort: bool = True
+) -> List[UIElement]:
     """执行特定策略"""
 
     if strategy == "uiautomator":
-        return _try_uiautomator(device_id, timeout, nohup=False)
+        return _try_uiautomator(device_id, timeout, nohup=False, sort=sort)
 
     elif strategy == "uiautomator_nohup":
-        return _try_uiautomator(device_id, timeout, nohup=True)
+        return _try_uiautomator(device_id, timeout, nohup=True, sort=sort)
 
     else:
         raise ValueError(f"未知策略: {strategy}")
@@ -108,7 +111,7 @@ def _execute_strategy(strategy: str, device_id: Optional[str], timeout: int) ->
 
 
 def _try_uiautomator(
-    device_id: Optional[str], timeout: int, nohup: bool = False
+    device_id: Optional[str], timeout: int, nohup: bool = False, sort: bool = True
 ) -> List[UIElement]:
     """尝试使用uiautomator"""
     import os
@@ -139,7 +142,7 @@ def _try_uiautomator(
         # 拉取XML
         adb_prefix = _get_adb_prefix(device_id)
         pull_result = subprocess.run(
-            adb_prefix + ["pull", remote_path, local_path],
+            [*adb_prefix, "pull", remote_path, local_path],
             capture_output=True,
             text=True,
             timeout=timeout,
@@ -155,7 +158,7 @@ def _try_uiautomator(
         with open(local_path, "r", encoding="utf-8") as f:
             xml_content = f.read()
 
-        elements = parse_ui_xml(xml_content)
+        elements = parse_ui_xml(xml_content, sort=sort)
 
         # 清理
         try:
@@ -19,17 +19,69 @@ XML树解析模块 - 兼容层
 版本: V2.0 (增强版)
 """
 
+import hashlib
+import heapq
+import json
 import logging
-import xml.etree.ElementTree as ET
+import re
+import threading
+from collections import OrderedDict
 from dataclasses import dataclass
-from typing import Dict, List, Optional, Tuple
+from io import BytesIO
+from typing import Dict, Iterator, List, Mapping, Optional, Tuple
+from xml.parsers import expat
 
-logger = logging.getLogger(__name__)
+# 可选依赖：lxml（基于 libxml2，解析大型 UI dump 更快）
+try:
+    from lxml import etree
+
+    LXML_AVAILABLE = True
+    _XML_PARSE_ERRORS: Tuple[type, ...] = (etree.XMLSyntaxError, expat.ExpatError)
+except ImportError:
+    LXML_AVAILABLE = False
+    _XML_PARSE_ERRORS = (expat.ExpatError,)
+
+try:
+    import orjson
 
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
 
-@dataclass
+logger = logging.getLogger(__name__)
+
+# expat 每次喂入的字节数（流式解析，避免一次性堆积全部节点属性）
+_EXPAT_CHUNK_SIZE = 64 * 1024
+
+# format_elements_for_xml 的结果缓存：(XML 摘要, 参数...) -> JSON 字符串
+LLM_FORMAT_CACHE_SIZE = 32
+_llm_format_cache: "OrderedDict[tuple, str]" = OrderedDict()
+_llm_format_cache_lock = threading.Lock()
+
+# bounds 中的坐标（"[x1,y1][x2,y2]"）
+_BOUNDS_RE = re.compile(r"-?\d+")
+
+# 状态栏元素 resource_id 黑名单（子串匹配，忽略大小写）
+_STATUS_BAR_IDS = (
+    "clock",
+    "date",
+    "battery",
+    "wifi",
+    "mobile",
+    "signal",
+    "battery_percentage",
+    "batteryremainingicon",
+    "wifi_combo",
+    "mobile_combo",
+    "status_bar",
+    "notification_icon",
+)
+_STATUS_BAR_RE = re.compile("|".join(map(re.escape, _STATUS_BAR_IDS)), re.IGNORECASE)
+
+
+@dataclass(frozen=True, slots=True)
 class UIElement:
-    """UI元素数据类"""
+    """UI元素数据类（slots + frozen：无 __dict__，可哈希）"""
 
     resource_id: str
     text: str
@@ -55,7 +107,7 @@ class UIElement:
         }
 
 
-def get_ui_hierarchy(device_id: str | None = None) -> List[UIElement]:
+def get_ui_hierarchy(device_id: str | None = None, sort: bool = True) -> List[UIElement]:
     """
     获取设备的UI层级结构（增强版）
 
@@ -67,6 +119,7 @@ def get_ui_hierarchy(device_id: str | None = None) -> List[UIElement]:
 
     Args:
         device_id: 设备ID（可选）
+        sort: 是否按坐标从上到下排序（只交给 format_elements_for_llm 时可传 False）
 
     Returns:
         UI元素列表
@@ -76,10 +129,44 @@ def get_ui_hierarchy(device_id: str | None = None) -> List[UIElement]:
     """
     from phone_agent.adb.ui_hierarchy import get_ui_hierarchy_robust
 
-    return get_ui_hierarchy_robust(device_id=device_id)
+    return get_ui_hierarchy_robust(device_id=device_id, sort=sort)
+
+
+def _iter_node_attrs(xml_content: str) -> Iterator[Mapping[str, str]]:
+    """
+    流式遍历 XML 节点，逐个返回属性映射
+
+    - 安装了 lxml：iterparse start 事件读取属性（父节点先于子节点，与 expat 的文档顺序一致），
+      end 事件清理节点
+    - 否则：pyexpat StartElementHandler 直接拿到属性 dict，不构建任何 Element 对象
+
+    两种后端都严格解析：截断或格式错误的 dump 抛出解析异常，不返回部分结果。
+    """
+    data = xml_content.encode("utf-8")
+
+    if LXML_AVAILABLE:
+        events = etree.iterparse(BytesIO(data), events=("start", "end"), huge_tree=True)
+        for event, node in events:
+            if event == "start":
+                yield node.attrib
+            else:
+                node.clear()
+        return
 
+    pending: List[Dict[str, str]] = []
+    parser = expat.ParserCreate()
+    parser.StartElementHandler = lambda tag, attrs: pending.append(attrs)
 
-def parse_ui_xml(xml_content: str) -> List[UIElement]:
+    for start in range(0, len(data), _EXPAT_CHUNK_SIZE):
+        parser.Parse(data[start : start + _EXPAT_CHUNK_SIZE], False)
+        yield from pending
+        pending.clear()
+
+    parser.Parse(b"", True)
+    yield from pending
+
+
+def parse_ui_xml(xml_content: str, sort: bool = True) -> List[UIElement]:
     """
     解析UI XML，提取交互元素
 
@@ -87,81 +174,81 @@ def parse_ui_xml(xml_content: str) -> List[UIElement]:
     - 保留可交互元素（clickable 或 focusable/editable）
     - 保留有信息的元素（有text、content-desc或resource-id）
     - 跳过空的布局容器
-    - 按Y坐标排序（从上到下）
+    - 按Y坐标排序（从上到下）；sort=False 时保持文档顺序，
+      适合只交给 format_elements_for_llm 的场景（它会自行按优先级和坐标挑选）
 
     优化:
     - 放宽过滤条件：允许可交互但无文本的元素（如图标按钮）
     - 使用focusable判断可编辑性（与源项目一致）
     - 统计调试信息
     """
-    try:
-        root = ET.fromstring(xml_content)
-    except ET.ParseError as e:
-        logger.error(f"XML解析失败: {e}")
-        return []
-
     elements = []
+    sort_keys = []  # 与 elements 平行的 (center_y, center_x)，用于最后的排序
     total_nodes = 0
     interactive_nodes = 0
 
-    for node in root.iter():
-        total_nodes += 1
+    try:
+        for attrs in _iter_node_attrs(xml_content):
+            total_nodes += 1
+
+            # 获取属性（绑定 attrs.get，没有 bounds 的节点直接跳过）
+            g = attrs.get
+            bounds_str = g("bounds")
+            if not bounds_str:
+                continue
 
-        # 获取属性
-        text = node.get("text", "").strip()
-        content_desc = node.get("content-desc", "").strip()
-        resource_id = node.get("resource-id", "")
-        class_name = node.get("class", "Unknown")
-        bounds_str = node.get("bounds", "")
+            # 参考源项目：只判断clickable和focusable
+            clickable = g("clickable") == "true"
+            focusable = g("focusable") == "true" or g("focus") == "true"
 
-        # 参考源项目：只判断clickable和focusable
-        clickable = node.get("clickable", "false") == "true"
-        focusable = node.get("focusable", "false") == "true" or node.get("focus", "false") == "true"
-        enabled = node.get("enabled", "true") == "true"
+            # 文本处理：优先text，回退到content-desc（完全对齐源项目）
+            # text 非空时不再读取 content-desc
+            display_text = g("text", "").strip() or g("content-desc", "").strip()
 
-        # 修复：采用源项目的宽松过滤策略
-        # 源项目逻辑：只要是可交互或有任何信息就保留
-        # 跳过完全空白且不可交互的布局容器
-        if not clickable and not focusable and not text and not content_desc:
-            continue
+            # 修复：采用源项目的宽松过滤策略
+            # 源项目逻辑：只要是可交互或有任何信息就保留
+            # 跳过完全空白且不可交互的布局容器
+            if not clickable and not focusable and not display_text:
+                continue
 
-        # 统计可交互节点
-        if clickable or focusable:
-            interactive_nodes += 1
+            # 统计可交互节点
+            if clickable or focusable:
+                interactive_nodes += 1
 
-        # 解析坐标
-        try:
-            bounds_clean = bounds_str.replace("][", ",").strip("[]")
-            x1, y1, x2, y2 = map(int, bounds_clean.split(","))
+            # 解析坐标："[x1,y1][x2,y2]" 一次 findall 取出 4 个整数
+            coords = _BOUNDS_RE.findall(bounds_str)
+            if len(coords) != 4:
+                continue
+            x1, y1, x2, y2 = map(int, coords)
 
             # 过滤无效bounds（面积为0）
             if x1 == x2 or y1 == y2:
                 continue
 
+            resource_id = g("resource-id", "")
+
+            # 移除了"完全无标识但可交互就用类型作为标识"的逻辑
+            # 源项目不做这个处理，保持原样
+
             center_x = (x1 + x2) // 2
             center_y = (y1 + y2) // 2
-        except (ValueError, AttributeError):
-            continue
-
-        # 文本处理：优先text，回退到content-desc（完全对齐源项目）
-        display_text = text or content_desc or ""
-        class_short = class_name.split(".")[-1]
-
-        # 移除了"完全无标识但可交互就用类型作为标识"的逻辑
-        # 源项目不做这个处理，保持原样
-
-        elements.append(
-            UIElement(
-                resource_id=resource_id.split("/")[-1] if "/" in resource_id else resource_id,
-                text=display_text,
-                element_type=class_short,
-                bounds=bounds_str,
-                center=(center_x, center_y),
-                clickable=clickable,
-                focusable=focusable,
-                enabled=enabled,
+            if sort:
+                sort_keys.append((center_y, center_x))
+            elements.append(
+                UIElement(
+                    resource_id=resource_id.rpartition("/")[2],
+                    text=display_text,
+                    element_type=g("class", "Unknown").rpartition(".")[2],
+                    bounds=bounds_str,
+                    center=(center_x, center_y),
+                    clickable=clickable,
+                    focusable=focusable,
+                    enabled=g("enabled", "true") == "true",
+                )
             )
-        )
+    except _XML_PARSE_ERRORS as e:
+        logger.error(f"XML解析失败: {e}")
+        return []
 
     # 调试日志
     if elements:
@@ -172,8 +259,12 @@ def parse_ui_xml(xml_content: str) -> List[UIElement]:
         logger.warning(f"XML解析结果为空: 总节点={total_nodes}, 可交互={interactive_nodes}")
         logger.warning("可能原因: 1) 界面正在加载 2) 所有元素都是纯布局容器 3) dump数据异常")
 
-    elements.sort(key=lambda e: (e.center[1], e.center[0]))
-    return elements
+    if not sort:
+        return elements
+
+    # 按预先算好的坐标键做 argsort（稳定排序，不再逐个元素调用 lambda 取属性）
+    order = sorted(range(len(elements)), key=sort_keys.__getitem__)
+    return [elements[i] for i in order]
 
 
 def format_elements_for_llm(
@@ -191,44 +282,24 @@ def format_elements_for_llm(
     3. 减少JSON冗余字段
     4. 坐标归一化为0-1000相对坐标（与系统prompt一致）
     """
-    import json
-
-    # Status bar resource_id blacklist
-    status_bar_ids = {
-        "clock",
-        "date",
-        "battery",
-        "wifi",
-        "mobile",
-        "signal",
-        "battery_percentage",
-        "batteryRemainingIcon",
-        "wifi_combo",
-        "mobile_combo",
-        "status_bar",
-        "notification_icon",
-    }
 
     # Filter function
     def should_include(elem: UIElement) -> bool:
-        # Exclude status bar elements
-        elem_id_lower = elem.resource_id.lower() if elem.resource_id else ""
-        for blacklist_id in status_bar_ids:
-            if blacklist_id in elem_id_lower:
-                return False
-
+        # Cheapest checks first: a single int compare rejects most status-bar items
         # Exclude top status bar area (y < 100 pixels is usually status bar)
         if elem.center[1] < 100:
             return False
 
-        # Must be interactive or have useful text
-        is_interactive = elem.clickable or elem.focusable
-        has_useful_text = bool(elem.text and len(elem.text.strip()) > 0)
+        # Exclude status bar elements
+        if elem.resource_id and _STATUS_BAR_RE.search(elem.resource_id):
+            return False
 
-        return is_interactive or has_useful_text
+        # Must be interactive or have useful text
+        return elem.clickable or elem.focusable or bool(elem.text and elem.text.strip())
 
-    # Priority: interactive + text > interactive only > text only
-    def priority(elem: UIElement) -> int:
+    # Priority: interactive + text > interactive only > text only;
+    # ties go top-to-bottom, left-to-right, so the input does not need to be pre-sorted
+    def priority(elem: UIElement) -> tuple:
         score = 0
         if elem.clickable:
             score += 3
@@ -236,20 +307,22 @@ def format_elements_for_llm(
             score += 2
         if elem.text:
             score += 1
-        return score
+        return score, -elem.center[1], -elem.center[0]
 
-    # Filter and sort
+    # Filter and pick the top-K by priority (O(N log K))
     filtered = [e for e in elements if should_include(e)]
-    sorted_elements = sorted(filtered, key=priority, reverse=True)
-    selected = sorted_elements[:max_elements]
+    selected = heapq.nlargest(max_elements, filtered, key=priority)
 
     # Compact format output
+    # (dicts + one dumps call measured faster than hand-writing JSON per element,
+    #  since each string field would need its own escaping call)
     elements_data = []
     for elem in selected:
         # Normalize absolute pixel coords to 0-1000 relative
         # This matches the coordinate system described in the prompt
-        rel_x = int(elem.center[0] * 1000 / screen_width)
-        rel_y = int(elem.center[1] * 1000 / screen_height)
+        x, y = elem.center
+        rel_x = int(x * 1000 / screen_width)
+        rel_y = int(y * 1000 / screen_height)
         # Clamp to 0-999 range
         rel_x = max(0, min(999, rel_x))
         rel_y = max(0, min(999, rel_y))
@@ -269,9 +342,43 @@ def format_elements_for_llm(
 
         elements_data.append(item)
 
+    if ORJSON_AVAILABLE:
+        return orjson.dumps(elements_data).decode("utf-8")
     return json.dumps(elements_data, ensure_ascii=False, separators=(",", ":"))
 
 
+def format_elements_for_xml(
+    xml_content: str,
+    max_elements: int = 15,
+    screen_width: int = 1080,
+    screen_height: int = 2400,
+) -> str:
+    """
+    解析 UI XML 并格式化为 LLM JSON（parse_ui_xml + format_elements_for_llm）
+
+    结果按 XML 内容的 blake2b 摘要做 LRU 缓存（LLM_FORMAT_CACHE_SIZE 条）：
+    两次操作之间界面没变时，直接复用上一次的输出，跳过解析、过滤和序列化。
+    """
+    digest = hashlib.blake2b(xml_content.encode("utf-8"), digest_size=8).digest()
+    key = (digest, max_elements, screen_width, screen_height)
+
+    with _llm_format_cache_lock:
+        cached = _llm_format_cache.get(key)
+        if cached is not None:
+            _llm_format_cache.move_to_end(key)
+            return cached
+
+    result = format_elements_for_llm(
+        parse_ui_xml(xml_content, sort=False), max_elements, screen_width, screen_height
+    )
+
+    with _llm_format_cache_lock:
+        _llm_format_cache[key] = result
+        while len(_llm_format_cache) > LLM_FORMAT_CACHE_SIZE:
+            _llm_format_cache.popitem(last=False)
+    return result
+
+
 # 向后兼容的辅助函数
 def reset_device_strategy(device_id: Optional[str] = None):
     """重置设备的dump策略缓存"""
@@ -298,6 +405,7 @@ __all__ = [
     "get_ui_hierarchy",
     "parse_ui_xml",
     "format_elements_for_llm",
+    "format_elements_for_xml",
     "reset_device_strategy",
     "get_device_strategy",
 ]
@@ -21,13 +21,16 @@ Key features (official yadb support):
 Note: yadb does NOT support UI layout dump. Use uiautomator for that.
 """
 
-import base64
+import binascii
+import functools
 import hashlib
 import logging
+import shlex
 import subprocess
+import time
 from io import BytesIO
 from pathlib import Path
-from typing import Optional
+from typing import Dict, Optional, Tuple
 
 try:
     from PIL import Image
@@ -36,6 +39,8 @@ try:
 except ImportError:
     PIL_AVAILABLE = False
 
+from phone_agent.adb.device import get_adb_prefix, run_shell_command
+
 logger = logging.getLogger(__name__)
 
 # yadb 文件的 MD5 校验值（官方版本）
@@ -47,17 +52,43 @@ YADB_LOCAL_PATH = Path(__file__).parent.parent / "yadb" / "yadb"
 # yadb 在设备上的路径
 YADB_DEVICE_PATH = "/data/local/tmp/yadb"
 
+# yadb 入口（app_process 启动参数）
+_YADB_MAIN = (
+    "app_process",
+    f"-Djava.class.path={YADB_DEVICE_PATH}",
+    "/data/local/tmp",
+    "com.ysbing.yadb.Main",
+)
+
+# 已确认安装 yadb 的设备缓存有效期（秒），期间跳过 adb shell md5sum 检查
+YADB_INSTALLED_TTL = 300.0
+
+# (device_id, adb_host, adb_port) -> 上次确认安装的时间
+_installed: Dict[Tuple[Optional[str], Optional[str], Optional[int]], float] = {}
+
 
 def _check_md5(file_path: Path) -> str:
-    """Calculate MD5 hash of a file."""
-    if not file_path.exists():
+    """Calculate MD5 hash of a file (cached until the file changes)."""
+    try:
+        stat = file_path.stat()
+    except OSError:
         return ""
 
-    md5_hash = hashlib.md5()
-    with open(file_path, "rb") as f:
-        for chunk in iter(lambda: f.read(4096), b""):
+    return _cached_local_md5(str(file_path), stat.st_mtime_ns, stat.st_size)
+
+
+@functools.lru_cache(maxsize=8)
+def _cached_local_md5(path: str, mtime_ns: int, size: int) -> str:
+    """MD5 of a local file, keyed by (path, mtime, size) so edits invalidate the entry."""
+    with open(path, "rb") as f:
+        # Python 3.11+: 读取与 update 循环在 C 层完成
+        if hasattr(hashlib, "file_digest"):
+            return hashlib.file_digest(f, "md5").hexdigest()
+
+        md5_hash = hashlib.md5()
+        for chunk in iter(lambda: f.read(1 << 20), b""):
             md5_hash.update(chunk)
-    return md5_hash.hexdigest()
+        return md5_hash.hexdigest()
 
 
 def _build_adb_cmd(device_id: str = None, adb_host: str = None, adb_port: int = None) -> list:
@@ -70,18 +101,36 @@ def _build_adb_cmd(device_id: str = None, adb_host: str = None, adb_port: int =
         adb_port: ADB server port (for FRP tunneling)
 
     Returns:
-        ADB command prefix list
+        ADB command prefix list (same as device.get_adb_prefix, so the shell session is shared)
+
+    Raises:
+        ValueError: If device_id has an invalid format.
+    """
+    return list(get_adb_prefix(device_id, adb_host, adb_port))
+
+
+def _run_yadb(
+    args: list,
+    device_id: str = None,
+    adb_host: str = None,
+    adb_port: int = None,
+    timeout: float = 10,
+) -> Tuple[int, str]:
     """
-    cmd = ["adb"]
+    Run a text-output yadb command over the device's persistent adb shell.
+
+    The command line is joined with spaces exactly like `adb shell a b c` does,
+    so callers keep their existing escaping. Falls back to a one-shot
+    `adb shell` when the persistent session is unavailable.
 
-    # FRP 隧道模式（优先）
-    if adb_host and adb_port:
-        cmd.extend(["-H", adb_host, "-P", str(adb_port)])
-    # 直接连接模式
-    elif device_id:
-        cmd.extend(["-s", device_id])
+    Returns:
+        (exit_code, combined stdout/stderr)
 
-    return cmd
+    Raises:
+        subprocess.TimeoutExpired: If the command does not finish in time.
+    """
+    adb_prefix = tuple(_build_adb_cmd(device_id, adb_host, adb_port))
+    return run_shell_command(adb_prefix, " ".join([*_YADB_MAIN, *args]), timeout)
 
 
 def is_yadb_installed(device_id: str = None, adb_host: str = None, adb_port: int = None) -> bool:
@@ -96,15 +145,13 @@ def is_yadb_installed(device_id: str = None, adb_host: str = None, adb_port: int
     Returns:
         True if yadb is installed and has correct MD5, False otherwise.
     """
-    cmd = _build_adb_cmd(device_id, adb_host, adb_port)
+    adb_prefix = tuple(_build_adb_cmd(device_id, adb_host, adb_port))
 
     try:
-        # 检查 MD5
-        result = subprocess.run(
-            cmd + ["shell", "md5sum", YADB_DEVICE_PATH], capture_output=True, text=True, timeout=10
-        )
+        # 检查 MD5（走常驻 adb shell，不再单独 fork 一个 adb 进程）
+        _, output = run_shell_command(adb_prefix, f"md5sum {YADB_DEVICE_PATH}", 10)
 
-        return YADB_MD5 in result.stdout
+        return YADB_MD5 in output
 
     except Exception as e:
         logger.debug(f"yadb check failed: {e}")
@@ -172,6 +219,9 @@ def ensure_yadb_ready(device_id: str = None, adb_host: str = None, adb_port: int
     """
     Ensure yadb is installed and ready to use.
 
+    A successful check is remembered per device for YADB_INSTALLED_TTL seconds,
+    so consecutive yadb operations skip the remote md5sum round-trip.
+
     Args:
         device_id: Device serial number
         adb_host: ADB server host (for FRP tunneling)
@@ -180,12 +230,33 @@ def ensure_yadb_ready(device_id: str = None, adb_host: str = None, adb_port: int
     Returns:
         True if yadb is ready, False otherwise.
     """
+    key = (device_id, adb_host, adb_port)
+    checked_at = _installed.get(key)
+    if checked_at is not None and time.monotonic() - checked_at < YADB_INSTALLED_TTL:
+        return True
+
+    # 非法 device_id 不进入常驻 shell
+    try:
+        _build_adb_cmd(device_id, adb_host, adb_port)
+    except ValueError as e:
+        logger.error(f"yadb not ready: {e}")
+        return False
+
     if is_yadb_installed(device_id, adb_host, adb_port):
         logger.debug("yadb already installed")
-        return True
+        ready = True
+    else:
+        logger.info("yadb not found, installing...")
+        ready = install_yadb(device_id, adb_host, adb_port)
+
+    if ready:
+        _installed[key] = time.monotonic()
+    return ready
 
-    logger.info("yadb not found, installing...")
-    return install_yadb(device_id, adb_host, adb_port)
+
+def invalidate_yadb_cache(device_id: str = None, adb_host: str = None, adb_port: int = None):
+    """Forget that yadb is installed on a device (re-checked on next use)."""
+    _installed.pop((device_id, adb_host, adb_port), None)
 
 
 def type_text(text: str, device_id: str = None, adb_host: str = None, adb_port: int = None) -> bool:
@@ -210,32 +281,18 @@ def type_text(text: str, device_id: str = None, adb_host: str = None, adb_port:
         logger.error("yadb not ready")
         return False
 
-    cmd = _build_adb_cmd(device_id, adb_host, adb_port)
-
-    # 预处理文本：空格需要转义
-    processed_text = text.replace(" ", "\\ ")
-
-    # 构建 yadb 命令
-    cmd.extend(
-        [
-            "shell",
-            "app_process",
-            "-Djava.class.path=/data/local/tmp/yadb",
-            "/data/local/tmp",
-            "com.ysbing.yadb.Main",
-            "-keyboard",
-            processed_text,
-        ]
-    )
+    # 预处理文本：整体加引号交给设备端 shell（空格、引号、&、; 等都能原样输入）
+    processed_text = shlex.quote(text)
 
     try:
-        result = subprocess.run(cmd, capture_output=True, text=True, timeout=10)
+        returncode, output = _run_yadb(["-keyboard", processed_text], device_id, adb_host, adb_port)
 
-        if result.returncode == 0:
+        if returncode == 0:
             logger.debug(f"Typed text via yadb: {text[:50]}...")
             return True
         else:
-            logger.error(f"yadb type_text failed: {result.stderr}")
+            logger.error(f"yadb type_text failed: {output}")
+            invalidate_yadb_cache(device_id, adb_host, adb_port)
             return False
 
     except subprocess.TimeoutExpired:
@@ -281,17 +338,8 @@ def force_screenshot(
 
     cmd = _build_adb_cmd(device_id, adb_host, adb_port)
 
-    # 构建 yadb 截图命令
-    cmd.extend(
-        [
-            "shell",
-            "app_process",
-            "-Djava.class.path=/data/local/tmp/yadb",
-            "/data/local/tmp",
-            "com.ysbing.yadb.Main",
-            "-screenshot",
-        ]
-    )
+    # 构建 yadb 截图命令（exec-out：不分配 pty，二进制输出不做换行转换）
+    cmd.extend(["exec-out", *_YADB_MAIN, "-screenshot"])
 
     try:
         logger.debug("Executing yadb force screenshot...")
@@ -301,6 +349,7 @@ def force_screenshot(
             logger.error(
                 f"yadb screenshot failed: {result.stderr.decode('utf-8', errors='ignore')}"
             )
+            invalidate_yadb_cache(device_id, adb_host, adb_port)
             return None
 
         # PNG 数据直接从 stdout 输出
@@ -336,22 +385,28 @@ def force_screenshot_base64(
     adb_host: str = None,
     adb_port: int = None,
     include_dimensions: bool = False,
+    image_format: str = "png",
 ) -> Optional[str | dict]:
     """
     Capture screenshot using yadb and return base64 encoded data.
 
     This is a convenience wrapper around force_screenshot() that returns
-    base64 data ready for API responses or AI vision models.
+    base64 data ready for API responses or AI vision models. Callers that
+    can send raw bytes (file writes, binary HTTP bodies) should use
+    force_screenshot() directly and skip the base64 step.
 
     Args:
         device_id: Device serial number
         adb_host: ADB server host (for FRP tunneling)
         adb_port: ADB server port (for FRP tunneling)
         include_dimensions: If True, returns dict with base64 + width/height
+        image_format: "png" (default), "webp" or "jpeg". Vision models accept
+            WEBP/JPEG equally well and the payload is several times smaller;
+            falls back to PNG when PIL is unavailable or re-encoding fails.
 
     Returns:
         Base64 string if include_dimensions=False
-        Dict with {base64_data, width, height} if include_dimensions=True
+        Dict with {base64_data, width, height, format} if include_dimensions=True
         None if screenshot failed
 
     Example:
@@ -362,45 +417,68 @@ def force_screenshot_base64(
         >>> # With dimensions
         >>> data = force_screenshot_base64(device_id="device_6100", include_dimensions=True)
         >>> print(f"Size: {data['width']}x{data['height']}")
+
+        >>> # Smaller payload for LLM upload
+        >>> b64 = force_screenshot_base64(device_id="device_6100", image_format="webp")
     """
-    result = force_screenshot(
-        device_id, adb_host, adb_port, return_pil=PIL_AVAILABLE and include_dimensions
-    )
+    png_data = force_screenshot(device_id, adb_host, adb_port)
 
-    if result is None:
+    if png_data is None:
         return None
 
-    # 处理返回值
-    if isinstance(result, tuple):
-        png_data, img = result
-        base64_data = base64.b64encode(png_data).decode("utf-8")
-
-        if include_dimensions:
-            return {
-                "base64_data": base64_data,
-                "width": img.width,
-                "height": img.height,
-                "is_sensitive": False,  # yadb 绕过了限制
-            }
+    image_data, image_format = _encode_image(png_data, image_format)
+    base64_data = binascii.b2a_base64(image_data, newline=False).decode("ascii")
+    if not include_dimensions:
         return base64_data
-    else:
-        # 只有 bytes
-        base64_data = base64.b64encode(result).decode("utf-8")
 
-        if include_dimensions and PIL_AVAILABLE:
-            try:
-                img = Image.open(BytesIO(result))
-                return {
-                    "base64_data": base64_data,
-                    "width": img.width,
-                    "height": img.height,
-                    "is_sensitive": False,
-                }
-            except Exception:
-                pass
+    # 宽高直接读取 PNG 的 IHDR 头，无需 PIL 解码整张图片
+    from phone_agent.adb.screenshot import _png_size
 
+    size = _png_size(png_data)
+    if size is None and PIL_AVAILABLE:
+        try:
+            size = Image.open(BytesIO(png_data)).size
+        except Exception:
+            pass
+
+    if size is None:
         return base64_data
 
+    width, height = size
+    return {
+        "base64_data": base64_data,
+        "width": width,
+        "height": height,
+        "format": image_format,
+        "is_sensitive": False,  # yadb 绕过了限制
+    }
+
+
+def _encode_image(png_data: bytes, image_format: str) -> Tuple[bytes, str]:
+    """
+    Re-encode a PNG screenshot as WEBP/JPEG.
+
+    Returns:
+        (image bytes, actual format); the original PNG when no re-encoding applies.
+    """
+    image_format = image_format.lower()
+    if image_format == "jpg":
+        image_format = "jpeg"
+    if image_format not in ("webp", "jpeg") or not PIL_AVAILABLE:
+        return png_data, "png"
+
+    try:
+        img = Image.open(BytesIO(png_data))
+        out = BytesIO()
+        if image_format == "webp":
+            img.save(out, "WEBP", quality=80, method=4)
+        else:
+            img.convert("RGB").save(out, "JPEG", quality=85)
+        return out.getvalue(), image_format
+    except Exception as e:
+        logger.warning(f"Failed to encode screenshot as {image_format}: {e}, using PNG")
+        return png_data, "png"
+
 
 def long_press(
     x: int,
@@ -427,25 +505,14 @@ def long_press(
     if not ensure_yadb_ready(device_id, adb_host, adb_port):
         return False
 
-    cmd = _build_adb_cmd(device_id, adb_host, adb_port)
-
-    cmd.extend(
-        [
-            "shell",
-            "app_process",
-            "-Djava.class.path=/data/local/tmp/yadb",
-            "/data/local/tmp",
-            "com.ysbing.yadb.Main",
-            "-touch",
-            str(x),
-            str(y),
-            str(duration_ms),
-        ]
-    )
-
     try:
-        result = subprocess.run(cmd, capture_output=True, text=True, timeout=10)
-        return result.returncode == 0
+        returncode, _ = _run_yadb(
+            ["-touch", str(x), str(y), str(duration_ms)], device_id, adb_host, adb_port
+        )
+        if returncode != 0:
+            invalidate_yadb_cache(device_id, adb_host, adb_port)
+            return False
+        return True
     except Exception as e:
         logger.error(f"yadb long_press error: {e}")
         return False
@@ -468,23 +535,14 @@ def read_clipboard(
     if not ensure_yadb_ready(device_id, adb_host, adb_port):
         return None
 
-    cmd = _build_adb_cmd(device_id, adb_host, adb_port)
-
-    cmd.extend(
-        [
-            "shell",
-            "app_process",
-            "-Djava.class.path=/data/local/tmp/yadb",
-            "/data/local/tmp",
-            "com.ysbing.yadb.Main",
-            "-readClipboard",
-        ]
-    )
-
     try:
-        result = subprocess.run(cmd, capture_output=True, text=True, timeout=10)
-        if result.returncode == 0:
-            return result.stdout.strip()
+        # stderr 丢弃，避免 app_process 的日志混进剪贴板内容
+        returncode, output = _run_yadb(
+            ["-readClipboard", "2>/dev/null"], device_id, adb_host, adb_port
+        )
+        if returncode == 0:
+            return output.strip()
+        invalidate_yadb_cache(device_id, adb_host, adb_port)
         return None
     except Exception as e:
         logger.error(f"yadb read_clipboard error: {e}")
@@ -509,23 +567,15 @@ def write_clipboard(
     if not ensure_yadb_ready(device_id, adb_host, adb_port):
         return False
 
-    cmd = _build_adb_cmd(device_id, adb_host, adb_port)
-
-    cmd.extend(
-        [
-            "shell",
-            "app_process",
-            "-Djava.class.path=/data/local/tmp/yadb",
-            "/data/local/tmp",
-            "com.ysbing.yadb.Main",
-            "-writeClipboard",
-            text,
-        ]
-    )
-
+    # 与 type_text 相同：整体加引号，避免未闭合的引号吞掉持久 shell 的结束标记
     try:
-        result = subprocess.run(cmd, capture_output=True, text=True, timeout=10)
-        return result.returncode == 0
+        returncode, _ = _run_yadb(
+            ["-writeClipboard", shlex.quote(text)], device_id, adb_host, adb_port
+        )
+        if returncode != 0:
+            invalidate_yadb_cache(device_id, adb_host, adb_port)
+            return False
+        return True
     except Exception as e:
         logger.error(f"yadb write_clipboard error: {e}")
         return False
@@ -7,10 +7,15 @@
 
 import asyncio
 import base64
+import functools
+import hashlib
 import io
 import json
 import logging
-import traceback
+import os
+import threading
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
 from dataclasses import dataclass
 from typing import Any, Callable
 
@@ -20,14 +25,141 @@ from phone_agent.actions import ActionHandler
 from phone_agent.actions.handler import parse_action, submit_result
 from phone_agent.adb import get_current_app, get_screenshot
 from phone_agent.adb.device import get_physical_screen_size
+from phone_agent.adb.screenshot import Screenshot, _png_size
+from phone_agent.adb.xml_tree import format_elements_for_llm, get_ui_hierarchy
 from phone_agent.config import SYSTEM_PROMPT
 from phone_agent.model import ModelClient, ModelConfig
 from phone_agent.model.client import MessageBuilder
 from phone_agent.utils.stabilizer import wait_for_ui_stabilization
 
+# 可选依赖：pybase64（SIMD 加速的 base64，用于历史截图压缩）
+try:
+    import pybase64
+
+    PYBASE64_AVAILABLE = True
+except ImportError:
+    PYBASE64_AVAILABLE = False
+
+# 可选依赖：orjson（更快的 JSON 序列化，用于步骤回调）
+try:
+    import orjson
+
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
 logger = logging.getLogger(__name__)
 
 
+def _b64decode(data: str) -> bytes:
+    """Decode base64 (pybase64 when installed)."""
+    if PYBASE64_AVAILABLE:
+        return pybase64.b64decode(data, validate=False)
+    return base64.b64decode(data)
+
+
+def _b64encode(data: bytes | memoryview) -> str:
+    """Encode a bytes-like object as a base64 str (pybase64 when installed)."""
+    if PYBASE64_AVAILABLE:
+        return pybase64.b64encode_as_string(data)
+    return base64.b64encode(data).decode("ascii")
+
+
+def _dumps(obj: Any) -> str:
+    """Serialize to a compact JSON str keeping non-ASCII text (orjson when installed)."""
+    if ORJSON_AVAILABLE:
+        return orjson.dumps(obj).decode("utf-8")
+    return json.dumps(obj, ensure_ascii=False, separators=(",", ":"))
+
+
+@functools.lru_cache(maxsize=8)
+def _render_apps_prompt(apps: tuple[tuple[str, str], ...]) -> str:
+    """Render the "Installed Apps" system prompt section for (name, package) pairs."""
+    # 同一设备的应用列表在多个 Agent 间相同，渲染结果按内容缓存
+    apps_info = "\n".join([f"- {name} ({package})" for name, package in apps])
+    return f"\n\n## Installed Apps\nThe following apps are installed on the device. You can launch them using `open_app(app_name)`:\n{apps_info}\n"
+
+
+# 步骤开始通知（内容固定，只序列化一次）
+_START_INFO_JSON = json.dumps({"thinking": "", "action": "Thinking..."}, ensure_ascii=False)
+
+# 每步用户消息中的固定段落
+_MEMORY_HEADER = "** 🧠 Persistent Memory (Update with UpdateMemory) **\n"
+_LAST_ACTION_HEADER = "** Last Action Result **\n"
+_INTERVENTION_HEADER = (
+    "** [USER INTERVENTION] **\nℹ️ The user has provided additional information/instruction:\n"
+)
+_INTERVENTION_FOOTER = "\nPlease incorporate this into your planning immediately.\n\n"
+_SCREEN_INFO_HEADER = "** Screen Info **\n\n"
+
+
+def _strip_ui_elements(text: str) -> str:
+    """Remove the trailing UI Elements section from a user message text."""
+    # "UI Elements:" 段总在消息末尾，直接按字面量截断，不需要正则
+    i = text.find("\n\nUI Elements:\n")
+    return text if i == -1 else text[:i]
+
+
+# 历史截图的最大边长
+_HISTORY_MAX_DIMENSION = 512
+
+
+def _is_small_png(png_head: bytes) -> bool:
+    """Whether a PNG (given at least its first 24 bytes) already fits the history size."""
+    size = _png_size(png_head)
+    return size is not None and max(size) <= _HISTORY_MAX_DIMENSION
+
+
+def _image_key(base64_data: str) -> bytes:
+    """Digest identifying a screenshot in the history compression caches."""
+    return hashlib.blake2b(base64_data.encode("ascii"), digest_size=16).digest()
+
+
+def _compress_image(image: str | bytes) -> str:
+    """Re-encode a PNG screenshot (base64 str or raw bytes) as a <=512px JPEG data URI."""
+    image_bytes = _b64decode(image) if isinstance(image, str) else image
+
+    # 加载并处理
+    img = Image.open(io.BytesIO(image_bytes))
+    # JPEG 源图可在解码阶段直接按 1/2~1/8 缩小（PNG 不支持，此调用无副作用）
+    max_dimension = _HISTORY_MAX_DIMENSION
+    img.draft("RGB", (max_dimension, max_dimension))
+
+    # 调整大小：最大边长 512px
+    # 缩小 4 倍以上时 BOX（区域平均）与 LANCZOS 观感相近，开销约为后者一半
+    if max(img.size) > max_dimension:
+        img.thumbnail((max_dimension, max_dimension), Image.Resampling.BOX)
+
+    # 转为 JPEG 格式以进一步压缩体积 (Quality=50, 4:2:0 色度抽样, 单遍 Huffman)
+    buffer = io.BytesIO()
+    # 转换为 RGB (JPEG 不支持 RGBA)
+    if img.mode in ("RGBA", "P"):
+        img = img.convert("RGB")
+    img.save(buffer, format="JPEG", quality=50, subsampling=2, optimize=False)
+
+    # 直接编码缓冲区视图，省去 getvalue() 的一次整图拷贝
+    with buffer.getbuffer() as view:
+        return f"data:image/jpeg;base64,{_b64encode(view)}"
+
+
+# 后台线程池（延迟创建，所有 Agent 共享）：历史截图压缩、UI 层级获取
+_worker_pool: ThreadPoolExecutor | None = None
+_worker_pool_lock = threading.Lock()
+
+
+def _get_worker_pool() -> ThreadPoolExecutor:
+    """Return the shared thread pool for history compression and UI hierarchy fetches."""
+    global _worker_pool
+
+    if _worker_pool is None:
+        with _worker_pool_lock:
+            if _worker_pool is None:
+                _worker_pool = ThreadPoolExecutor(
+                    max_workers=min(8, (os.cpu_count() or 1) + 4), thread_name_prefix="phone-agent"
+                )
+    return _worker_pool
+
+
 @dataclass
 class AgentConfig:
     """Configuration for the PhoneAgent."""
@@ -92,11 +224,11 @@ class PhoneAgent:
 
         # 如果提供了已安装应用列表，注入到系统提示词中
         if installed_apps:
-            apps_info = "\n".join([f"- {app['name']} ({app['package']})" for app in installed_apps])
-            apps_prompt = f"\n\n## Installed Apps\nThe following apps are installed on the device. You can launch them using `open_app(app_name)`:\n{apps_info}\n"
             # 只有当系统提示词中尚未包含时才添加
             if "## Installed Apps" not in self.agent_config.system_prompt:
-                self.agent_config.system_prompt += apps_prompt
+                self.agent_config.system_prompt += _render_apps_prompt(
+                    tuple((app["name"], app["package"]) for app in installed_apps)
+                )
 
         self.model_client = ModelClient(self.model_config)
         self.action_handler = ActionHandler(
@@ -110,6 +242,21 @@ class PhoneAgent:
         self._scratchpad: str = ""  # 🧠 Persistent Memory
         self._last_action_result: str | None = None  # 上一步操作结果
         self._pending_intervention: str | None = None  # 待处理的用户干预
+        # 历史截图压缩结果缓存：原图 base64 的 blake2b 摘要 -> 压缩后的 data URI（FIFO）
+        self._compress_cache: dict[bytes, str] = {}
+        # 当前截图的后台预压缩任务：下一步它成为历史图片时直接取结果
+        self._compress_futures: dict[bytes, Future] = {}
+        # 已处理过压缩的历史消息下标（上下文只追加，下标稳定；标记不写进消息，避免发给模型）
+        self._compressed_indices: set[int] = set()
+        # 仍带图片的用户消息下标（按顺序，追加消息时维护）
+        self._image_msg_indices: deque[int] = deque()
+        # 上下文版本号：每次追加或替换 self._context 中的消息时加一
+        self._context_version = 0
+        # context 属性返回的只读快照及其对应的版本号
+        self._context_snapshot: tuple[dict[str, Any], ...] = ()
+        self._context_snapshot_version = -1
+        # 已清理 UI Elements 的上下文边界（该下标之前的历史用户消息都已清理）
+        self._xml_strip_start = 0
 
         # 新增：步骤回调支持
         from phone_agent.kernel.callback import NoOpCallback
@@ -127,12 +274,12 @@ class PhoneAgent:
         onto that loop using :func:`asyncio.to_thread` to avoid blocking.
         Otherwise, the work is executed synchronously in the current thread.
         Returns an asyncio.Task when scheduled on a loop, or ``None`` when
-        executed synchronously.
+        executed synchronously or when there is nothing new to compress.
         """
-        if not image_indices:
-            return None
-
         if loop and loop.is_running():
+            # 只有最新一张图，或历史图片都已处理过：不创建任务、不切换线程
+            if all(idx in self._compressed_indices for idx in image_indices[:-1]):
+                return None
             return loop.create_task(
                 asyncio.to_thread(self._compress_history_images_sync, image_indices)
             )
@@ -146,101 +293,187 @@ class PhoneAgent:
         # 历史图片仅用于提供上下文（"之前在什么界面"），不需要高清细节
         history_indices = image_indices[:-1]
 
+        # 原图摘要 -> 需要更新的 (下标, image_url 字典)；同一张图只压缩一次
+        pending: dict[bytes, list[tuple[int, dict]]] = {}
+        payloads: dict[bytes, str] = {}
+
+        # 循环内反复用到的属性/方法绑定为局部变量
+        context = self._context
+        compressed_indices = self._compressed_indices
+        cached_url = self._compress_cache.get
+
         for idx in history_indices:
+            # 每条历史消息只处理一次，之后的步骤直接跳过
+            if idx in compressed_indices:
+                continue
+            compressed_indices.add(idx)
+
             try:
-                msg = self._context[idx]
-                if not isinstance(msg.get("content"), list):
+                content = context[idx].get("content")
+                if not isinstance(content, list):
                     continue
 
-                for item in msg["content"]:
-                    if item.get("type") == "image_url":
-                        image_url = item["image_url"]["url"]
-                        # 只处理 PNG 格式或者尚未标记为压缩的图片
-                        # 这里简单通过检测是否包含 "image/png" 来判断是否是原始高清图
-                        if "data:image/png" in image_url:
-                            # 提取 base64
-                            try:
-                                base64_data = image_url.split("base64,")[1]
-                                # 🛡️ 防御性检查
-                                if (
-                                    not base64_data
-                                    or base64_data == "None"
-                                    or len(base64_data) < 100
-                                ):
-                                    logger.warning(
-                                        f"Skipping compression for invalid image data at index {idx}"
-                                    )
-                                    continue
-
-                                image_bytes = base64.b64decode(base64_data)
-
-                                # 加载并处理
-                                img = Image.open(io.BytesIO(image_bytes))
-
-                                # 调整大小：最大边长 512px
-                                max_dimension = 512
-                                if max(img.size) > max_dimension:
-                                    img.thumbnail(
-                                        (max_dimension, max_dimension), Image.Resampling.LANCZOS
-                                    )
-
-                                # 转为 JPEG 格式以进一步压缩体积 (Quality=70)
-                                buffer = io.BytesIO()
-                                # 转换为 RGB (JPEG 不支持 RGBA)
-                                if img.mode in ("RGBA", "P"):
-                                    img = img.convert("RGB")
-                                img.save(buffer, format="JPEG", quality=70)
-
-                                new_base64 = base64.b64encode(buffer.getvalue()).decode("utf-8")
-
-                                # 更新消息内容
-                                item["image_url"]["url"] = f"data:image/jpeg;base64,{new_base64}"
-                                logger.info(
-                                    f"Using Smart Compression for history image at index {idx}"
-                                )
-                            except Exception as e:
-                                logger.warning(
-                                    f"Error during image compression at index {idx}: {e}"
-                                )
-                                continue
+                for item in content:
+                    if item.get("type") != "image_url":
+                        continue
+                    image_url = item["image_url"]
+                    url = image_url["url"]
+                    # 只处理 PNG 格式或者尚未标记为压缩的图片
+                    # data URI 以 MIME 类型开头，前缀判断即可，无需扫描整段 base64
+                    if not url.startswith("data:image/png"):
+                        continue
+
+                    # 提取 base64
+                    base64_data = url.partition("base64,")[2]
+                    # 🛡️ 防御性检查
+                    if not base64_data or base64_data == "None" or len(base64_data) < 100:
+                        logger.warning(
+                            f"Skipping compression for invalid image data at index {idx}"
+                        )
+                        continue
+
+                    # 原图本身不超过 512px（低分辨率设备）：不解码、不重编码
+                    # 前 32 个 base64 字符即 PNG 头部 24 字节，足以读出 IHDR 中的宽高
+                    if _is_small_png(_b64decode(base64_data[:32])):
+                        continue
+
+                    # 同一张原图（如回到同一界面）直接复用上次的压缩结果
+                    cache_key = _image_key(base64_data)
+                    new_url = cached_url(cache_key)
+                    if new_url is not None:
+                        image_url["url"] = new_url
+                        continue
+
+                    pending.setdefault(cache_key, []).append((idx, image_url))
+                    payloads[cache_key] = base64_data
             except Exception as e:
                 logger.warning(f"Failed to compress history image at index {idx}: {e}")
 
+        if not payloads:
+            return
+
+        # 多张图片时并行压缩（解码/缩放/编码都在 C 代码中释放 GIL）
+        keys = list(payloads)
+        # 截图入上下文时已在后台预压缩的，直接取结果
+        futures: dict[bytes, Future] = {}
+        for key in keys:
+            future = self._compress_futures.pop(key, None)
+            if future is not None and not future.cancelled():
+                futures[key] = future
+        if len(keys) > 1:
+            pool = _get_worker_pool()
+            for key in keys:
+                if key not in futures:
+                    futures[key] = pool.submit(_compress_image, payloads[key])
+
+        for key in keys:
+            targets = pending[key]
+            future = futures.get(key)
+            try:
+                new_url = future.result() if future else _compress_image(payloads[key])
+            except Exception as e:
+                logger.warning(f"Error during image compression at index {targets[0][0]}: {e}")
+                continue
+
+            # 更新消息内容
+            for idx, image_url in targets:
+                image_url["url"] = new_url
+                logger.info(f"Using Smart Compression for history image at index {idx}")
+            self._remember_compressed(key, new_url)
+
+    def _prefetch_compressed(self, base64_data: str, png_bytes: bytes | None = None) -> None:
+        """
+        Start compressing the current screenshot in the background for its history copy.
+
+        Pass the screenshot's raw PNG bytes when available to skip decoding base64_data.
+        """
+        if self.agent_config.max_history_images <= 0:
+            return  # 不保留历史图片，无需压缩
+        if png_bytes and _is_small_png(png_bytes):
+            return  # 原图已足够小，成为历史图片时也不会压缩
+
+        key = _image_key(base64_data)
+        futures = self._compress_futures
+        if key in self._compress_cache or key in futures:
+            return
+
+        source = png_bytes if png_bytes else base64_data
+        futures[key] = _get_worker_pool().submit(_compress_image, source)
+        # 被整体移除（未经压缩）的图片留下的任务按 FIFO 丢弃
+        while len(futures) > self.agent_config.max_history_images + 1:
+            stale = futures.pop(next(iter(futures)), None)
+            if stale is not None:
+                stale.cancel()
+
+    def _remember_compressed(self, key: bytes, url: str) -> None:
+        """Store a compressed history image, evicting the oldest beyond the history size."""
+        cache = self._compress_cache
+        cache[key] = url
+        limit = self.agent_config.max_history_images + 4
+        while len(cache) > limit:
+            cache.pop(next(iter(cache)), None)
+
+    def _log_tracebacks(self) -> bool:
+        """Whether step errors should log full tracebacks (verbose mode at DEBUG level)."""
+        # 只有 DEBUG 级别生效时才格式化 traceback，避免错误路径上的无谓开销
+        return self.agent_config.verbose and logger.isEnabledFor(logging.DEBUG)
+
+    def _build_system_message(self) -> dict[str, Any]:
+        """System message: the system prompt followed by the persistent memory, if any."""
+        prompt = self.agent_config.system_prompt
+        if self._scratchpad:
+            # 🧠 如果有记忆，注入到系统提示词末尾
+            prompt = f"{prompt}\n\n{_MEMORY_HEADER}{self._scratchpad}"
+        return MessageBuilder.create_system_message(prompt)
+
+    def _fetch_ui_elements(self, screenshot: Screenshot | None) -> str:
+        """Fetch the UI hierarchy and format it for the model ("" on failure)."""
+        try:
+            # format_elements_for_llm picks its own order, skip the Y-sort
+            elements = get_ui_hierarchy(self.agent_config.device_id, sort=False)
+            # Pass screen dimensions for coordinate normalization
+            screen_w = screenshot.width if screenshot else 1080
+            screen_h = screenshot.height if screenshot else 2400
+            return format_elements_for_llm(elements, screen_width=screen_w, screen_height=screen_h)
+        except Exception as e:
+            logger.warning(f"Failed to get UI hierarchy: {e}")
+            return ""
+
     def _strip_xml_from_history(self):
         """
         Strip UI Elements data from historical user messages to save tokens.
         Only the most recent user message should contain UI Elements.
         """
-        import re
+        # If history XML is enabled, do NOT strip
+        if self.agent_config.enable_history_xml:
+            return
 
         # Find all user messages except the last one
-        user_msg_indices = [i for i, msg in enumerate(self._context) if msg.get("role") == "user"]
+        # 上一次的最新用户消息之前的部分都已清理过，只扫描其后新增的消息
+        context = self._context
+        user_msg_indices = [
+            i
+            for i in range(self._xml_strip_start, len(context))
+            if context[i].get("role") == "user"
+        ]
 
         if len(user_msg_indices) <= 1:
             return  # No history to strip
 
-        # If history XML is enabled, do NOT strip
-        if self.agent_config.enable_history_xml:
-            return
-
-        def strip_ui_elements(text: str) -> str:
-            """Remove UI Elements section from text."""
-            # Match "UI Elements:" followed by everything until end or next section
-            cleaned = re.sub(r"\n\nUI Elements:\n.*$", "", text, flags=re.DOTALL)
-            return cleaned
-
         # Strip UI Elements from all but the last user message
         for idx in user_msg_indices[:-1]:
-            msg = self._context[idx]
+            msg = context[idx]
             content = msg.get("content")
 
             if isinstance(content, list):
                 # Multi-part message (text + image)
                 for item in content:
                     if item.get("type") == "text":
-                        item["text"] = strip_ui_elements(item.get("text", ""))
+                        item["text"] = _strip_ui_elements(item.get("text", ""))
             elif isinstance(content, str):
-                self._context[idx]["content"] = strip_ui_elements(content)
+                msg["content"] = _strip_ui_elements(content)
+
+        self._xml_strip_start = user_msg_indices[-1]
 
     def run(self, task: str) -> str:
         """
@@ -252,8 +485,7 @@ class PhoneAgent:
         Returns:
             Final message from the agent.
         """
-        self._context = []
-        self._step_count = 0
+        self.reset()
 
         # First step with user prompt
         result = self._execute_step(task, is_first=True)
@@ -270,6 +502,30 @@ class PhoneAgent:
 
         return "Max steps reached"
 
+    async def arun(self, task: str) -> str:
+        """
+        Async variant of :meth:`run`.
+
+        Each step runs in a worker thread (ADB and the model client are blocking),
+        so the event loop stays free and several agents can run concurrently.
+
+        Args:
+            task: Natural language description of the task.
+
+        Returns:
+            Final message from the agent.
+        """
+        self.reset()
+
+        result = await asyncio.to_thread(self._execute_step, task, True)
+
+        while not result.finished and self._step_count < self.agent_config.max_steps:
+            result = await asyncio.to_thread(self._execute_step, None, False)
+
+        if result.finished:
+            return result.message or "Task completed"
+        return "Max steps reached"
+
     def step(self, task: str | None = None) -> StepResult:
         """
         Execute a single step of the agent.
@@ -292,6 +548,10 @@ class PhoneAgent:
     def reset(self) -> None:
         """Reset the agent state for a new task."""
         self._context = []
+        self._context_version += 1
+        self._compressed_indices.clear()
+        self._image_msg_indices.clear()
+        self._xml_strip_start = 0
         self._step_count = 0
 
     def inject_comment(self, comment: str) -> bool:
@@ -324,17 +584,22 @@ class PhoneAgent:
         # on_step_start 会在 LLM 响应后、执行动作前调用
 
         # Capture current screen state (with stabilization)
-        # Capture current screen state (with stabilization)
+        ui_future: Future | None = None
         try:
             if self.agent_config.enable_stabilization:
                 screenshot = wait_for_ui_stabilization(self.agent_config.device_id)
             else:
                 screenshot = get_screenshot(self.agent_config.device_id)
+            # UI 层级（uiautomator dump，通常是本步最慢的 ADB 调用）在截图稳定后于后台获取，
+            # 与前台应用查询、截图编码并行
+            if self.agent_config.enable_xml_hierarchy:
+                ui_future = _get_worker_pool().submit(self._fetch_ui_elements, screenshot)
             current_app = get_current_app(self.agent_config.device_id)
         except Exception as e:
-            logger.error(f"Failed to capture screenshot or get app info: {e}")
-            if self.agent_config.verbose:
-                traceback.print_exc()
+            logger.error(
+                f"Failed to capture screenshot or get app info: {e}",
+                exc_info=self._log_tracebacks(),
+            )
             return StepResult(
                 success=False,
                 finished=True,
@@ -343,97 +608,52 @@ class PhoneAgent:
                 message=f"System error: Failed to capture screen. {e}",
             )
 
-        # 🛡️ 数据完整性检查
-        if (
-            not screenshot.base64_data
-            or screenshot.base64_data == "None"
-            or screenshot.base64_data.strip() == "None"
-        ):
-            logger.error(
-                f"Invalid screenshot data detected! len={len(screenshot.base64_data) if screenshot.base64_data else 'None'}"
-            )
-            # 强制修正为 None，避免后续流程报错
-            screenshot.base64_data = None
+        # 🛡️ 数据完整性检查（Screenshot 不可变，空截图时用 None 代替图片数据）
+        screenshot_base64 = screenshot.base64_data if screenshot.png_bytes else None
+        if screenshot_base64 is None:
+            logger.error("Invalid screenshot data detected! PNG data is empty")
 
         # Get UI Hierarchy (XML) - Optional but recommended
-        ui_elements_str = ""
-        if self.agent_config.enable_xml_hierarchy:
-            try:
-                from phone_agent.adb.xml_tree import format_elements_for_llm, get_ui_hierarchy
-
-                elements = get_ui_hierarchy(self.agent_config.device_id)
-                # Pass screen dimensions for coordinate normalization
-                screen_w = screenshot.width if screenshot else 1080
-                screen_h = screenshot.height if screenshot else 2400
-                ui_elements_str = format_elements_for_llm(
-                    elements, screen_width=screen_w, screen_height=screen_h
-                )
-                # logger.debug(f"Fetched {len(elements)} UI elements")
-            except Exception as e:
-                logger.warning(f"Failed to get UI hierarchy: {e}")
+        ui_elements_str = ui_future.result() if ui_future else ""
 
         # Build messages
         if is_first:
-            self._context.append(
-                MessageBuilder.create_system_message(self.agent_config.system_prompt)
-            )
+            self._context.append(self._build_system_message())
+            self._context_version += 1
 
-            screen_info = MessageBuilder.build_screen_info(
-                current_app, ui_hierarchy=ui_elements_str
-            )
-            text_content = f"{user_prompt}\n\n{screen_info}"
+        screen_info = MessageBuilder.build_screen_info(current_app, ui_hierarchy=ui_elements_str)
 
-            # 🧠 如果有记忆，注入到Prompt中
-            if self._scratchpad:
-                text_content = f"** 🧠 Persistent Memory (Update with UpdateMemory) **\n{self._scratchpad}\n\n{text_content}"
+        # 各段按顺序收集后一次性拼接，避免逐段生成中间字符串
+        parts: list[str] = []
 
-            self._context.append(
-                MessageBuilder.create_user_message(
-                    text=text_content, image_base64=screenshot.base64_data
-                )
-            )
+        if is_first:
+            parts += (user_prompt, "\n\n", screen_info)
         else:
-            screen_info = MessageBuilder.build_screen_info(
-                current_app, ui_hierarchy=ui_elements_str
-            )
-
             # 注入上一步操作结果（关键反馈）
-            action_feedback = ""
             if self._last_action_result:
-                action_feedback = f"** Last Action Result **\n{self._last_action_result}\n\n"
+                parts += (_LAST_ACTION_HEADER, self._last_action_result, "\n\n")
 
             # 🛑 注入用户干预（高优先级）
-            intervention_feedback = ""
             if self._pending_intervention:
-                intervention_feedback = (
-                    f"** [USER INTERVENTION] **\n"
-                    f"ℹ️ The user has provided additional information/instruction:\n"
-                    f"{self._pending_intervention}\n"
-                    f"Please incorporate this into your planning immediately.\n\n"
-                )
+                parts += (_INTERVENTION_HEADER, self._pending_intervention, _INTERVENTION_FOOTER)
                 self._pending_intervention = None
 
-            text_content = (
-                f"{action_feedback}{intervention_feedback}** Screen Info **\n\n{screen_info}"
-            )
-
-            # 🧠 如果有记忆，注入到Prompt中
-            if self._scratchpad:
-                text_content = f"** 🧠 Persistent Memory (Update with UpdateMemory) **\n{self._scratchpad}\n\n{text_content}"
+            parts += (_SCREEN_INFO_HEADER, screen_info)
 
-            self._context.append(
-                MessageBuilder.create_user_message(
-                    text=text_content, image_base64=screenshot.base64_data
-                )
-            )
+        user_message = MessageBuilder.create_user_message(
+            text="".join(parts), image_base64=screenshot_base64
+        )
+        if any(item.get("type") == "image_url" for item in user_message["content"]):
+            self._image_msg_indices.append(len(self._context))
+            # 模型请求期间在后台把本张截图压缩好，下一步直接替换
+            self._prefetch_compressed(screenshot_base64, screenshot.png_bytes)
+        self._context.append(user_message)
+        self._context_version += 1
 
         # Get model response (支持流式输出)
         try:
             # 🆕 通知步骤开始（在调用模型前，以便前端接收流式Thinking）
-            start_info = {"thinking": "", "action": "Thinking..."}
-            self.step_callback.on_step_start(
-                self._step_count, json.dumps(start_info, ensure_ascii=False)
-            )
+            self.step_callback.on_step_start(self._step_count, _START_INFO_JSON)
 
             if self.model_config.enable_streaming:
                 response = self.model_client.request_stream(
@@ -453,11 +673,14 @@ class PhoneAgent:
 
                 # 移除整个上下文中的所有图片（不仅是最后一条）
                 # 这是为了防止历史消息中残留无效的图片数据导致持续报错
+                # 带图片的消息都记录在 _image_msg_indices 中，只需处理这些消息
                 if self._context:
-                    for i in range(len(self._context)):
-                        self._context[i] = MessageBuilder.remove_images_from_message(
-                            self._context[i]
+                    for idx in self._image_msg_indices:
+                        self._context[idx] = MessageBuilder.remove_images_from_message(
+                            self._context[idx]
                         )
+                    self._image_msg_indices.clear()
+                    self._context_version += 1
 
                     try:
                         logger.info("Retrying request with text only (all images removed)...")
@@ -469,9 +692,9 @@ class PhoneAgent:
                         else:
                             response = self.model_client.request(self._context)
                     except Exception as retry_e:
-                        logger.error(f"Retry also failed: {retry_e}")
-                        if self.agent_config.verbose:
-                            traceback.print_exc()
+                        logger.error(
+                            f"Retry also failed: {retry_e}", exc_info=self._log_tracebacks()
+                        )
                         return StepResult(
                             success=False,
                             finished=True,
@@ -480,8 +703,8 @@ class PhoneAgent:
                             message=f"Model error (after retry): {retry_e}",
                         )
             else:
-                if self.agent_config.verbose:
-                    traceback.print_exc()
+                if self._log_tracebacks():
+                    logger.debug("Model request failed", exc_info=True)
                 return StepResult(
                     success=False,
                     finished=True,
@@ -494,8 +717,8 @@ class PhoneAgent:
         try:
             action = parse_action(response.action)
         except ValueError:
-            if self.agent_config.verbose:
-                traceback.print_exc()
+            if self._log_tracebacks():
+                logger.debug("Failed to parse action, submitting the raw response", exc_info=True)
             action = submit_result(message=response.action)
 
         # 🧠 Handle Memory Update (Before Callback)
@@ -503,10 +726,14 @@ class PhoneAgent:
             old_memory = self._scratchpad
             new_memory = action.get("content", "")
             self._scratchpad = new_memory
-            if self.agent_config.verbose:
+            # 记忆放在系统消息中，只在更新时改写，不再随每条用户消息重复发送
+            if self._context:
+                self._context[0] = self._build_system_message()
+                self._context_version += 1
+            if self.agent_config.verbose and logger.isEnabledFor(logging.DEBUG):
                 logger.debug(f"🧠 Memory Updated: {old_memory[:20]}... -> {new_memory[:20]}...")
 
-        if self.agent_config.verbose:
+        if self.agent_config.verbose and logger.isEnabledFor(logging.DEBUG):
             # 打印思考过程（使用logger替代print）
             logger.debug("=" * 50)
             logger.debug("💭 思考过程:")
@@ -514,44 +741,29 @@ class PhoneAgent:
             logger.debug(response.thinking)
             logger.debug("-" * 50)
             logger.debug("🎯 执行动作:")
-            logger.debug(json.dumps(action, ensure_ascii=False, indent=2))
+            if ORJSON_AVAILABLE:
+                logger.debug(orjson.dumps(action, option=orjson.OPT_INDENT_2).decode("utf-8"))
+            else:
+                logger.debug(json.dumps(action, ensure_ascii=False, indent=2))
             logger.debug("=" * 50)
 
         # Manage history images based on configuration
-        # Identify all user messages with images
-        image_indices = []
-        for i, msg in enumerate(self._context):
-            if msg.get("role") == "user" and isinstance(msg.get("content"), list):
-                # Check if message has image content
-                has_image = any(item.get("type") == "image_url" for item in msg["content"])
-                if has_image:
-                    image_indices.append(i)
+        # 带图片的用户消息下标在追加消息时维护，无需每步扫描整个上下文
+        image_indices = self._image_msg_indices
 
         # Keep the last N images (max_history_images) + 1 (current step)
         # Note: The current step's image is the last one in the list
         # max_history_images=1 means keep 1 history + 1 current = 2 total
         images_to_keep = self.agent_config.max_history_images + 1
 
-        if len(image_indices) > images_to_keep:
-            # We need to remove some images
-            # Calculate how many to remove
-            num_to_remove = len(image_indices) - images_to_keep
-
-            # Remove images from messages
-            for i in range(num_to_remove):
-                idx = image_indices[i]
-                msg = self._context[idx]
-                self._context[idx] = MessageBuilder.remove_images_from_message(msg)
-                logger.debug(f"Removed history image from message index {idx}")
+        # Remove the oldest images beyond the limit
+        while len(image_indices) > images_to_keep:
+            idx = image_indices.popleft()
+            self._context[idx] = MessageBuilder.remove_images_from_message(self._context[idx])
+            self._context_version += 1
+            logger.debug(f"Removed history image from message index {idx}")
 
         # 智能压缩历史图片：保持最新的图片为高清，其余压缩为标清
-        # 重新获取包含图片的索引（因为上面可能移除了部分）
-        remaining_image_indices = []
-        for i, msg in enumerate(self._context):
-            if msg.get("role") == "user" and isinstance(msg.get("content"), list):
-                if any(item.get("type") == "image_url" for item in msg["content"]):
-                    remaining_image_indices.append(i)
-
         # 执行压缩：如果当前有 event loop，则在 loop 中异步调度，避免 RuntimeError
         compression_loop: asyncio.AbstractEventLoop | None = None
         try:
@@ -559,9 +771,7 @@ class PhoneAgent:
         except RuntimeError:
             compression_loop = None
 
-        compression_task = self._compress_history_images(
-            remaining_image_indices, loop=compression_loop
-        )
+        compression_task = self._compress_history_images(list(image_indices), loop=compression_loop)
 
         if compression_task:
 
@@ -584,8 +794,8 @@ class PhoneAgent:
             phys_w, phys_h = get_physical_screen_size(self.agent_config.device_id)
             result = self.action_handler.execute(action, phys_w, phys_h)
         except Exception as e:
-            if self.agent_config.verbose:
-                traceback.print_exc()
+            if self._log_tracebacks():
+                logger.debug("Action execution failed", exc_info=True)
 
             # Fallback to screenshot size if physical fetch utterly fails (though helper defaults to 1080p)
             result = self.action_handler.execute(
@@ -609,6 +819,7 @@ class PhoneAgent:
                 f"<think>{response.thinking}</think><answer>{response.action}</answer>"
             )
         )
+        self._context_version += 1
 
         # Check if finished
         finished = action.get("_metadata") == "submit_result" or result.should_finish
@@ -619,7 +830,7 @@ class PhoneAgent:
             result.success,
             thinking=response.thinking,
             observation=result.message or action.get("message", ""),
-            action=json.dumps(action, ensure_ascii=False) if action else None,
+            action=_dumps(action) if action else None,
         )
 
         if finished and self.agent_config.verbose:
@@ -638,11 +849,39 @@ class PhoneAgent:
         )
 
     @property
-    def context(self) -> list[dict[str, Any]]:
-        """Get the current conversation context."""
-        return self._context.copy()
+    def context(self) -> tuple[dict[str, Any], ...]:
+        """Get the current conversation context (read-only snapshot)."""
+        # 上下文没有追加或替换消息时复用上一次的快照，轮询时不再每次复制
+        if self._context_snapshot_version != self._context_version:
+            self._context_snapshot = tuple(self._context)
+            self._context_snapshot_version = self._context_version
+        return self._context_snapshot
 
     @property
     def step_count(self) -> int:
         """Get the current step count."""
         return self._step_count
+
+
+async def run_batch(agents: list[PhoneAgent], tasks: list[str], concurrency: int = 5) -> list[str]:
+    """
+    Run one task per agent concurrently (e.g. one agent per device).
+
+    Args:
+        agents: Agents to run, typically bound to different devices.
+        tasks: Task for each agent (same order as agents).
+        concurrency: Maximum number of agents running at the same time.
+
+    Returns:
+        Final message of each agent, in input order.
+    """
+    if len(agents) != len(tasks):
+        raise ValueError("agents and tasks must have the same length")
+
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def run_one(agent: PhoneAgent, task: str) -> str:
+        async with semaphore:
+            return await agent.arun(task)
+
+    return await asyncio.gather(*(run_one(a, t) for a, t in zip(agents, tasks)))
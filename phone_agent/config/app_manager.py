@@ -202,7 +202,7 @@ class AppConfigManager:
             logger.info("🔍 扫描设备应用...")
 
             result = subprocess.run(
-                adb_prefix + ["shell", "pm", "list", "packages", "-3"],
+                [*adb_prefix, "shell", "pm", "list", "packages", "-3"],
                 capture_output=True,
                 text=True,
                 timeout=30,
@@ -229,7 +229,7 @@ class AppConfigManager:
             try:
                 # 尝试使用更快的方法：pm list packages -U (包含应用uid和label)
                 label_result = subprocess.run(
-                    adb_prefix + ["shell", "pm", "list", "packages", "-U"],
+                    [*adb_prefix, "shell", "pm", "list", "packages", "-U"],
                     capture_output=True,
                     text=True,
                     timeout=10,
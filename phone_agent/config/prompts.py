@@ -88,7 +88,7 @@ SYSTEM_PROMPT = (
     1. 记录总任务的拆分计划（TaskList）。
     2. 记录当前进行到了哪一步。
     3. 记录之前失败的尝试，避免重蹈覆辙。
-    这个记忆区域会在每一步的Prompt开头显示给你（** 🧠 Persistent Memory **）。
+    这个记忆区域会显示在系统提示词末尾（** 🧠 Persistent Memory **），每次更新后立即生效。
     例如：do(action="UpdateMemory", content="1. [x] 打开微信\n2. [ ] 搜索张三\n3. [ ] 发送消息")
 - submit_result(message="xxx")
     submit_result 是提交最终结果的操作，**只有在你确认任务目标已经准确完整完成后，才可以调用此操作**。message是任务完成的详细说明，包括执行了什么操作和达成了什么结果。
@@ -45,6 +45,14 @@ from phone_agent.adb.xml_tree import UIElement, format_elements_for_llm
 from phone_agent.kernel.callback import NoOpCallback, StepCallback
 from phone_agent.model import ModelClient, ModelConfig
 
+# 可选依赖：orjson（更快的 JSON 序列化，用于步骤回调）
+try:
+    import orjson
+
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
 logger = logging.getLogger(__name__)
 
 warnings.warn(
@@ -55,6 +63,13 @@ warnings.warn(
 )
 
 
+def _dumps(obj: Any) -> str:
+    """Serialize to a compact JSON str keeping non-ASCII text (orjson when installed)."""
+    if ORJSON_AVAILABLE:
+        return orjson.dumps(obj).decode("utf-8")
+    return json.dumps(obj, ensure_ascii=False, separators=(",", ":"))
+
+
 @dataclass
 class XMLKernelConfig:
     """XML Kernel 配置"""
@@ -149,7 +164,7 @@ class XMLKernelAgent:
                     logger.info("👀 正在扫描屏幕...")
 
                 try:
-                    elements = get_ui_hierarchy(self.config.device_id)
+                    elements = get_ui_hierarchy(self.config.device_id, sort=False)
                 except Exception as e:
                     logger.error(f"UI获取失败: {e}")
                     # 尝试重置策略并重试一次
@@ -161,7 +176,7 @@ class XMLKernelAgent:
 
                     # 重试一次
                     try:
-                        elements = get_ui_hierarchy(self.config.device_id)
+                        elements = get_ui_hierarchy(self.config.device_id, sort=False)
                     except Exception as retry_e:
                         logger.error(f"UI获取重试失败: {retry_e}")
                         # 连续失败，需要降级（由外层HybridAgent处理）
@@ -213,15 +228,11 @@ class XMLKernelAgent:
                     logger.info(f"🎯 动作: {decision.get('action')}")
 
                 # 🆕 通知步骤开始（同步调用，传递完整信息）
-                import json
-
                 step_info = {
                     "thinking": decision.get("reason", ""),
-                    "action": json.dumps(decision, ensure_ascii=False),
+                    "action": _dumps(decision),
                 }
-                self.step_callback.on_step_start(
-                    self._step_count, json.dumps(step_info, ensure_ascii=False)
-                )
+                self.step_callback.on_step_start(self._step_count, _dumps(step_info))
 
                 # 3. 执行动作
                 result = self._execute_action(decision)
@@ -1,4 +1,3 @@
-import base64
 import logging
 import math
 import time
@@ -31,8 +30,7 @@ def calculate_rms_diff(img1: Image.Image, img2: Image.Image) -> float:
 
 def screenshot_to_image(screenshot: Screenshot) -> Image.Image:
     """Convert Screenshot object to PIL Image."""
-    image_data = base64.b64decode(screenshot.base64_data)
-    return Image.open(BytesIO(image_data))
+    return Image.open(BytesIO(screenshot.png_bytes))
 
 
 def wait_for_ui_stabilization(
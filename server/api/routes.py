@@ -1013,7 +1013,6 @@ async def get_device_screenshot(device_id: str, size: str = "medium"):
         size: 尺寸级别 (ai/medium/small/thumbnail)
     """
     import asyncio
-    import base64
     import os
     import tempfile
 
@@ -1029,12 +1028,12 @@ async def get_device_screenshot(device_id: str, size: str = "medium"):
         # 获取截图
         screenshot = await asyncio.to_thread(get_screenshot, adb_address)
 
-        if not screenshot or not screenshot.base64_data:
+        if not screenshot or not screenshot.png_bytes:
             raise HTTPException(status_code=500, detail="无法获取设备截图")
 
         # 保存临时截图
         with tempfile.NamedTemporaryFile(suffix=".png", delete=False) as tmp:
-            tmp.write(base64.b64decode(screenshot.base64_data))
+            tmp.write(screenshot.png_bytes)
             tmp_path = tmp.name
             tmp.flush()  # 确保数据写入磁盘
             os.fsync(tmp.fileno())  # 强制同步到磁盘
@@ -18,7 +18,7 @@ import uuid
 from dataclasses import dataclass, field
 from datetime import datetime, timezone
 from enum import Enum
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, Optional, Sequence
 
 from phone_agent.adb import get_screenshot
 from phone_agent.agent import AgentConfig, PhoneAgent
@@ -399,16 +399,14 @@ class AgentCallback:
 
             screenshot = await asyncio.to_thread(get_screenshot, adb_address)
 
-            if not screenshot or not screenshot.base64_data:
+            if not screenshot or not screenshot.png_bytes:
                 logger.warning(f"Failed to capture screenshot for step {step}")
                 return None
 
             # 保存原始截图
-            import base64
-
             original_path = os.path.join(task_screenshot_dir, f"step_{step:03d}_original.png")
             with open(original_path, "wb") as f:
-                f.write(base64.b64decode(screenshot.base64_data))
+                f.write(screenshot.png_bytes)
 
             # 压缩截图（生成多个级别）
             compressed_paths = await asyncio.to_thread(
@@ -2098,7 +2096,7 @@ class AgentService:
         except Exception as e:
             logger.error(f"Failed to save context for task {task_id}: {e}")
 
-    def get_task_context(self, task_id: str) -> Optional[List[Dict[str, Any]]]:
+    def get_task_context(self, task_id: str) -> Optional[Sequence[Dict[str, Any]]]:
         """
         获取任务的 LLM 上下文（支持运行中和已完成任务）
 
@@ -2233,7 +2231,7 @@ class AgentService:
             # 截图
             screenshot = await asyncio.to_thread(get_screenshot, adb_address)
 
-            if not screenshot or not screenshot.base64_data:
+            if not screenshot or not screenshot.png_bytes:
                 logger.warning(f"Failed to capture screenshot for step {step}")
                 return None
 
@@ -2244,7 +2242,7 @@ class AgentService:
             from PIL import Image
 
             original_path = os.path.join(task_screenshot_dir, f"step_{step:03d}_original.png")
-            image_bytes = base64.b64decode(screenshot.base64_data)
+            image_bytes = screenshot.png_bytes
             with open(original_path, "wb") as f:
                 f.write(image_bytes)
 
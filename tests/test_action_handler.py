@@ -0,0 +1,166 @@
+"""
+Tests for phone_agent.actions.handler
+
+Unit tests for action dispatch and model output parsing.
+"""
+
+from unittest.mock import patch
+
+import pytest
+
+
+class TestActionHandler:
+    """Tests for ActionHandler dispatch."""
+
+    def test_known_action_dispatches(self):
+        """Known action names are routed to their handler."""
+        from phone_agent.actions.handler import ActionHandler
+
+        handler = ActionHandler(device_id="emulator-5554")
+
+        with patch("phone_agent.actions.handler.back") as mock_back:
+            result = handler.execute({"_metadata": "do", "action": "Back"}, 1080, 2400)
+
+        assert result.success is True
+        mock_back.assert_called_once_with("emulator-5554")
+
+    def test_unknown_action(self):
+        """Unknown action names return a failed result without finishing."""
+        from phone_agent.actions.handler import ActionHandler
+
+        handler = ActionHandler()
+        result = handler.execute({"_metadata": "do", "action": "Fly"}, 1080, 2400)
+
+        assert result.success is False
+        assert result.should_finish is False
+        assert result.message == "Unknown action: Fly"
+
+    def test_tap_converts_relative_coordinates(self):
+        """Tap converts 0-1000 coordinates to pixels."""
+        from phone_agent.actions.handler import ActionHandler
+
+        handler = ActionHandler()
+
+        with patch("phone_agent.actions.handler.tap") as mock_tap:
+            handler.execute({"_metadata": "do", "action": "Tap", "element": [500, 250]}, 1080, 2400)
+
+        mock_tap.assert_called_once_with(540, 600, None)
+
+
+class TestParseAction:
+    """Tests for parse_action."""
+
+    def test_parse_tap(self):
+        """Parse a tap with element coordinates."""
+        from phone_agent.actions.handler import parse_action
+
+        action = parse_action('do(action="Tap", element=[123, 456])')
+
+        assert action == {"_metadata": "do", "action": "Tap", "element": [123, 456]}
+
+    def test_parse_submit_result(self):
+        """Parse submit_result with a message."""
+        from phone_agent.actions.handler import parse_action
+
+        action = parse_action('submit_result(message="done")')
+
+        assert action == {"_metadata": "submit_result", "message": "done"}
+
+    def test_regex_fallback(self):
+        """Malformed Python still parses through the regex fallback."""
+        from phone_agent.actions.handler import parse_action
+
+        action = parse_action('do(action="Type", text="it"s here")')
+
+        assert action["_metadata"] == "do"
+        assert action["action"] == "Type"
+        assert action["text"] == "it"
+
+    def test_invalid_response(self):
+        """Unparseable responses raise ValueError."""
+        from phone_agent.actions.handler import parse_action
+
+        with pytest.raises(ValueError):
+            parse_action("tap the button")
+
+    def test_parse_swipe_and_negative_values(self):
+        """Lists, tuples and negative numbers are converted like literal_eval."""
+        from phone_agent.actions.handler import parse_action
+
+        action = parse_action('do(action="Swipe", start=[100, 800], end=(100, -5))')
+
+        assert action["start"] == [100, 800]
+        assert action["end"] == (100, -5)
+
+    def test_non_literal_argument_rejected(self):
+        """Non-literal expressions are never evaluated."""
+        from phone_agent.actions.handler import parse_action
+
+        action = parse_action('do(action=__import__("os").system("ls"))')
+
+        assert action == {"_metadata": "do"}
+
+    def test_fast_path_matches_ast_path(self):
+        """The regex fast path returns the same dict as the AST path."""
+        from phone_agent.actions.handler import _parse_action_fast, parse_action
+
+        response = 'do(action="Swipe", start=[500, 800], end=[500, 200])'
+
+        assert _parse_action_fast(response) is not None
+        assert parse_action(response) == {
+            "action": "Swipe",
+            "start": [500, 800],
+            "end": [500, 200],
+            "_metadata": "do",
+        }
+        assert _parse_action_fast('do(action="Tap", element=[1, 2], message="pay")') is None
+
+
+class TestGetInstalledApps:
+    """Tests for the GetInstalledApps action."""
+
+    def test_runs_inside_running_event_loop(self):
+        """The async lookup works even when called from a thread with a running loop."""
+        import asyncio
+
+        from phone_agent.actions.handler import ActionHandler
+
+        async def fake_packages(device_id):
+            return ["com.example.a", "com.example.b"]
+
+        handler = ActionHandler()
+
+        async def main():
+            return handler.execute({"_metadata": "do", "action": "GetInstalledApps"}, 1080, 2400)
+
+        with patch("phone_agent.actions.handler.get_third_party_packages", fake_packages):
+            first = asyncio.run(main())
+            second = handler.execute({"_metadata": "do", "action": "GetInstalledApps"}, 1080, 2400)
+
+        assert first.message == "Installed 3rd-party apps: com.example.a, com.example.b"
+        assert second.message == first.message
+
+
+class TestExecuteMany:
+    """Tests for parallel multi-device dispatch."""
+
+    def test_dispatches_to_every_device(self):
+        """Each handler runs the action against its own device."""
+        import asyncio
+
+        from phone_agent.actions.handler import ActionHandler
+
+        handlers = [ActionHandler(device_id=f"emulator-{port}") for port in (5554, 5556)]
+
+        with patch("phone_agent.actions.handler.back") as mock_back:
+            results = asyncio.run(
+                ActionHandler.execute_many(
+                    handlers, {"_metadata": "do", "action": "Back"}, 1080, 2400
+                )
+            )
+
+        assert [r.success for r in results] == [True, True]
+        assert sorted(c.args[0] for c in mock_back.call_args_list) == [
+            "emulator-5554",
+            "emulator-5556",
+        ]
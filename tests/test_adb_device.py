@@ -0,0 +1,362 @@
+"""
+Tests for phone_agent.adb.device
+
+Unit tests for ADB device control helpers (no real device required).
+"""
+
+import asyncio
+from unittest.mock import patch
+
+
+class TestSwipe:
+    """Tests for swipe command construction."""
+
+    def test_straight_swipe_single_command(self):
+        """Without anti-detection a swipe is a single input swipe."""
+        from phone_agent.adb import device
+
+        with patch.object(device.subprocess, "run") as mock_run:
+            device.swipe(100, 200, 100, 900, device_id="emulator-5554", delay=0)
+
+        mock_run.assert_called_once()
+        args = mock_run.call_args[0][0]
+        assert args[-2:] == ["shell", "input swipe 100 200 100 900 1000"]
+        assert mock_run.call_args.kwargs["stdout"] is device.subprocess.DEVNULL
+
+    def test_bezier_swipe_batches_segments(self):
+        """All bezier segments are sent as one && chained shell command."""
+        from phone_agent.adb import device
+        from phone_agent.adb.anti_detection import AntiDetection
+
+        ad = AntiDetection({"enabled": True, "enable_time_randomization": False})
+        with (
+            patch.object(device, "get_anti_detection", return_value=ad),
+            patch.object(device, "run_shell_command", return_value=(0, "")) as mock_shell,
+        ):
+            device.swipe(100, 200, 100, 900, device_id="emulator-5554")
+
+        mock_shell.assert_called_once()
+        commands = mock_shell.call_args[0][1].split(" && ")
+        assert len(commands) > 1
+        assert all(cmd.startswith("input swipe ") for cmd in commands)
+
+    def test_run_adb_batch_separator(self):
+        """stop_on_error=False chains commands with ';'."""
+        from phone_agent.adb import device
+
+        with patch.object(device, "run_shell_command", return_value=(0, "")) as mock_shell:
+            device.run_adb_batch(["input keyevent 4", "input keyevent 3"], stop_on_error=False)
+
+        assert mock_shell.call_args[0][1] == "input keyevent 4; input keyevent 3"
+
+    def test_path_segments(self):
+        """A path of N points yields N-1 segments sharing the duration."""
+        from phone_agent.adb.device import _path_segments
+
+        segments = _path_segments([(0, 0), (10, 10), (20, 20)], 900)
+
+        assert segments == [(0, 0, 10, 10, 300), (10, 10, 20, 20, 300)]
+
+
+GETEVENT_PROBE = """arm64-v8a
+Physical size: 1080x2400
+add device 1: /dev/input/event5
+  name:     "fts_ts"
+  events:
+    KEY (0001): 014a
+    ABS (0003): 002f  : value 0, min 0, max 9, fuzz 0, flat 0, resolution 0
+                0035  : value 0, min 0, max 4319, fuzz 0, flat 0, resolution 0
+                0036  : value 0, min 0, max 9599, fuzz 0, flat 0, resolution 0
+                0039  : value 0, min 0, max 65535, fuzz 0, flat 0, resolution 0
+"""
+
+
+class TestSendeventSwipe:
+    """Tests for the experimental sendevent swipe replay."""
+
+    def setup_method(self):
+        from phone_agent.adb import device
+
+        device._touch_panel_cache.clear()
+
+    def test_invalid_node_returns_false(self):
+        """A malformed node falls back instead of raising."""
+        from phone_agent.adb import device
+
+        with patch.object(device, "run_shell_command") as mock_shell:
+            assert not device.sendevent_swipe([(0, 0), (10, 10)], "/dev/input/event5; reboot")
+
+        mock_shell.assert_not_called()
+
+    def test_parse_touch_panel(self):
+        """ABI, screen size and axis ranges are read from the probe output."""
+        from phone_agent.adb import device
+        from phone_agent.adb.anti_detection import INPUT_EVENT_32, INPUT_EVENT_64
+
+        panel = device._parse_touch_panel(GETEVENT_PROBE)
+        assert panel.event_struct is INPUT_EVENT_64
+        assert panel.screen_size == (1080, 2400)
+        assert panel.x_range == (0, 4319)
+        assert panel.y_range == (0, 9599)
+
+        override = GETEVENT_PROBE.replace("arm64-v8a", "armeabi-v7a").replace(
+            "Physical size: 1080x2400", "Physical size: 1080x2400\nOverride size: 720x1600"
+        )
+        panel = device._parse_touch_panel(override)
+        assert panel.event_struct is INPUT_EVENT_32
+        assert panel.screen_size == (720, 1600)
+
+        assert device._parse_touch_panel("arm64-v8a\nPhysical size: 1080x2400\n") is None
+
+    def test_panel_coords_follow_rotation(self):
+        """Screen pixels are scaled to the axis range and un-rotated."""
+        from phone_agent.adb import device
+
+        panel = device._parse_touch_panel(GETEVENT_PROBE)
+
+        assert device._to_panel_coords([(0, 0), (1079, 2399)], panel, 0) == [
+            (0, 0),
+            (4319, 9599),
+        ]
+        # 横屏（ROTATION_90）下屏幕左上角对应自然方向的左下角
+        assert device._to_panel_coords([(0, 0)], panel, 1) == [(0, 9599)]
+        assert device._to_panel_coords([(0, 0)], panel, 2) == [(4319, 9599)]
+        assert device._to_panel_coords([(0, 0)], panel, 3) == [(4319, 0)]
+
+    def test_replay_is_paced(self):
+        """Frames are written one dd at a time with sleeps spreading duration_ms."""
+        from phone_agent.adb import device
+
+        def fake_shell(prefix, command, timeout, capture=True):
+            if command.startswith("getprop"):
+                return 0, GETEVENT_PROBE
+            if command.startswith("dumpsys input"):
+                return 0, "    SurfaceOrientation: 0\n"
+            return 0, ""
+
+        path = [(100, 200), (100, 500), (100, 800), (100, 1100), (100, 1400)]
+        with (
+            patch.object(device, "run_shell_command", side_effect=fake_shell) as mock_shell,
+            patch.object(device.subprocess, "run") as mock_run,
+        ):
+            mock_run.return_value.returncode = 0
+            assert device.sendevent_swipe(path, "/dev/input/event5", "emulator-5554", 800)
+            assert device.sendevent_swipe(path, "/dev/input/event5", "emulator-5554", 800)
+
+        # 触摸屏信息只探测一次，方向每次都查询
+        commands = [c[0][1] for c in mock_shell.call_args_list]
+        assert sum(c.startswith("getprop") for c in commands) == 1
+        assert sum(c.startswith("dumpsys input") for c in commands) == 2
+
+        script = commands[-1].split("; ")
+        writes = [c for c in script if c.startswith("dd ")]
+        assert len(writes) == len(path) + 1
+        assert script.count("sleep 0.200") == len(path) - 1
+        assert writes[0].endswith("bs=24 skip=0 count=5 2>/dev/null")
+        assert writes[-1].endswith(f"skip={5 + 3 * (len(path) - 1)} count=3 2>/dev/null")
+        assert mock_shell.call_args.kwargs["timeout"] == 10.8
+
+
+class TestCurrentApp:
+    """Tests for foreground app detection."""
+
+    def test_parses_focused_package(self):
+        """The package on the focus line is mapped back to its app name."""
+        import subprocess
+
+        from phone_agent.adb import device
+        from phone_agent.config.apps import APP_PACKAGES
+
+        app_name, package = next(iter(APP_PACKAGES.items()))
+        output = (
+            "  mSurface=Surface(name=com.other.app/.Main)\n"
+            f"  mCurrentFocus=Window{{1a2b u0 {package}/{package}.MainActivity}}\n"
+        )
+        completed = subprocess.CompletedProcess([], 0, stdout=output, stderr="")
+
+        device.get_current_app.invalidate("emulator-5554")
+        with patch.object(device.subprocess, "run", return_value=completed):
+            assert device.get_current_app("emulator-5554") == app_name
+        device.get_current_app.invalidate("emulator-5554")
+
+    def test_unknown_focus_is_home(self):
+        """Without a known package on a focus line the result is System Home."""
+        import subprocess
+
+        from phone_agent.adb import device
+
+        output = "  mCurrentFocus=Window{1a2b u0 com.unknown.launcher/.Home}\n"
+        completed = subprocess.CompletedProcess([], 0, stdout=output, stderr="")
+
+        device.get_current_app.invalidate("emulator-5554")
+        with patch.object(device.subprocess, "run", return_value=completed):
+            assert device.get_current_app("emulator-5554") == "System Home"
+        device.get_current_app.invalidate("emulator-5554")
+
+
+class TestDeviceId:
+    """Tests for device_id validation."""
+
+    def test_valid_and_invalid_ids(self):
+        """Known formats pass; shell metacharacters and newlines are rejected."""
+        from phone_agent.adb.device import _is_valid_device_id
+
+        for device_id in ("localhost:6100", "192.168.1.100:5555", "emulator-5554", "ABCD1234"):
+            assert _is_valid_device_id(device_id)
+        for device_id in ("a;reboot", "emulator-5554\n", "host:port", ""):
+            assert not _is_valid_device_id(device_id)
+
+    def test_adb_prefix_is_cached_tuple(self):
+        """The prefix uses the resolved adb path and is reused per device."""
+        from phone_agent.adb.device import ADB_PATH, _get_adb_prefix
+
+        prefix = _get_adb_prefix("emulator-5554")
+
+        assert prefix == (ADB_PATH, "-s", "emulator-5554")
+        assert _get_adb_prefix("emulator-5554") is prefix
+        assert _get_adb_prefix(None) == (ADB_PATH,)
+
+
+class TestAppConfigIndex:
+    """Tests for the cached app_config.json index."""
+
+    def test_index_is_cached_by_mtime(self, tmp_path):
+        """The file is parsed once and re-read only after it changes."""
+        import json
+        import os
+
+        from phone_agent.adb import device
+
+        config_file = tmp_path / "app_config.json"
+        apps = [{"display_name": "微信", "display_name_en": "WeChat", "package_name": "com.a"}]
+        config_file.write_text(json.dumps(apps), encoding="utf-8")
+
+        index = device._load_app_config_index(str(config_file))
+        assert index[0]["微信"] == "com.a"
+        assert index[1]["wechat"] == "com.a"
+
+        with patch.object(device, "open") as mock_open:
+            assert device._load_app_config_index(str(config_file)) is index
+        mock_open.assert_not_called()
+
+        apps[0]["aliases"] = ["WX"]
+        config_file.write_text(json.dumps(apps), encoding="utf-8")
+        os.utime(config_file, (0, 12345))
+        assert device._load_app_config_index(str(config_file))[2]["wx"] == "com.a"
+
+    def test_missing_file(self, tmp_path):
+        """A missing config file yields no index."""
+        from phone_agent.adb.device import _load_app_config_index
+
+        assert _load_app_config_index(str(tmp_path / "missing.json")) is None
+
+
+class TestRunAdbCommand:
+    """Tests for run_adb_command error handling."""
+
+    def test_error_in_stderr_raises(self):
+        """A case-insensitive "error" in stderr raises RuntimeError."""
+        import subprocess
+
+        import pytest
+
+        from phone_agent.adb import device
+
+        completed = subprocess.CompletedProcess(
+            [], 1, stdout=b"", stderr=b"ERROR: device offline\n"
+        )
+        with patch.object(device.subprocess, "run", return_value=completed):
+            with pytest.raises(RuntimeError, match="device offline"):
+                device.run_adb_command(["shell", "true"], "emulator-5554")
+
+    def test_unchecked_stderr_is_discarded(self):
+        """With check_error=False stderr goes to DEVNULL and stdout is decoded."""
+        import subprocess
+
+        from phone_agent.adb import device
+
+        completed = subprocess.CompletedProcess([], 0, stdout="中文\n".encode(), stderr=None)
+        with patch.object(device.subprocess, "run", return_value=completed) as mock_run:
+            assert device.run_adb_command(["shell", "echo"], check_error=False) == "中文"
+
+        assert mock_run.call_args.kwargs["stderr"] is subprocess.DEVNULL
+
+
+class TestAsyncCommands:
+    """Tests for the asyncio-based ADB helpers."""
+
+    def test_run_adb_command_async(self):
+        """Output of the subprocess is returned decoded and stripped."""
+        from phone_agent.adb import device
+
+        with patch.object(device, "_get_adb_prefix", return_value=["echo"]):
+            output = asyncio.run(device.run_adb_command_async(["hello", "world"]))
+
+        assert output == "hello world"
+
+    def test_gather_multiple_devices(self):
+        """Several devices can be driven concurrently."""
+        from phone_agent.adb import device
+
+        calls = []
+
+        async def fake_run(args, timeout, capture=True):
+            calls.append(args)
+            return 0, b"", b""
+
+        with patch.object(device, "_run_adb_async", fake_run):
+
+            async def main():
+                await asyncio.gather(
+                    device.back_async("emulator-5554", delay=0),
+                    device.back_async("emulator-5556", delay=0),
+                )
+
+            asyncio.run(main())
+
+        assert sorted(c[2] for c in calls) == ["emulator-5554", "emulator-5556"]
+
+    def test_launch_app_async_falls_back_to_monkey(self):
+        """Packages resolve like launch_app; a failed AM start falls back to monkey."""
+        from phone_agent.adb import device
+
+        calls = []
+
+        async def fake_run(args, timeout, capture=True):
+            calls.append(args)
+            if "am" in args:
+                return 0, b"Error: Activity not started\n", b""
+            return 0, b"package:/data/app/base.apk\n", b""
+
+        with (
+            patch.object(device, "_run_adb_async", fake_run),
+            patch.object(device, "_load_app_config_index", return_value=None),
+            patch.dict(device.APP_PACKAGES, {"测试": "com.example.test"}),
+            patch.object(device.asyncio, "sleep") as mock_sleep,
+            patch.object(device.time, "sleep") as mock_blocking_sleep,
+        ):
+            assert asyncio.run(device.launch_app_async("测试", "emulator-5554", delay=2))
+            assert not asyncio.run(device.launch_app_async("不存在的应用", "emulator-5554"))
+
+        assert [c[4] for c in calls] == ["pm", "am", "monkey"]
+        assert calls[-1][5:7] == ["-p", "com.example.test"]
+        mock_sleep.assert_called_once_with(2)
+        mock_blocking_sleep.assert_not_called()
+
+
+class TestAppDiscovery:
+    """Tests for installed package listing."""
+
+    def test_get_third_party_packages(self):
+        """Only "package:" lines are kept, with the prefix and CR stripped."""
+        from phone_agent.adb import app_discovery
+
+        async def fake_run(command, device_id=None):
+            assert command == ["shell", "pm", "list", "packages", "-3"]
+            return "package:com.a\r\npackage:com.b\nWARNING: ignored\n"
+
+        app_discovery.invalidate_package_cache("emulator-5554")
+        with patch.object(app_discovery, "run_adb_command_async", fake_run):
+            packages = asyncio.run(app_discovery.get_third_party_packages("emulator-5554"))
+
+        assert packages == ["com.a", "com.b"]
@@ -37,3 +37,50 @@ def test_compress_history_images_runs_synchronously_without_loop(monkeypatch):
 
     assert result is None
     assert calls == [[42]]
+
+
+@pytest.mark.asyncio
+async def test_compress_history_images_skips_when_nothing_new(monkeypatch):
+    agent = PhoneAgent()
+    calls: list[list[int]] = []
+
+    monkeypatch.setattr(agent, "_compress_history_images_sync", calls.append)
+    agent._compressed_indices.update({1, 2})
+
+    loop = asyncio.get_running_loop()
+    assert agent._compress_history_images([3], loop=loop) is None
+    assert agent._compress_history_images([1, 2, 3], loop=loop) is None
+    assert calls == []
+
+
+@pytest.mark.asyncio
+async def test_run_batch_limits_concurrency(monkeypatch):
+    import threading
+    import time
+
+    from phone_agent.agent import StepResult, run_batch
+
+    running = 0
+    peak = 0
+    lock = threading.Lock()
+
+    def fake_step(self, user_prompt=None, is_first=False):
+        nonlocal running, peak
+        with lock:
+            running += 1
+            peak = max(peak, running)
+        time.sleep(0.05)
+        with lock:
+            running -= 1
+        self._step_count += 1
+        return StepResult(
+            success=True, finished=True, action=None, thinking="", message=user_prompt
+        )
+
+    monkeypatch.setattr(PhoneAgent, "_execute_step", fake_step)
+
+    agents = [PhoneAgent() for _ in range(4)]
+    results = await run_batch(agents, [f"task {i}" for i in range(4)], concurrency=2)
+
+    assert results == [f"task {i}" for i in range(4)]
+    assert peak == 2
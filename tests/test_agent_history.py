@@ -0,0 +1,360 @@
+"""
+Tests for PhoneAgent history management
+
+Unit tests for history image compression and UI-element stripping (no model or device required).
+"""
+
+import base64
+from io import BytesIO
+
+from PIL import Image
+
+from phone_agent.agent import PhoneAgent
+from phone_agent.model.client import MessageBuilder
+
+
+def _png_base64(size=(1080, 2400), color="white") -> str:
+    buffer = BytesIO()
+    Image.new("RGB", size, color=color).save(buffer, format="PNG")
+    return base64.b64encode(buffer.getvalue()).decode("ascii")
+
+
+def _image_url(message: dict) -> str:
+    return next(i["image_url"]["url"] for i in message["content"] if i["type"] == "image_url")
+
+
+class TestCompressHistoryImages:
+    """Tests for PhoneAgent._compress_history_images_sync."""
+
+    def test_history_images_become_small_jpegs(self):
+        """All but the newest image are re-encoded as <=512px JPEG."""
+        agent = PhoneAgent()
+        agent._context = [
+            MessageBuilder.create_user_message("old", _png_base64()),
+            MessageBuilder.create_user_message("new", _png_base64()),
+        ]
+
+        agent._compress_history_images_sync([0, 1])
+
+        old_url = _image_url(agent._context[0])
+        assert old_url.startswith("data:image/jpeg;base64,")
+        img = Image.open(BytesIO(base64.b64decode(old_url.split("base64,")[1])))
+        assert img.format == "JPEG" and max(img.size) == 512
+        assert _image_url(agent._context[1]).startswith("data:image/png;base64,")
+
+    def test_compress_image_accepts_raw_bytes(self):
+        """Raw PNG bytes and their base64 form compress to the same JPEG."""
+        from phone_agent.agent import _compress_image
+
+        png = _png_base64(color="red")
+        assert _compress_image(base64.b64decode(png)) == _compress_image(png)
+
+    def test_base64_helpers_round_trip(self):
+        """The module base64 helpers agree with the stdlib."""
+        from phone_agent.agent import _b64decode, _b64encode
+
+        data = bytes(range(256)) * 3
+        assert _b64encode(data) == base64.b64encode(data).decode("ascii")
+        assert _b64decode(_b64encode(data)) == data
+
+    def test_identical_history_images_are_compressed_once(self):
+        """A screenshot seen before reuses the cached JPEG instead of re-encoding."""
+        from unittest.mock import patch
+
+        agent = PhoneAgent()
+        png = _png_base64()
+        agent._context = [MessageBuilder.create_user_message(str(i), png) for i in range(3)]
+
+        with patch("phone_agent.agent.Image.open", wraps=Image.open) as mock_open:
+            agent._compress_history_images_sync([0, 1, 2])
+
+        assert mock_open.call_count == 1
+        assert _image_url(agent._context[0]) == _image_url(agent._context[1])
+        assert len(agent._compress_cache) == 1
+
+    def test_small_screenshots_are_left_alone(self):
+        """PNGs already within 512px are neither decoded nor re-encoded."""
+        from unittest.mock import patch
+
+        agent = PhoneAgent()
+        agent._context = [
+            MessageBuilder.create_user_message("old", _png_base64((360, 512))),
+            MessageBuilder.create_user_message("new", _png_base64((360, 512))),
+        ]
+
+        with patch("phone_agent.agent._compress_image") as mock_compress:
+            agent._compress_history_images_sync([0, 1])
+
+        mock_compress.assert_not_called()
+        assert _image_url(agent._context[0]).startswith("data:image/png")
+
+    def test_processed_messages_are_skipped(self):
+        """A history message is only inspected once; markers stay out of the messages."""
+        agent = PhoneAgent()
+        agent._context = [
+            MessageBuilder.create_user_message("old", _png_base64()),
+            MessageBuilder.create_user_message("new", _png_base64()),
+        ]
+        agent._compress_history_images_sync([0, 1])
+
+        # A PNG sneaking back into an already processed message is left alone
+        agent._context[0]["content"][0]["image_url"]["url"] = "data:image/png;base64," + "A" * 200
+        agent._compress_history_images_sync([0, 1])
+
+        assert agent._compressed_indices == {0}
+        assert set(agent._context[0]["content"][0]["image_url"]) == {"url"}
+        assert _image_url(agent._context[0]).startswith("data:image/png")
+
+    def test_distinct_history_images_use_the_pool(self):
+        """Several new history screenshots are compressed on the shared thread pool."""
+        from unittest.mock import patch
+
+        from phone_agent import agent as agent_module
+
+        agent = PhoneAgent()
+        agent._context = [
+            MessageBuilder.create_user_message(str(i), _png_base64(color=color))
+            for i, color in enumerate(["red", "green", "blue"])
+        ]
+
+        pool = agent_module._get_worker_pool()
+        with patch.object(pool, "submit", wraps=pool.submit) as mock_submit:
+            agent._compress_history_images_sync([0, 1, 2])
+
+        assert mock_submit.call_count == 2
+        assert _image_url(agent._context[0]) != _image_url(agent._context[1])
+        assert all(_image_url(agent._context[i]).startswith("data:image/jpeg") for i in (0, 1))
+        assert len(agent._compress_cache) == 2
+
+    def test_prefetched_screenshot_is_reused(self):
+        """A screenshot compressed in the background is not re-encoded when it becomes history."""
+        from unittest.mock import patch
+
+        agent = PhoneAgent()
+        png = _png_base64()
+        agent._prefetch_compressed(png)
+        agent._context = [
+            MessageBuilder.create_user_message("old", png),
+            MessageBuilder.create_user_message("new", _png_base64(color="black")),
+        ]
+
+        with patch("phone_agent.agent._compress_image") as mock_compress:
+            agent._compress_history_images_sync([0, 1])
+
+        mock_compress.assert_not_called()
+        assert _image_url(agent._context[0]).startswith("data:image/jpeg")
+        assert agent._compress_futures == {}
+
+
+class TestStripXmlFromHistory:
+    """Tests for PhoneAgent._strip_xml_from_history."""
+
+    def test_only_latest_user_message_keeps_ui_elements(self):
+        """Older user messages lose their trailing UI Elements block."""
+        agent = PhoneAgent()
+        text = '** Screen Info **\n\n{}\n\nUI Elements:\n[{"text": "OK"}]'
+        agent._context = [
+            MessageBuilder.create_user_message(text),
+            MessageBuilder.create_assistant_message("tap"),
+            MessageBuilder.create_user_message(text),
+        ]
+
+        agent._strip_xml_from_history()
+
+        assert agent._context[0]["content"][0]["text"] == "** Screen Info **\n\n{}"
+        assert agent._context[2]["content"][0]["text"] == text
+        assert agent._xml_strip_start == 2
+
+    def test_strip_ui_elements_without_section(self):
+        """Text without a UI Elements block is returned unchanged."""
+        from phone_agent.agent import _strip_ui_elements
+
+        assert _strip_ui_elements("no elements here") == "no elements here"
+        assert _strip_ui_elements("a\n\nUI Elements:\nb\n\nUI Elements:\nc") == "a"
+
+
+class TestExecuteStep:
+    """Tests for history bookkeeping across PhoneAgent steps (device and model mocked)."""
+
+    @staticmethod
+    def _run_steps(agent: PhoneAgent, steps: int, model_side_effect=None):
+        from unittest.mock import patch
+
+        from phone_agent.actions.handler import ActionResult
+        from phone_agent.adb.screenshot import Screenshot
+        from phone_agent.model.client import ModelResponse
+
+        png = base64.b64decode(_png_base64((540, 1200)))
+        response = ModelResponse(thinking="t", action='do(action="Back")', raw_content="")
+        with (
+            patch(
+                "phone_agent.agent.get_screenshot",
+                side_effect=lambda _=None: Screenshot(png_bytes=png, width=540, height=1200),
+            ),
+            patch("phone_agent.agent.get_current_app", return_value="Settings"),
+            patch("phone_agent.agent.get_physical_screen_size", return_value=(540, 1200)),
+            patch.object(agent.model_client, "request", return_value=response),
+            patch.object(
+                agent.model_client,
+                "request_stream",
+                return_value=response,
+                side_effect=model_side_effect,
+            ),
+            patch.object(
+                agent.action_handler,
+                "execute",
+                return_value=ActionResult(success=True, should_finish=False),
+            ),
+        ):
+            agent.step("open settings")
+            for _ in range(steps - 1):
+                agent.step()
+
+    def test_old_images_are_dropped(self):
+        """Only max_history_images + 1 user messages keep their screenshot."""
+        from phone_agent.agent import AgentConfig
+
+        agent = PhoneAgent(
+            agent_config=AgentConfig(
+                max_history_images=1, enable_stabilization=False, enable_xml_hierarchy=False
+            )
+        )
+        self._run_steps(agent, 4)
+
+        with_image = [
+            i
+            for i, msg in enumerate(agent._context)
+            if msg["role"] == "user" and any(p["type"] == "image_url" for p in msg["content"])
+        ]
+        assert with_image == list(agent._image_msg_indices) == [5, 7]
+        assert agent.context == tuple(agent._context)
+        assert agent.context is agent.context
+        assert _image_url(agent._context[5]).startswith("data:image/jpeg")
+
+    def test_ui_hierarchy_is_fetched_in_background(self):
+        """The UI hierarchy fetched off-thread still lands in the user message."""
+        import threading
+        from unittest.mock import patch
+
+        from phone_agent.agent import AgentConfig
+
+        agent = PhoneAgent(agent_config=AgentConfig(enable_stabilization=False))
+        threads = []
+
+        def fake_hierarchy(device_id, sort=True):
+            threads.append(threading.current_thread())
+            return []
+
+        with (
+            patch("phone_agent.agent.get_ui_hierarchy", side_effect=fake_hierarchy),
+            patch("phone_agent.agent.format_elements_for_llm", return_value='[{"text":"OK"}]'),
+        ):
+            self._run_steps(agent, 1)
+
+        assert threads and threads[0] is not threading.main_thread()
+        assert '[{"text":"OK"}]' in agent._context[1]["content"][-1]["text"]
+
+    def test_memory_lives_in_the_system_message(self):
+        """UpdateMemory rewrites the system message instead of every user message."""
+        from phone_agent.agent import AgentConfig
+        from phone_agent.model.client import ModelResponse
+
+        agent = PhoneAgent(
+            agent_config=AgentConfig(enable_stabilization=False, enable_xml_hierarchy=False)
+        )
+        responses = [
+            ModelResponse(
+                thinking="",
+                action='do(action="UpdateMemory", content="1. [x] 打开设置")',
+                raw_content="",
+            ),
+            ModelResponse(thinking="", action='do(action="Back")', raw_content=""),
+        ]
+        self._run_steps(agent, 2, model_side_effect=responses)
+
+        assert agent._context[0]["content"].endswith("1. [x] 打开设置")
+        assert all(
+            "Persistent Memory" not in msg["content"][-1]["text"]
+            for msg in agent._context
+            if msg["role"] == "user"
+        )
+
+    def test_bad_request_retry_strips_every_image(self):
+        """A 400 from the model drops all screenshots and retries with text only."""
+        from phone_agent.agent import AgentConfig
+        from phone_agent.model.client import ModelResponse
+
+        agent = PhoneAgent(
+            agent_config=AgentConfig(enable_stabilization=False, enable_xml_hierarchy=False)
+        )
+        self._run_steps(agent, 2)
+
+        response = ModelResponse(thinking="t", action='do(action="Back")', raw_content="")
+        self._run_steps(agent, 1, model_side_effect=[Exception("BadRequestError: 400"), response])
+
+        assert not agent._image_msg_indices
+        assert not any(
+            p["type"] == "image_url"
+            for msg in agent._context
+            if msg["role"] == "user"
+            for p in msg["content"]
+        )
+
+    def test_context_snapshot_sees_in_place_replacements(self):
+        """A snapshot polled during the model call is refreshed after the retry strips images."""
+        from phone_agent.agent import AgentConfig
+
+        agent = PhoneAgent(
+            agent_config=AgentConfig(enable_stabilization=False, enable_xml_hierarchy=False)
+        )
+        self._run_steps(agent, 1)
+
+        polled = []
+
+        def failing_request(*args, **kwargs):
+            # 服务端在模型调用期间轮询 context
+            polled.append(agent.context)
+            raise Exception("BadRequestError: 400")
+
+        self._run_steps(agent, 1, model_side_effect=failing_request)
+
+        # 重试失败：长度未变，但图片已被移除，快照必须重新生成
+        assert len(agent.context) == len(polled[0])
+        assert agent.context is not polled[0]
+        assert agent.context == tuple(agent._context)
+        assert not any(
+            p["type"] == "image_url"
+            for msg in agent.context
+            if msg["role"] == "user"
+            for p in msg["content"]
+        )
+
+
+class TestCallbackSerialization:
+    """Tests for the JSON helper used by step callbacks."""
+
+    def test_dumps_matches_stdlib(self):
+        """The callback serializer emits compact JSON with non-ASCII text intact."""
+        import json
+
+        from phone_agent.agent import _dumps
+
+        action = {"action": "Type", "text": "你好", "element": [500, 120]}
+        assert _dumps(action) == json.dumps(action, ensure_ascii=False, separators=(",", ":"))
+
+
+class TestInstalledAppsPrompt:
+    """Tests for the installed-apps system prompt section."""
+
+    def test_apps_prompt_is_rendered_once(self):
+        """Agents built with the same app list share one rendered section."""
+        from phone_agent.agent import _render_apps_prompt
+
+        apps = [{"name": "微信", "package": "com.tencent.mm"}]
+        _render_apps_prompt.cache_clear()
+        first = PhoneAgent(installed_apps=apps)
+        second = PhoneAgent(installed_apps=apps)
+
+        assert "- 微信 (com.tencent.mm)" in first.agent_config.system_prompt
+        assert first.agent_config.system_prompt == second.agent_config.system_prompt
+        assert _render_apps_prompt.cache_info().hits == 1
@@ -0,0 +1,202 @@
+"""
+Tests for phone_agent.adb.anti_detection
+
+Unit tests for the anti-detection helpers.
+"""
+
+
+class TestBezierCurve:
+    """Tests for bezier_curve."""
+
+    def test_endpoints(self):
+        """Curve starts at p0 and ends at p3."""
+        from phone_agent.adb.anti_detection import bezier_curve
+
+        points = bezier_curve((100, 200), (300, 100), (500, 900), (700, 800), steps=10)
+
+        assert len(points) == 11
+        assert points[0] == (100, 200)
+        assert points[-1] == (700, 800)
+
+    def test_straight_line(self):
+        """Collinear control points produce points on the line."""
+        from phone_agent.adb.anti_detection import bezier_curve
+
+        points = bezier_curve((0, 0), (100, 100), (200, 200), (300, 300), steps=20)
+
+        assert all(x == y for x, y in points)
+
+
+class TestSendeventFrames:
+    """Tests for AntiDetection.swipe_path_to_sendevent_frames."""
+
+    def test_frame_layout(self):
+        """Touch down + one frame per point + touch up, each ending with SYN_REPORT."""
+        from phone_agent.adb.anti_detection import (
+            ABS_MT_POSITION_X,
+            ABS_MT_POSITION_Y,
+            INPUT_EVENT_64,
+            SYN_REPORT,
+            AntiDetection,
+        )
+
+        frames = AntiDetection.swipe_path_to_sendevent_frames([(10, 20), (30, 40)])
+        events = [list(INPUT_EVENT_64.iter_unpack(frame)) for frame in frames]
+
+        assert [len(frame) for frame in events] == [5, 3, 3]
+        assert events[0][2][2:] == (3, ABS_MT_POSITION_X, 10)
+        assert events[0][3][2:] == (3, ABS_MT_POSITION_Y, 20)
+        assert events[1][0][4] == 30
+        assert events[-1][0][4] == -1
+        assert all(frame[-1][2:] == (0, SYN_REPORT, 0) for frame in events)
+
+    def test_32bit_layout(self):
+        """32-bit userspace uses 16-byte input_event records."""
+        from phone_agent.adb.anti_detection import INPUT_EVENT_32, AntiDetection
+
+        frames = AntiDetection.swipe_path_to_sendevent_frames(
+            [(10, 20)], event_struct=INPUT_EVENT_32
+        )
+
+        assert [len(frame) for frame in frames] == [5 * 16, 3 * 16]
+        assert list(INPUT_EVENT_32.iter_unpack(frames[0]))[2][4] == 10
+
+
+class TestHumanDelay:
+    """Tests for AntiDetection.human_delay."""
+
+    def test_uses_current_level_range(self):
+        """Delay stays within the range of the level set at runtime."""
+        from unittest.mock import patch
+
+        from phone_agent.adb.anti_detection import AntiDetection
+
+        ad = AntiDetection({"enabled": True, "level": "low"})
+        ad.set_level("high")
+
+        with patch("phone_agent.adb.anti_detection.time.sleep") as mock_sleep:
+            ad.human_delay()
+
+        delay = mock_sleep.call_args[0][0]
+        assert 0.5 <= delay <= 2.0
+
+    def test_disabled_is_noop(self):
+        """No sleep happens while anti-detection is disabled."""
+        from unittest.mock import patch
+
+        from phone_agent.adb.anti_detection import AntiDetection
+
+        ad = AntiDetection()
+
+        with patch("phone_agent.adb.anti_detection.time.sleep") as mock_sleep:
+            ad.human_delay()
+
+        mock_sleep.assert_not_called()
+
+
+class TestConfigAccess:
+    """Tests for AntiDetection config views."""
+
+    def test_get_config_is_live_read_only_view(self):
+        """get_config reflects updates and rejects writes."""
+        import pytest
+
+        from phone_agent.adb.anti_detection import AntiDetection
+
+        ad = AntiDetection()
+        view = ad.get_config()
+        ad.update_config({"level": "high"})
+
+        assert view["level"] == "high"
+        with pytest.raises(TypeError):
+            view["level"] = "low"
+
+    def test_snapshot_is_independent(self):
+        """snapshot returns a deep copy."""
+        from phone_agent.adb.anti_detection import AntiDetection
+
+        ad = AntiDetection()
+        snapshot = ad.snapshot()
+        snapshot["delay_levels"]["low"]["min"] = 99
+
+        assert ad.config["delay_levels"]["low"]["min"] == 0.2
+
+
+class TestCachedFlags:
+    """Tests for cached feature flags."""
+
+    def test_feature_toggles_take_effect(self):
+        """enable/disable and feature toggles refresh the cached flags."""
+        from phone_agent.adb.anti_detection import AntiDetection
+
+        ad = AntiDetection({"position_offset_percentage": 0.0})
+        assert ad.randomize_point(100, 200, x_range=(0, 10)) == (100, 200)
+
+        ad.enable()
+        ad.enable_feature("position_random")
+        x, y = ad.randomize_point(100, 200, x_range=(0, 10))
+        assert 0 <= x <= 10
+        assert y == 200
+
+        ad.disable()
+        assert ad.randomize_point(100, 200, x_range=(0, 10)) == (100, 200)
+
+
+class TestConfigFile:
+    """Tests for config file load/save."""
+
+    def test_round_trip(self, tmp_path):
+        """Saved config loads back unchanged, including non-ASCII text."""
+        from phone_agent.adb.anti_detection import load_config_from_file, save_config_to_file
+
+        file_path = str(tmp_path / "anti_detection_config.json")
+        config = {"enabled": True, "level": "high", "note": "防风控"}
+
+        save_config_to_file(config, file_path)
+
+        assert load_config_from_file(file_path) == config
+        assert "防风控" in open(file_path, encoding="utf-8").read()
+
+    def test_missing_file(self, tmp_path):
+        """A missing file yields an empty config."""
+        from phone_agent.adb.anti_detection import load_config_from_file
+
+        assert load_config_from_file(str(tmp_path / "missing.json")) == {}
+
+
+class TestGetAntiDetection:
+    """Tests for the lazily created global instance."""
+
+    def test_concurrent_first_calls_share_one_instance(self):
+        """Threads racing on the first call all get the same instance."""
+        import threading
+        import time
+        from unittest.mock import patch
+
+        from phone_agent.adb import anti_detection
+
+        original_init = anti_detection.AntiDetection.__init__
+
+        def slow_init(self, *args, **kwargs):
+            time.sleep(0.05)  # 放大检查与赋值之间的窗口
+            original_init(self, *args, **kwargs)
+
+        results = []
+        barrier = threading.Barrier(8)
+
+        def worker():
+            barrier.wait()
+            results.append(anti_detection.get_anti_detection())
+
+        with (
+            patch.object(anti_detection, "_anti_detection", None),
+            patch.object(anti_detection.AntiDetection, "__init__", slow_init),
+        ):
+            threads = [threading.Thread(target=worker) for _ in range(8)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+
+        assert len(results) == 8
+        assert all(instance is results[0] for instance in results)
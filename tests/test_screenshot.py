@@ -0,0 +1,194 @@
+"""
+Tests for phone_agent.adb.screenshot
+
+Unit tests for screenshot capture and post-processing (no real device required).
+"""
+
+import subprocess
+from io import BytesIO
+from unittest.mock import patch
+
+from PIL import Image
+
+
+def _png_bytes(size=(200, 400), color="white") -> bytes:
+    buffer = BytesIO()
+    Image.new("RGB", size, color=color).save(buffer, format="PNG")
+    return buffer.getvalue()
+
+
+def _completed(stdout: bytes, returncode: int = 0) -> subprocess.CompletedProcess:
+    return subprocess.CompletedProcess(args=[], returncode=returncode, stdout=stdout, stderr=b"")
+
+
+class TestStandardScreenshot:
+    """Tests for the adb screencap path."""
+
+    def test_bright_screenshot_is_returned(self):
+        """A normal screen keeps its dimensions and is not sensitive."""
+        from phone_agent.adb import screenshot
+
+        with patch.object(screenshot.subprocess, "run", return_value=_completed(_png_bytes())):
+            shot = screenshot._get_screenshot_standard("emulator-5554")
+
+        assert (shot.width, shot.height) == (200, 400)
+        assert shot.is_sensitive is False
+
+    def test_black_screenshot_is_sensitive(self):
+        """An almost black frame is treated as a FLAG_SECURE screen."""
+        from phone_agent.adb import screenshot
+
+        png = _png_bytes(color="black")
+        with patch.object(screenshot.subprocess, "run", return_value=_completed(png)):
+            shot = screenshot._get_screenshot_standard("emulator-5554")
+
+        assert shot.is_sensitive is True
+
+    def test_skips_decode_when_check_disabled(self):
+        """Without resize or black-screen check the PNG is never decoded."""
+        from phone_agent.adb import screenshot
+
+        with (
+            patch.object(screenshot, "CHECK_BLACK_SCREEN", False),
+            patch.object(screenshot.subprocess, "run", return_value=_completed(_png_bytes())),
+            patch.object(screenshot.Image, "open") as mock_open,
+        ):
+            shot = screenshot._get_screenshot_standard("emulator-5554")
+
+        mock_open.assert_not_called()
+        assert (shot.width, shot.height) == (200, 400)
+
+    def test_png_size(self):
+        """Dimensions come from the IHDR chunk; non-PNG data yields None."""
+        from phone_agent.adb.screenshot import _png_size
+
+        assert _png_size(_png_bytes((321, 123))) == (321, 123)
+        assert _png_size(b"not a png" * 10) is None
+
+    def test_raw_screencap_is_encoded_as_png(self):
+        """Raw mode wraps the framebuffer and returns a PNG."""
+        import struct
+
+        from phone_agent.adb import screenshot
+
+        raw = struct.pack("<IIII", 2, 3, 1, 0) + bytes([200, 100, 50, 255]) * 6
+        with (
+            patch.object(screenshot, "USE_RAW_SCREENCAP", True),
+            patch.object(screenshot.subprocess, "run", return_value=_completed(raw)) as mock_run,
+        ):
+            shot = screenshot._get_screenshot_standard("emulator-5554")
+
+        assert mock_run.call_args[0][0][-2:] == ["exec-out", "screencap"]
+        assert (shot.width, shot.height) == (2, 3)
+        img = Image.open(BytesIO(shot.png_bytes))
+        assert img.format == "PNG"
+        assert img.getpixel((1, 2)) == (200, 100, 50)
+
+    def test_decode_raw_screencap_bgra(self):
+        """BGRA frames with the legacy 12-byte header are channel-swapped."""
+        import struct
+
+        from phone_agent.adb.screenshot import _decode_raw_screencap
+
+        raw = struct.pack("<III", 1, 1, 5) + bytes([1, 2, 3, 255])
+
+        assert _decode_raw_screencap(raw).getpixel((0, 0)) == (3, 2, 1)
+        assert _decode_raw_screencap(struct.pack("<III", 1, 1, 4) + b"\0\0") is None
+
+    def test_base64_is_lazy(self):
+        """base64_data is derived from png_bytes on first access."""
+        import base64
+
+        from phone_agent.adb.screenshot import Screenshot
+
+        png = _png_bytes()
+        shot = Screenshot(png_bytes=png, width=200, height=400)
+
+        assert "base64_data" not in shot.__dict__
+        assert base64.b64decode(shot.base64_data) == png
+
+    def test_identical_frames_share_base64(self):
+        """A byte-identical screenshot reuses the previous base64 string."""
+        from phone_agent.adb.screenshot import Screenshot
+
+        png = _png_bytes(color="gray")
+        first = Screenshot(png_bytes=png, width=200, height=400)
+        second = Screenshot(png_bytes=bytes(bytearray(png)), width=200, height=400)
+        other = Screenshot(png_bytes=_png_bytes(color="blue"), width=200, height=400)
+
+        assert second.base64_data is first.base64_data
+        assert other.base64_data != first.base64_data
+
+    def test_fallback_png_is_reused(self):
+        """Fallback screenshots share one pre-encoded black PNG."""
+        from phone_agent.adb.screenshot import _create_fallback_screenshot
+
+        first = _create_fallback_screenshot(is_sensitive=True)
+        second = _create_fallback_screenshot(is_sensitive=False)
+
+        assert first.png_bytes is second.png_bytes
+        assert (first.width, first.height) == (1080, 2400)
+        assert first.is_sensitive and not second.is_sensitive
+
+    def test_pooled_screencap_skips_subprocess(self):
+        """With the ADB client pool available no adb process is spawned."""
+        from phone_agent.adb import adb_pool, screenshot
+
+        with (
+            patch.object(adb_pool, "PPADB_AVAILABLE", True),
+            patch.object(adb_pool, "pooled_screencap", return_value=_png_bytes()) as mock_pool,
+            patch.object(screenshot.subprocess, "run") as mock_run,
+        ):
+            shot = screenshot._get_screenshot_standard("emulator-5554")
+
+        mock_pool.assert_called_once_with("emulator-5554")
+        mock_run.assert_not_called()
+        assert (shot.width, shot.height) == (200, 400)
+
+    def test_adb_client_pool_reuses_devices(self):
+        """Device handles are cached per (host, port, serial)."""
+        from unittest.mock import MagicMock
+
+        from phone_agent.adb import adb_pool
+
+        fake_client = MagicMock()
+        with patch.object(adb_pool, "AdbClient", return_value=fake_client) as mock_client:
+            pool = adb_pool.AdbClientPool()
+            first = pool.device("emulator-5554")
+            second = pool.device("emulator-5554")
+            pool.discard("emulator-5554")
+            pool.device("emulator-5554")
+
+        mock_client.assert_called_once_with(host="127.0.0.1", port=5037)
+        assert first is second
+        assert fake_client.device.call_count == 2
+
+    def test_adb_client_pool_needs_single_device_without_serial(self):
+        """Without a serial the pool only answers when exactly one device is attached."""
+        from unittest.mock import MagicMock
+
+        from phone_agent.adb import adb_pool
+
+        phone_a, phone_b = MagicMock(), MagicMock()
+        fake_client = MagicMock()
+        with patch.object(adb_pool, "AdbClient", return_value=fake_client):
+            pool = adb_pool.AdbClientPool()
+
+            fake_client.devices.return_value = [phone_a, phone_b]
+            assert pool.device(None, "frp.example.com", 6100) is None
+
+            fake_client.devices.return_value = [phone_a]
+            assert pool.device(None, "frp.example.com", 6100) is phone_a
+
+            # 之后又连上一台：不复用之前的结果
+            fake_client.devices.return_value = [phone_a, phone_b]
+            assert pool.device(None, "frp.example.com", 6100) is None
+
+    def test_mean_brightness(self):
+        """Brightness is the mean of the grayscale pixels."""
+        from phone_agent.adb.screenshot import _mean_brightness
+
+        img = Image.new("L", (4, 2), color=0)
+        img.paste(255, (0, 0, 2, 2))
+
+        assert abs(_mean_brightness(img) - 127.5) < 1e-6
@@ -0,0 +1,49 @@
+"""
+Tests for phone_agent.adb.shell_session
+
+Uses a local `sh` in place of `adb shell` so no device is required.
+"""
+
+import subprocess
+
+import pytest
+
+# `sh -c "exec sh" shell` behaves like an interactive `adb shell` reading stdin
+FAKE_ADB_PREFIX = ["sh", "-c", "exec sh"]
+
+
+class TestAdbShellSession:
+    """Tests for AdbShellSession."""
+
+    def test_send_returns_exit_code_and_output(self):
+        """Output and exit status of each command are delimited correctly."""
+        from phone_agent.adb.shell_session import AdbShellSession
+
+        session = AdbShellSession(FAKE_ADB_PREFIX)
+        try:
+            assert session.send("echo hello; echo world") == (0, "hello\nworld\n")
+            assert session.send("printf partial") == (0, "partial")
+            assert session.send("false")[0] == 1
+        finally:
+            session.close()
+
+    def test_timeout_respawns_session(self):
+        """A timed-out command closes the session and the next command still works."""
+        from phone_agent.adb.shell_session import AdbShellSession
+
+        session = AdbShellSession(FAKE_ADB_PREFIX)
+        try:
+            with pytest.raises(subprocess.TimeoutExpired):
+                session.send("sleep 5", timeout=0.2)
+            assert session.send("echo ok") == (0, "ok\n")
+        finally:
+            session.close()
+
+    def test_spawn_failure_is_reported(self):
+        """A missing adb binary raises AdbShellUnavailableError."""
+        from phone_agent.adb.shell_session import AdbShellSession, AdbShellUnavailableError
+
+        session = AdbShellSession(["/nonexistent/adb"])
+
+        with pytest.raises(AdbShellUnavailableError):
+            session.send("echo hi")
@@ -0,0 +1,80 @@
+"""
+Tests for phone_agent.adb.smart_input
+
+Unit tests for input method selection and caching (no real device required).
+"""
+
+from unittest.mock import patch
+
+
+class TestInputMethodCache:
+    """Tests for the per-device input method LRU."""
+
+    def test_lru_eviction(self):
+        """The least recently used device is evicted once the cache is full."""
+        from phone_agent.adb.smart_input import _InputMethodCache
+
+        cache = _InputMethodCache(maxsize=2)
+        cache.set("a", "yadb")
+        cache.set("b", "adb_keyboard")
+        assert cache.get("a") == "yadb"  # a 变为最近使用
+        cache.set("c", "yadb")
+
+        assert cache.get("b") is None
+        assert cache.get("a") == "yadb"
+        assert len(cache) == 2
+
+    def test_invalidate(self):
+        """invalidate reports whether an entry was removed."""
+        from phone_agent.adb.smart_input import _InputMethodCache
+
+        cache = _InputMethodCache()
+        cache.set("a", "yadb")
+
+        assert cache.invalidate("a") is True
+        assert cache.invalidate("a") is False
+
+
+class TestSmartTypeText:
+    """Tests for method probing in smart_type_text."""
+
+    def test_falls_back_and_caches_method(self):
+        """When yadb fails the ADB Keyboard method is used and remembered."""
+        from phone_agent.adb import smart_input
+
+        smart_input.reset_input_method("emulator-5554")
+        with (
+            patch.object(smart_input, "_try_yadb_input", return_value=False) as mock_yadb,
+            patch.object(smart_input, "_try_adb_keyboard_input", return_value=True),
+        ):
+            assert smart_input.smart_type_text("hi", device_id="emulator-5554")
+            assert smart_input.get_input_method("emulator-5554") == "adb_keyboard"
+
+            assert smart_input.smart_type_text("again", device_id="emulator-5554")
+
+        mock_yadb.assert_called_once()
+        smart_input.reset_input_method("emulator-5554")
+
+
+class TestAdbKeyboardInput:
+    """Tests for the ADB Keyboard fallback."""
+
+    def test_clear_type_restore_in_one_batch(self):
+        """Clear, type and keyboard restore are sent as one adb shell batch."""
+        from phone_agent.adb import smart_input
+
+        with (
+            patch(
+                "phone_agent.adb.input.detect_and_set_adb_keyboard",
+                return_value="com.sohu.inputmethod.sogou/.SogouIME",
+            ),
+            patch("phone_agent.adb.device.run_adb_batch") as mock_batch,
+            patch.object(smart_input.time, "sleep"),
+        ):
+            assert smart_input._try_adb_keyboard_input("你好", "emulator-5554")
+
+        mock_batch.assert_called_once()
+        commands = mock_batch.call_args[0][0]
+        assert commands[0] == "am broadcast -a ADB_CLEAR_TEXT"
+        assert commands[1].startswith("am broadcast -a ADB_INPUT_B64 --es msg ")
+        assert commands[-1] == "ime set com.sohu.inputmethod.sogou/.SogouIME"
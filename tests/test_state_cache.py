@@ -0,0 +1,119 @@
+"""
+Tests for phone_agent.adb.state_cache
+
+Unit tests for the per-device TTL + single-flight caches.
+"""
+
+import asyncio
+import threading
+import time
+
+import pytest
+
+
+class TestTTLCache:
+    """Tests for the thread-based ttl_cache decorator."""
+
+    def test_hits_within_ttl_and_invalidate(self):
+        """Results are reused per device until invalidated."""
+        from phone_agent.adb.state_cache import ttl_cache
+
+        calls = []
+
+        @ttl_cache(ttl=60)
+        def query(device_id=None):
+            calls.append(device_id)
+            return f"{device_id}-{len(calls)}"
+
+        assert query("a") == "a-1"
+        assert query("a") == "a-1"
+        assert query("b") == "b-2"
+
+        query.invalidate("a")
+        assert query("a") == "a-3"
+        assert query("b") == "b-2"
+
+    def test_expired_entry_is_reloaded(self):
+        """An entry older than the ttl triggers a new query."""
+        from phone_agent.adb.state_cache import ttl_cache
+
+        calls = []
+
+        @ttl_cache(ttl=0.01)
+        def query(device_id=None):
+            calls.append(device_id)
+            return len(calls)
+
+        assert query() == 1
+        time.sleep(0.02)
+        assert query() == 2
+
+    def test_concurrent_calls_share_one_query(self):
+        """Threads asking for the same device wait for a single query."""
+        from phone_agent.adb.state_cache import ttl_cache
+
+        calls = []
+        release = threading.Event()
+
+        @ttl_cache(ttl=60)
+        def query(device_id=None):
+            calls.append(device_id)
+            release.wait(5)
+            return "focus"
+
+        results = []
+        threads = [threading.Thread(target=lambda: results.append(query("a"))) for _ in range(5)]
+        for t in threads:
+            t.start()
+        time.sleep(0.05)
+        release.set()
+        for t in threads:
+            t.join(5)
+
+        assert calls == ["a"]
+        assert results == ["focus"] * 5
+
+    def test_errors_are_not_cached(self):
+        """A failing query is retried on the next call."""
+        from phone_agent.adb.state_cache import ttl_cache
+
+        calls = []
+
+        @ttl_cache(ttl=60)
+        def query(device_id=None):
+            calls.append(device_id)
+            if len(calls) == 1:
+                raise RuntimeError("adb offline")
+            return "ok"
+
+        with pytest.raises(RuntimeError):
+            query("a")
+        assert query("a") == "ok"
+
+
+class TestAsyncTTLCache:
+    """Tests for the asyncio-based async_ttl_cache decorator."""
+
+    def test_gather_shares_one_query(self):
+        """Concurrent coroutines for one device await the same query."""
+        from phone_agent.adb.state_cache import async_ttl_cache
+
+        calls = []
+
+        @async_ttl_cache(ttl=60)
+        async def query(device_id=None):
+            calls.append(device_id)
+            await asyncio.sleep(0.01)
+            return ["com.a"]
+
+        async def main():
+            return await asyncio.gather(*(query("a") for _ in range(5)), query("b"))
+
+        results = asyncio.run(main())
+
+        assert sorted(calls) == ["a", "b"]
+        assert results == [["com.a"]] * 6
+
+        query.invalidate()
+        asyncio.run(query("a"))
+        assert len(calls) == 3
@@ -0,0 +1,211 @@
+"""
+Tests for phone_agent.adb.xml_tree
+
+Unit tests for UI hierarchy parsing and LLM formatting (no real device required).
+"""
+
+from unittest.mock import patch
+
+import pytest
+
+from phone_agent.adb.xml_tree import LXML_AVAILABLE
+
+# 两种解析后端：lxml（未安装时跳过）与 expat
+BACKENDS = [
+    pytest.param(
+        True, id="lxml", marks=pytest.mark.skipif(not LXML_AVAILABLE, reason="lxml not installed")
+    ),
+    pytest.param(False, id="expat"),
+]
+
+NESTED_TIE_XML = """<hierarchy rotation="0">
+  <node class="android.widget.FrameLayout" resource-id="com.example:id/row" text="row"
+        clickable="true" bounds="[0,200][1080,300]">
+    <node class="android.widget.TextView" resource-id="com.example:id/title" text="title"
+          clickable="true" bounds="[0,200][1080,300]" />
+  </node>
+</hierarchy>
+"""
+
+SAMPLE_XML = """<?xml version='1.0' encoding='UTF-8' standalone='yes' ?>
+<hierarchy rotation="0">
+  <node class="android.widget.FrameLayout" bounds="[0,0][1080,2400]" clickable="false">
+    <node class="android.widget.TextView" resource-id="com.android.systemui:id/clock"
+          text="12:00" bounds="[20,10][120,60]" />
+    <node class="android.widget.Button" resource-id="com.example:id/ok" text="确定"
+          clickable="true" bounds="[100,1000][300,1100]" />
+    <node class="android.widget.EditText" resource-id="com.example:id/input"
+          focusable="true" bounds="[0,500][1080,600]" />
+    <node class="android.view.View" content-desc="头像" bounds="[0,800][100,900]" />
+    <node class="android.view.View" clickable="true" bounds="[5,5][5,50]" />
+  </node>
+</hierarchy>
+"""
+
+
+class TestParseUiXml:
+    """Tests for parse_ui_xml."""
+
+    def test_extracts_informative_nodes_sorted_by_y(self):
+        """Layout containers and zero-area nodes are skipped; results go top to bottom."""
+        from phone_agent.adb.xml_tree import parse_ui_xml
+
+        elements = parse_ui_xml(SAMPLE_XML)
+
+        assert [e.text for e in elements] == ["12:00", "", "头像", "确定"]
+        button = elements[-1]
+        assert button.resource_id == "ok"
+        assert button.element_type == "Button"
+        assert button.center == (200, 1050)
+        assert button.clickable and not button.focusable
+        assert elements[1].focusable
+
+    @pytest.mark.parametrize("use_lxml", BACKENDS)
+    def test_invalid_xml_returns_empty_list(self, use_lxml):
+        """Malformed or truncated dumps are logged and yield no elements on every backend."""
+        from phone_agent.adb import xml_tree
+
+        truncated = SAMPLE_XML.replace("</node>\n</hierarchy>", "</hierarchy>")
+        with patch.object(xml_tree, "LXML_AVAILABLE", use_lxml):
+            assert xml_tree.parse_ui_xml("<hierarchy><node") == []
+            assert xml_tree.parse_ui_xml(truncated) == []
+            assert xml_tree.parse_ui_xml("") == []
+
+    @pytest.mark.parametrize("use_lxml", BACKENDS)
+    @pytest.mark.parametrize("sort", [True, False])
+    def test_parent_precedes_child_with_equal_bounds(self, use_lxml, sort):
+        """Nodes come out in document order (parent first) regardless of backend."""
+        from phone_agent.adb import xml_tree
+
+        with patch.object(xml_tree, "LXML_AVAILABLE", use_lxml):
+            elements = xml_tree.parse_ui_xml(NESTED_TIE_XML, sort=sort)
+
+        assert [e.text for e in elements] == ["row", "title"]
+
+    def test_malformed_bounds_are_skipped(self):
+        """Nodes without exactly four bound coordinates are dropped."""
+        from phone_agent.adb.xml_tree import parse_ui_xml
+
+        xml = (
+            '<hierarchy><node text="a" bounds="[0,0][10]" />'
+            '<node text="b" bounds="" /><node text="c" bounds="[0,200][10,220]" /></hierarchy>'
+        )
+
+        assert [e.text for e in parse_ui_xml(xml)] == ["c"]
+
+    def test_expat_chunks_match_single_pass(self):
+        """Feeding expat in tiny chunks yields the same elements."""
+        from phone_agent.adb import xml_tree
+
+        expected = xml_tree.parse_ui_xml(SAMPLE_XML)
+        with (
+            patch.object(xml_tree, "LXML_AVAILABLE", False),
+            patch.object(xml_tree, "_EXPAT_CHUNK_SIZE", 7),
+        ):
+            assert xml_tree.parse_ui_xml(SAMPLE_XML) == expected
+
+
+class TestFormatElementsForLlm:
+    """Tests for format_elements_for_llm."""
+
+    def test_status_bar_and_top_area_are_filtered(self):
+        """Status-bar ids (any case) and elements above y=100 are dropped."""
+        import json
+
+        from phone_agent.adb.xml_tree import UIElement, format_elements_for_llm
+
+        def elem(resource_id, text, center, clickable=True):
+            return UIElement(resource_id, text, "View", "", center, clickable, False, True)
+
+        elements = [
+            elem("Battery_Remaining_Icon", "80%", (500, 1200)),
+            elem("title", "top", (500, 50)),
+            elem("ok", "确定", (540, 1200)),
+            elem("", "说明", (100, 2000), clickable=False),
+        ]
+
+        data = json.loads(format_elements_for_llm(elements))
+
+        assert data == [
+            {"xy": [500, 500], "text": "确定", "id": "ok", "tap": True},
+            {"xy": [92, 833], "text": "说明"},
+        ]
+
+    def test_ui_element_is_slotted_and_hashable(self):
+        """UIElement has no per-instance __dict__ and can be deduplicated in sets."""
+        from phone_agent.adb.xml_tree import UIElement
+
+        a = UIElement("ok", "确定", "Button", "[0,0][2,2]", (1, 1), True, False, True)
+        b = UIElement("ok", "确定", "Button", "[0,0][2,2]", (1, 1), True, False, True)
+
+        assert not hasattr(a, "__dict__")
+        assert len({a, b}) == 1
+
+    def test_json_backends_agree(self):
+        """orjson and stdlib json produce byte-identical output."""
+        from phone_agent.adb import xml_tree
+
+        elements = [
+            xml_tree.UIElement("ok", '确定 "go" 😀', "Button", "", (540, 1200), True, False, True)
+        ]
+        fast = xml_tree.format_elements_for_llm(elements)
+        with patch.object(xml_tree, "ORJSON_AVAILABLE", False):
+            slow = xml_tree.format_elements_for_llm(elements)
+
+        assert fast == slow
+
+    def test_top_k_matches_stable_sort(self):
+        """Top-K selection keeps the order a stable priority sort would give."""
+        import json
+
+        from phone_agent.adb.xml_tree import UIElement, format_elements_for_llm
+
+        elements = [
+            UIElement(
+                f"id{i}",
+                f"t{i}" if i % 2 else "",
+                "View",
+                "",
+                (500, 200 + i),
+                i % 3 == 0,
+                i % 4 == 0,
+                True,
+            )
+            for i in range(40)
+        ]
+
+        ids = [item["id"] for item in json.loads(format_elements_for_llm(elements, 5))]
+
+        def score(e):
+            return (3 if e.clickable else 0) + (2 if e.focusable else 0) + (1 if e.text else 0)
+
+        expected = sorted(
+            (e for e in elements if e.clickable or e.focusable or e.text), key=score, reverse=True
+        )[:5]
+        assert ids == [e.resource_id for e in expected]
+
+    def test_output_does_not_depend_on_parse_order(self):
+        """Formatting an unsorted parse matches formatting the Y-sorted parse."""
+        from phone_agent.adb.xml_tree import format_elements_for_llm, parse_ui_xml
+
+        unsorted = parse_ui_xml(SAMPLE_XML, sort=False)
+
+        assert unsorted != parse_ui_xml(SAMPLE_XML)
+        assert format_elements_for_llm(unsorted) == format_elements_for_llm(
+            parse_ui_xml(SAMPLE_XML)
+        )
+
+    def test_format_from_xml_is_cached_by_content(self):
+        """Identical dumps reuse the cached JSON; different arguments do not."""
+        from phone_agent.adb import xml_tree
+
+        xml_tree._llm_format_cache.clear()
+        with patch.object(xml_tree, "parse_ui_xml", wraps=xml_tree.parse_ui_xml) as mock_parse:
+            first = xml_tree.format_elements_for_xml(SAMPLE_XML)
+            second = xml_tree.format_elements_for_xml(SAMPLE_XML)
+            xml_tree.format_elements_for_xml(SAMPLE_XML, max_elements=1)
+
+        assert (
+            first == second == xml_tree.format_elements_for_llm(xml_tree.parse_ui_xml(SAMPLE_XML))
+        )
+        assert mock_parse.call_count == 2
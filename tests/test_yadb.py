@@ -0,0 +1,215 @@
+"""
+Tests for phone_agent.adb.yadb
+
+Unit tests for yadb helpers (no real device required).
+"""
+
+import hashlib
+import os
+from unittest.mock import patch
+
+
+class TestLocalMd5:
+    """Tests for the local yadb binary digest."""
+
+    def test_digest_is_cached_until_file_changes(self, tmp_path):
+        """The file is hashed once per (mtime, size); rewriting it re-hashes."""
+        from phone_agent.adb import yadb
+
+        binary = tmp_path / "yadb"
+        binary.write_bytes(b"first")
+
+        with patch.object(yadb, "open", wraps=open) as mock_open:
+            assert yadb._check_md5(binary) == hashlib.md5(b"first").hexdigest()
+            assert yadb._check_md5(binary) == hashlib.md5(b"first").hexdigest()
+            assert mock_open.call_count == 1
+
+            binary.write_bytes(b"second!")
+            os.utime(binary, ns=(0, 0))
+            assert yadb._check_md5(binary) == hashlib.md5(b"second!").hexdigest()
+            assert mock_open.call_count == 2
+
+    def test_missing_file_has_empty_digest(self, tmp_path):
+        """A missing binary yields an empty digest instead of raising."""
+        from phone_agent.adb import yadb
+
+        assert yadb._check_md5(tmp_path / "missing") == ""
+
+
+class TestInstalledCache:
+    """Tests for the per-device "yadb installed" cache."""
+
+    def setup_method(self):
+        from phone_agent.adb import yadb
+
+        yadb._installed.clear()
+
+    def test_remote_check_runs_once(self):
+        """Repeated ensure_yadb_ready calls skip the md5sum round-trip."""
+        from phone_agent.adb import yadb
+
+        with patch.object(yadb, "is_yadb_installed", return_value=True) as mock_check:
+            assert yadb.ensure_yadb_ready("emulator-5554")
+            assert yadb.ensure_yadb_ready("emulator-5554")
+            assert yadb.ensure_yadb_ready("emulator-5556")
+
+        assert mock_check.call_count == 2
+
+    def test_failed_command_invalidates(self):
+        """A failing yadb command forces a fresh install check next time."""
+        from phone_agent.adb import yadb
+
+        with (
+            patch.object(yadb, "is_yadb_installed", return_value=True) as mock_check,
+            patch.object(yadb, "run_shell_command", return_value=(1, "boom")),
+        ):
+            assert yadb.long_press(1, 2, device_id="emulator-5554") is False
+            assert yadb.ensure_yadb_ready("emulator-5554")
+
+        assert mock_check.call_count == 2
+
+    def test_invalid_device_id_is_rejected(self):
+        """Malformed ids never reach the persistent shell."""
+        from phone_agent.adb import yadb
+
+        with (
+            patch.object(yadb, "is_yadb_installed") as mock_check,
+            patch.object(yadb, "run_shell_command") as mock_shell,
+        ):
+            assert not yadb.ensure_yadb_ready("emulator-5554; reboot")
+            assert not yadb.write_clipboard("x", device_id="emulator-5554\nreboot")
+
+        mock_check.assert_not_called()
+        mock_shell.assert_not_called()
+
+
+class TestShellCommands:
+    """Tests for yadb commands sent over the persistent adb shell."""
+
+    def test_type_text_uses_shell_session(self):
+        """type_text sends one app_process line through the shared shell helper."""
+        from phone_agent.adb import device, yadb
+
+        with (
+            patch.object(yadb, "ensure_yadb_ready", return_value=True),
+            patch.object(yadb, "run_shell_command", return_value=(0, "")) as mock_shell,
+            patch.object(yadb.subprocess, "run") as mock_run,
+        ):
+            assert yadb.type_text("你好 世界", device_id="emulator-5554")
+
+        mock_run.assert_not_called()
+        prefix, command, _ = mock_shell.call_args[0]
+        # 与 device 模块同一前缀（ADB_PATH），共用同一个常驻 shell 会话
+        assert prefix == device._get_adb_prefix("emulator-5554")
+        assert prefix[0] == device.ADB_PATH
+        assert command.startswith("app_process -Djava.class.path=/data/local/tmp/yadb ")
+        assert command.endswith("com.ysbing.yadb.Main -keyboard '你好 世界'")
+
+    def test_write_clipboard_quotes_text(self):
+        """Quotes and shell metacharacters reach yadb as one literal argument."""
+        import shlex
+        import shutil
+
+        import pytest
+
+        from phone_agent.adb import yadb
+        from phone_agent.adb.shell_session import AdbShellSession
+
+        if shutil.which("sh") is None:
+            pytest.skip("needs a local sh")
+
+        text = 'don\'t; echo $HOME && "x" `id` | tail'
+        with (
+            patch.object(yadb, "ensure_yadb_ready", return_value=True),
+            patch.object(yadb, "run_shell_command", return_value=(0, "")) as mock_shell,
+        ):
+            assert yadb.write_clipboard(text, device_id="emulator-5554")
+
+        _, command, _ = mock_shell.call_args[0]
+        assert command.endswith("com.ysbing.yadb.Main -writeClipboard " + shlex.quote(text))
+
+        # 用本地 sh 充当设备端持久 shell：文本原样回显，且结束标记未被吞掉
+        session = AdbShellSession(["sh", "-c", "exec sh"])
+        try:
+            quoted = command.split(" -writeClipboard ", 1)[1]
+            returncode, output = session.send(f"printf %s {quoted}", timeout=5)
+        finally:
+            session.close()
+        assert returncode == 0
+        assert output == text
+
+    def test_force_screenshot_uses_exec_out(self):
+        """PNG bytes are streamed with exec-out instead of a shell pty."""
+        import subprocess
+
+        from phone_agent.adb import yadb
+
+        png = b"\x89PNG\r\n\x1a\n" + b"\0" * 200
+        done = subprocess.CompletedProcess(args=[], returncode=0, stdout=png, stderr=b"")
+        with (
+            patch.object(yadb, "ensure_yadb_ready", return_value=True),
+            patch.object(yadb.subprocess, "run", return_value=done) as mock_run,
+        ):
+            assert yadb.force_screenshot(device_id="emulator-5554") == png
+
+        cmd = mock_run.call_args[0][0]
+        assert cmd[:4] == ["adb", "-s", "emulator-5554", "exec-out"]
+        assert cmd[-1] == "-screenshot"
+
+    def test_base64_dimensions_come_from_png_header(self):
+        """include_dimensions reads IHDR instead of decoding the image."""
+        import base64
+        from io import BytesIO
+
+        from PIL import Image
+
+        from phone_agent.adb import yadb
+
+        buffer = BytesIO()
+        Image.new("RGB", (30, 70)).save(buffer, format="PNG")
+        png = buffer.getvalue()
+
+        with (
+            patch.object(yadb, "force_screenshot", return_value=png),
+            patch.object(yadb.Image, "open") as mock_open,
+        ):
+            data = yadb.force_screenshot_base64(include_dimensions=True)
+
+        mock_open.assert_not_called()
+        assert (data["width"], data["height"]) == (30, 70)
+        assert base64.b64decode(data["base64_data"]) == png
+        assert data["format"] == "png"
+
+    def test_base64_can_be_reencoded_as_webp(self):
+        """image_format="webp" returns WEBP bytes with the original dimensions."""
+        import base64
+        from io import BytesIO
+
+        from PIL import Image
+
+        from phone_agent.adb import yadb
+
+        buffer = BytesIO()
+        Image.new("RGB", (30, 70), color="white").save(buffer, format="PNG")
+
+        with patch.object(yadb, "force_screenshot", return_value=buffer.getvalue()):
+            data = yadb.force_screenshot_base64(include_dimensions=True, image_format="webp")
+
+        img = Image.open(BytesIO(base64.b64decode(data["base64_data"])))
+        assert img.format == "WEBP"
+        assert data["format"] == "webp"
+        assert img.size == (data["width"], data["height"]) == (30, 70)
+
+    def test_install_check_uses_shell_session(self):
+        """The remote md5sum check runs over the persistent shell."""
+        from phone_agent.adb import yadb
+
+        output = f"{yadb.YADB_MD5}  {yadb.YADB_DEVICE_PATH}\n"
+        with (
+            patch.object(yadb, "run_shell_command", return_value=(0, output)) as mock_shell,
+            patch.object(yadb.subprocess, "run") as mock_run,
+        ):
+            assert yadb.is_yadb_installed("emulator-5554")
+
+        mock_run.assert_not_called()
+        assert mock_shell.call_args[0][1] == "md5sum /data/local/tmp/yadb"